@@ -0,0 +1,987 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 性能基准测试
+Chinese ID Card Validator - Benchmarks
+
+用法:
+    python benchmark.py batch [-n 记录数]
+    python benchmark.py scaling [-n 记录数] [--workers 1 2 4 8]
+    python benchmark.py mmap [-n 记录数]
+    python benchmark.py extract [--lines 500000]
+    python benchmark.py redact [--lines 500000]
+    python benchmark.py dates [-n 记录数]
+    python benchmark.py memory [-n 记录数]
+    python benchmark.py fastpath [-n 记录数]
+    python benchmark.py normalize [-n 记录数]
+    python benchmark.py areas
+    python benchmark.py ages [-n 记录数]
+    python benchmark.py web [-n 大批量记录数] [--pool-workers 2]
+    python benchmark.py coalesce [-n 记录数] [--threads 64] [--max-batch 64] [--max-delay-us 500]
+    python benchmark.py cache [-n 记录数] [--distinct 50000] [--skew 1.0] [--maxsize 10000]
+    python benchmark.py formats [-n 记录数]
+    python benchmark.py fields [-n 记录数]
+    python benchmark.py upload [--sizes 10000 100000 500000 1000000]
+    python benchmark.py admission [-n 记录数] [--flood-threads 8] [--max-active 25000]
+    python benchmark.py serve [--workers 4] [--requests 200]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from typing import List
+
+from id_validator import ChineseIDValidator
+
+
+# 规范化之前的格式正则（对照组）
+_LEGACY_FORMAT = re.compile(r'\d{17}[\dXx]')
+
+
+def sample_ids(count: int, seed: int = 2025, invalid_ratio: float = 0.1) -> List[str]:
+    """
+    生成测试用身份证号码（大部分有效，按比例混入各类错误）
+
+    Args:
+        count: 记录数
+        seed: 随机种子
+        invalid_ratio: 无效号码所占比例
+
+    Returns:
+        List[str]: 身份证号码列表
+    """
+    rng = random.Random(seed)
+    validator = ChineseIDValidator()
+    areas = list(validator.AREA_CODES)
+    ids = []
+    for _ in range(count):
+        id_17 = '%s0101%04d%02d%02d%03d' % (
+            rng.choice(areas), rng.randint(1930, 2015), rng.randint(1, 12), rng.randint(1, 28), rng.randint(0, 999))
+        id_number = id_17 + validator.generate_check_code(id_17)
+        if rng.random() < invalid_ratio:
+            kind = rng.randint(0, 3)
+            if kind == 0:
+                id_number = id_number[:17]
+            elif kind == 1:
+                id_number = '99' + id_number[2:]
+            elif kind == 2:
+                id_number = id_number[:10] + '1302' + id_number[14:]
+            else:
+                id_number = id_number[:17] + ('0' if id_number[17] != '0' else '1')
+        ids.append(id_number)
+    return ids
+
+
+def write_sample_file(path: str, count: int, chunk: int = 100000) -> None:
+    """生成每行一个号码的测试文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for offset in range(0, count, chunk):
+            ids = sample_ids(min(chunk, count - offset), seed=offset)
+            f.write('\n'.join(ids) + '\n')
+
+
+def write_sample_log(path: str, lines: int, id_ratio: float = 0.05, seed: int = 2025) -> None:
+    """
+    生成模拟的应用日志：时间戳、线程名、订单号、金额、trace id、IP 等大量数字，按比例夹带身份证号码
+
+    Args:
+        path: 输出文件路径
+        lines: 行数
+        id_ratio: 含身份证号码的行所占比例
+        seed: 随机种子
+    """
+    rng = random.Random(seed)
+    ids = sample_ids(10000, seed=seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(lines):
+            stamp = (f'2025-03-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:'
+                     f'{rng.randint(0, 59):02d}.{rng.randint(0, 999):03d}')
+            thread = f'http-nio-8080-exec-{rng.randint(1, 200)}'
+            if rng.random() < id_ratio:
+                f.write(f'{stamp} INFO  [{thread}] c.e.user.AuthService - 实名认证通过 uid={rng.randint(1, 10 ** 9)} '
+                        f'idcard={rng.choice(ids)} phone=138{rng.randint(0, 10 ** 8 - 1):08d}\n')
+            else:
+                f.write(f'{stamp} DEBUG [{thread}] c.e.order.OrderService - order {rng.randint(10 ** 14, 10 ** 15)} '
+                        f'paid amount={rng.randint(1, 99999)}.{rng.randint(0, 99):02d} '
+                        f'trace={rng.getrandbits(64):016x} ip=10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.'
+                        f'{rng.randint(0, 255)}\n')
+
+
+def _report(label: str, count: int, seconds: float, note: str = '') -> None:
+    print(f"  {label:<16} {count / seconds:>14,.0f} 条/秒  ({seconds:.3f}s){note}")
+
+
+def bench_batch(args) -> None:
+    """逐条 validate() 与 numpy 批量 validate_many() 的吞吐量对比"""
+    validator = ChineseIDValidator()
+    ids = sample_ids(args.count)
+    print(f"批量验证基准测试：{len(ids):,} 条记录")
+
+    start = time.perf_counter()
+    scalar = [validator.validate(id_number)['valid'] for id_number in ids]
+    _report('validate()', len(ids), time.perf_counter() - start)
+
+    start = time.perf_counter()
+    batch = validator.validate_many(ids)
+    _report('validate_many()', len(ids), time.perf_counter() - start)
+
+    assert scalar == batch.valid.tolist(), '批量结果与逐条结果不一致'
+
+
+def bench_scaling(args) -> None:
+    """多进程分片验证在不同进程数下的吞吐量"""
+    from id_parallel import validate_file_parallel
+    from id_stream import validate_file
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ids.txt')
+        write_sample_file(path, args.count)
+        print(f"分片并行验证基准测试：{args.count:,} 条记录，{os.path.getsize(path) / 1e6:.1f} MB")
+
+        stats = validate_file(path, os.path.join(tmp, 'ok.txt'), os.path.join(tmp, 'bad.txt'))
+        _report('流式单进程', stats.total, stats.elapsed)
+        baseline = stats.elapsed
+
+        for workers in args.workers:
+            for ordered in (True, False):
+                stats = validate_file_parallel(path, os.path.join(tmp, 'ok.txt'), os.path.join(tmp, 'bad.txt'),
+                                               workers=workers, ordered=ordered, shard_size=args.shard_size)
+                label = f"{workers} 进程{'有序' if ordered else '无序'}"
+                _report(label, stats.total, stats.elapsed, f"  加速比 {baseline / stats.elapsed:.2f}x")
+
+
+def bench_mmap(args) -> None:
+    """定长文件：流式逐行验证与内存映射字节验证的对比"""
+    from id_mmap import scan_fixed_width, validate_file_mmap
+    from id_stream import validate_file
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'ids.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.writelines(id_number.ljust(18, '0') + '\n' for id_number in sample_ids(args.count))
+        print(f"定长文件扫描基准测试：{args.count:,} 条记录，{os.path.getsize(path) / 1e6:.1f} MB")
+
+        stats = validate_file(path, os.path.join(tmp, 'ok.txt'), os.path.join(tmp, 'bad.txt'))
+        _report('流式逐行', stats.total, stats.elapsed)
+
+        stats = validate_file_mmap(path, os.path.join(tmp, 'ok.txt'), os.path.join(tmp, 'bad.txt'))
+        _report('mmap 含输出', stats.total, stats.elapsed)
+
+        start = time.perf_counter()
+        result = scan_fixed_width(path)
+        _report('mmap 仅偏移量', result.total, time.perf_counter() - start)
+
+
+def bench_extract(args) -> None:
+    """从日志中提取号码：正则逐个匹配与按数字串向量化查找的吞吐量"""
+    from id_extract import CANDIDATE_PATTERN, extract_file
+
+    validator = ChineseIDValidator().pinned()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'app.log')
+        write_sample_log(path, args.lines)
+        size = os.path.getsize(path)
+        print(f"日志提取基准测试：{args.lines:,} 行，{size / 1e6:.1f} MB")
+
+        # 对照组：正则找候选，逐个 is_valid()（未安装 numpy 时 id_extract 使用的方式）
+        start = time.perf_counter()
+        found = 0
+        with open(path, 'rb') as f:
+            data = f.read()
+        for match in CANDIDATE_PATTERN.finditer(data):
+            found += validator.is_valid(match.group().decode('ascii'))
+        seconds = time.perf_counter() - start
+        print(f"  {'正则 + is_valid()':<18} {size / seconds / 1e6:>8.1f} MB/s  ({seconds:.3f}s，{found:,} 个号码)")
+
+        stats = extract_file(path, None, validator)
+        print(f"  {'extract_file()':<18} {size / stats.elapsed / 1e6:>8.1f} MB/s  ({stats.elapsed:.3f}s，"
+              f"{stats.valid:,} 个号码，候选 {stats.total:,} 个)")
+
+
+def bench_redact(args) -> None:
+    """流式脱敏：整个文件、逐行写入 RedactingWriter（立即处理 / 缓冲）的吞吐量"""
+    import io
+    from id_redact import RedactingWriter, redact_file
+
+    validator = ChineseIDValidator().pinned()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'app.log')
+        write_sample_log(path, args.lines)
+        size = os.path.getsize(path)
+        print(f"流式脱敏基准测试：{args.lines:,} 行，{size / 1e6:.1f} MB")
+
+        stats = redact_file(path, os.path.join(tmp, 'redacted.log'), validator=validator)
+        print(f"  {'redact_file()':<26} {size / stats.elapsed / 1e6:>8.1f} MB/s  ({stats.valid:,} 个号码)")
+
+        with open(path, 'rb') as f:
+            lines = f.readlines()
+        for label, buffer_size in (('逐行写入，立即处理', 0), ('逐行写入，64KB 缓冲', 64 * 1024)):
+            writer = RedactingWriter(io.BytesIO(), validator=validator, buffer_size=buffer_size, close_raw=False)
+            start = time.perf_counter()
+            for line in lines:
+                writer.write(line)
+            writer.close()
+            seconds = time.perf_counter() - start
+            print(f"  {label:<22} {size / seconds / 1e6:>8.1f} MB/s  {seconds / len(lines) * 1e6:>6.1f} us/行")
+
+
+def bench_scan(args) -> None:
+    """目录树扫描：按字节数切段调度与整个文件作为一个任务的吞吐量对比"""
+    from id_scan import scan_tree
+
+    validator = ChineseIDValidator().pinned()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, 'tree')
+        for index in range(args.files):
+            directory = os.path.join(root, f'd{index % 16:02d}')
+            os.makedirs(directory, exist_ok=True)
+            write_sample_log(os.path.join(directory, f'f{index:05d}.txt'), 50, seed=index)
+        write_sample_log(os.path.join(root, 'huge.txt'), args.lines)
+        size = sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(root) for name in names)
+        print(f"目录扫描基准测试：{args.files:,} 个小文件 + 1 个 {args.lines:,} 行的大文件，"
+              f"共 {size / 1e6:.1f} MB，{args.workers} 进程")
+
+        report = os.path.join(tmp, 'report.jsonl')
+        for label, piece_size in (('大文件不切分', size + 1), ('按 8MB 切段', 8 << 20)):
+            stats = scan_tree(root, report, args.workers, piece_size=piece_size, validator=validator)
+            print(f"  {label:<12} {stats.elapsed:>6.2f}s  {size / stats.elapsed / 1e6:>8.1f} MB/s  "
+                  f"{stats.total / stats.elapsed:>8,.0f} 个文件/秒  ({stats.valid:,} 个号码)")
+
+
+def bench_csv(args) -> None:
+    """CSV 列验证：吞吐量，以及不同文件大小下的峰值内存（应与行数无关）"""
+    import csv
+    from id_csv import validate_csv
+
+    validator = ChineseIDValidator().pinned()
+    ids = sample_ids(10000)
+    rng = random.Random(2025)
+    print("CSV 列验证基准测试：6 列，号码在第3列")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (args.rows // 10, args.rows):
+            path = os.path.join(tmp, f'users_{rows}.csv')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['用户编号', '姓名', '身份证号', '手机号', '地址', '备注'])
+                for index in range(rows):
+                    writer.writerow([index, f'用户{index}', rng.choice(ids), f'138{rng.randint(0, 10 ** 8 - 1):08d}',
+                                     f'某市某区某路{rng.randint(1, 999)}号', '含,逗号' if index % 10 == 0 else ''])
+            size = os.path.getsize(path)
+            output = os.path.join(tmp, 'checked.csv')
+
+            stats = validate_csv(path, output, '身份证号', validator=validator)
+            tracemalloc.start()
+            validate_csv(path, output, '身份证号', validator=validator)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"  {rows:>10,} 行 {size / 1e6:>7.1f} MB  {stats.total / stats.elapsed:>10,.0f} 行/秒  "
+                  f"{size / stats.elapsed / 1e6:>6.1f} MB/s  峰值内存 {peak / 1e6:>6.1f} MB")
+
+
+def _legacy_check_birth_date(birth_date_str: str):
+    """查表优化之前的出生日期检查（对照组）"""
+    try:
+        year = int(birth_date_str[:4])
+        month = int(birth_date_str[4:6])
+        day = int(birth_date_str[6:8])
+        if year < 1900 or year > datetime.date.today().year:
+            return None, False
+        birth_date = datetime.date(year, month, day)
+        if birth_date > datetime.date.today():
+            return None, False
+        return birth_date, True
+    except ValueError:
+        return None, False
+
+
+def bench_dates(args) -> None:
+    """出生日期检查：逐项解析与查找表的单条耗时对比"""
+    validator = ChineseIDValidator()
+    dates = [id_number[6:14] for id_number in sample_ids(args.count) if len(id_number) == 18]
+    table = validator.birth_date_table()
+    print(f"出生日期检查基准测试：{len(dates):,} 条记录")
+
+    start = time.perf_counter()
+    legacy = [_legacy_check_birth_date(value)[1] for value in dates]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    current = [validator._check_birth_date(value)[1] for value in dates]
+    check_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lookup = [table.lookup(value) != 0 for value in dates]
+    lookup_seconds = time.perf_counter() - start
+
+    assert legacy == current == lookup, '查找表结果与逐项解析不一致'
+    for label, seconds in (('逐项解析', legacy_seconds), ('_check_birth_date', check_seconds),
+                           ('table.lookup', lookup_seconds)):
+        print(f"  {label:<18} {seconds / len(dates) * 1e9:>8.0f} ns/条")
+    print(f"  每条节省 {(legacy_seconds - lookup_seconds) / len(dates) * 1e9:.0f} ns（仅查表）")
+
+
+def _traced_size(build) -> int:
+    """返回 build() 的结果所占用的内存字节数"""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def bench_memory(args) -> None:
+    """保存大量验证结果时，槽位惰性结果对象与字典结果的内存对比"""
+    validator = ChineseIDValidator()
+    ids = sample_ids(args.count)
+    print(f"结果对象内存基准测试：{len(ids):,} 条结果")
+
+    dict_size = _traced_size(lambda: [validator.validate(id_number).to_dict() for id_number in ids])
+    lazy_size = _traced_size(lambda: [validator.validate(id_number) for id_number in ids])
+
+    for label, size in (('字典结果', dict_size), ('ValidationResult', lazy_size)):
+        print(f"  {label:<16} {size / 1e6:>8.1f} MB  {size / len(ids):>6.0f} 字节/条")
+
+
+def bench_fastpath(args) -> None:
+    """is_valid() / reason_code() 与 validate() 的单次调用耗时"""
+    validator = ChineseIDValidator()
+    ids = sample_ids(args.count)
+    print(f"快速判定基准测试：{len(ids):,} 条记录")
+
+    cases = (
+        ('validate().to_dict()', lambda id_number: validator.validate(id_number).to_dict()),
+        ("validate()['valid']", lambda id_number: validator.validate(id_number)['valid']),
+        ('reason_code()', validator.reason_code),
+        ('is_valid()', validator.is_valid),
+    )
+    for label, func in cases:
+        start = time.perf_counter()
+        for id_number in ids:
+            func(id_number)
+        seconds = time.perf_counter() - start
+        print(f"  {label:<22} {seconds / len(ids) * 1e9:>8.0f} ns/次")
+
+
+def _legacy_check_format(id_number: str) -> bool:
+    """规范化之前的格式检查（对照组）"""
+    if not id_number or len(id_number) != 18:
+        return False
+    return _LEGACY_FORMAT.fullmatch(id_number) is not None
+
+
+def bench_normalize(args) -> None:
+    """输入规范化加格式检查：replace + 正则与转换表的单条耗时，以及批量规范化的耗时"""
+    from id_normalize import normalize, normalize_many
+
+    check_format = ChineseIDValidator()._check_format
+    clean = sample_ids(args.count)
+    rng = random.Random(7)
+    # 带分隔空格、小写 x、连字符、全角数字、零宽字符的输入
+    noisy = []
+    for id_number in clean:
+        kind = rng.randint(0, 4)
+        if kind == 0:
+            id_number = f'{id_number[:6]} {id_number[6:14]} {id_number[14:]}'
+        elif kind == 1:
+            id_number = id_number.lower()
+        elif kind == 2:
+            id_number = f'{id_number[:6]}-{id_number[6:]}'
+        elif kind == 3:
+            id_number = id_number.translate({ord(str(digit)): 0xFF10 + digit for digit in range(10)})
+        else:
+            id_number = f'\u200b{id_number}\t'
+        noisy.append(id_number)
+    print(f"输入规范化基准测试：{len(clean):,} 条记录")
+
+    cases = (
+        ('replace+正则', lambda id_number: _legacy_check_format(id_number.replace(' ', '').strip())),
+        ('normalize+格式检查', lambda id_number: check_format(normalize(id_number))),
+    )
+    for data_label, ids in (('规范输入', clean), ('杂乱输入', noisy)):
+        print(f"  {data_label}")
+        for label, func in cases:
+            start = time.perf_counter()
+            accepted = sum(map(func, ids))
+            seconds = time.perf_counter() - start
+            print(f"    {label:<20} {seconds / len(ids) * 1e9:>6.0f} ns/条  格式正确 {accepted:,} 条")
+        start = time.perf_counter()
+        [id_number.replace(' ', '').strip() if id_number else '' for id_number in ids]
+        legacy_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        normalize_many(ids)
+        seconds = time.perf_counter() - start
+        print(f"    批量：replace+strip {legacy_seconds / len(ids) * 1e9:.0f} ns/条，"
+              f"normalize_many {seconds / len(ids) * 1e9:.0f} ns/条")
+
+
+def bench_areas(args) -> None:
+    """行政区划代码索引的加载耗时、内存占用和查询耗时"""
+    from id_areas import AreaIndex, load_table
+
+    start = time.perf_counter()
+    index = AreaIndex(*load_table())
+    load_seconds = time.perf_counter() - start
+    size = _traced_size(lambda: AreaIndex(*load_table()))
+    print(f"行政区划代码索引：{len(index.names):,} 个代码")
+    print(f"  加载耗时 {load_seconds * 1e3:.1f} ms，内存占用 {size / 1e6:.2f} MB")
+
+    codes = list(index.names)
+    cases = (('contains()', index.contains), ('describe()', index.describe),
+             ('in_force()', lambda code: index.in_force(code, 1990)), ('dict 查找', index.names.get))
+    for label, func in cases:
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for code in codes:
+                func(code)
+        seconds = time.perf_counter() - start
+        print(f"  {label:<12} {seconds / (len(codes) * args.rounds) * 1e9:>8.0f} ns/次")
+
+    ids = sample_ids(args.count)
+    print(f"不同地区代码检查方式的验证耗时：{len(ids):,} 条记录")
+    for area_check in ChineseIDValidator.AREA_CHECKS:
+        validator = ChineseIDValidator(area_check)
+        validator.validate_many(ids[:10])
+        start = time.perf_counter()
+        for id_number in ids:
+            validator.reason_code(id_number)
+        scalar_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        validator.validate_many(ids)
+        batch_seconds = time.perf_counter() - start
+        print(f"  {area_check:<12} reason_code() {scalar_seconds / len(ids) * 1e9:>6.0f} ns/条  "
+              f"validate_many() {batch_seconds / len(ids) * 1e9:>6.0f} ns/条")
+
+
+def _legacy_age(birth_date: datetime.date) -> int:
+    """原实现：每次计算年龄都读取一次当天日期"""
+    today = datetime.date.today()
+    age = today.year - birth_date.year
+    if today.month < birth_date.month or (today.month == birth_date.month and today.day < birth_date.day):
+        age -= 1
+    return age
+
+
+def bench_ages(args) -> None:
+    """年龄计算：每条读取当天日期、使用缓存的参考日期与向量化计算的对比"""
+    validator = ChineseIDValidator()
+    results = [validator.validate(id_number) for id_number in sample_ids(args.count)]
+    results = [result for result in results if result.birth_date is not None]
+    birth_dates = [result.birth_date for result in results]
+    as_of = validator.as_of
+    print(f"年龄计算基准测试：{len(birth_dates):,} 条记录，参考日期 {as_of}")
+
+    start = time.perf_counter()
+    legacy = [_legacy_age(birth_date) for birth_date in birth_dates]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cached = [validator._calculate_age(birth_date, as_of) for birth_date in birth_dates]
+    cached_seconds = time.perf_counter() - start
+
+    rows = [('date.today()', legacy_seconds), ('as_of', cached_seconds)]
+    try:
+        import numpy as np
+        from id_batch import ages
+    except ImportError:
+        vector = cached
+    else:
+        packed = np.array([int(result.id_number[6:14]) for result in results], dtype=np.int32)
+        start = time.perf_counter()
+        vector = ages(packed, as_of).tolist()
+        rows.append(('id_batch.ages', time.perf_counter() - start))
+
+    assert legacy == cached == vector, '年龄计算结果不一致'
+    for label, seconds in rows:
+        print(f"  {label:<14} {seconds / len(birth_dates) * 1e9:>8.0f} ns/条")
+
+
+def _serve_web(port: int, pool_workers: int, ready, stop) -> None:
+    """在子进程中启动 Web 服务，直到 stop 被设置（基准测试用）"""
+    import threading
+    from werkzeug.serving import make_server
+    import web_ui
+
+    web_ui.POOL_WORKERS = pool_workers
+    if pool_workers:
+        web_ui.get_pool()
+    server = make_server('127.0.0.1', port, web_ui.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready.set()
+    stop.wait()
+    server.shutdown()
+    if pool_workers:
+        web_ui.get_pool().shutdown()
+
+
+def _post_json(port: int, path: str, payload: dict) -> float:
+    """发送一个 JSON 请求，返回耗时（秒）"""
+    import http.client
+    import json
+
+    body = json.dumps(payload).encode('utf-8')
+    start = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+    connection.getresponse().read()
+    connection.close()
+    return time.perf_counter() - start
+
+
+def bench_web(args) -> None:
+    """后台持续提交大批量请求时，小请求的延迟：请求线程内验证与进程池的对比"""
+    import multiprocessing
+    import threading
+
+    large = {'input_text': '\n'.join(sample_ids(args.count))}
+    small = {'input_text': '\n'.join(sample_ids(10, seed=1))}
+    print(f"Web 小请求延迟基准测试：并发大批量请求 {args.count:,} 条，小请求 10 条 × {args.requests} 次")
+
+    for label, pool_workers in (('请求线程内验证', 0), (f'进程池 {args.pool_workers} 进程', args.pool_workers)):
+        port = 5600 + pool_workers
+        ready = multiprocessing.Event()
+        stop_server = multiprocessing.Event()
+        server = multiprocessing.Process(target=_serve_web, args=(port, pool_workers, ready, stop_server))
+        server.start()
+        if not ready.wait(60):
+            raise RuntimeError('Web 服务启动失败')
+        try:
+            idle = sorted(_post_json(port, '/validate', small) for _ in range(args.requests))
+
+            stop = threading.Event()
+            large_times = []
+
+            def flood():
+                while not stop.is_set():
+                    large_times.append(_post_json(port, '/validate', large))
+
+            flooder = threading.Thread(target=flood)
+            flooder.start()
+            time.sleep(0.2)
+            busy = sorted(_post_json(port, '/validate', small) for _ in range(args.requests))
+            stop.set()
+            flooder.join()
+        finally:
+            stop_server.set()
+            server.join()
+
+        def percentile(values, q):
+            return values[min(int(len(values) * q), len(values) - 1)] * 1e3
+
+        print(f"  {label:<14} 空闲 p50 {percentile(idle, 0.5):6.1f} ms  "
+              f"繁忙 p50 {percentile(busy, 0.5):6.1f} ms  p99 {percentile(busy, 0.99):7.1f} ms  "
+              f"大批量 {sum(large_times) / len(large_times):.2f} s/次")
+
+
+def bench_coalesce(args) -> None:
+    """多线程并发单条验证：直接逐条验证与合并成批验证的吞吐量和延迟对比"""
+    import threading
+    from id_cache import CachedResult
+    from id_coalesce import Coalescer
+    import web_ui
+
+    ids = sample_ids(args.count)
+    print(f"请求合并基准测试：{len(ids):,} 条单条请求，{args.threads} 个并发线程")
+
+    def direct(id_number):
+        request_validator = web_ui.validator.pinned()
+        return CachedResult.from_result(request_validator.validate(id_number), request_validator.as_of)
+
+    coalescer = Coalescer(web_ui._validate_one_batch, args.max_batch, args.max_delay_us)
+    for label, call in (('逐条验证', direct), ('合并验证', coalescer.submit)):
+        latencies = [0.0] * len(ids)
+
+        def worker(first):
+            for index in range(first, len(ids), args.threads):
+                start = time.perf_counter()
+                call(ids[index])
+                latencies[index] = time.perf_counter() - start
+
+        threads = [threading.Thread(target=worker, args=(first,)) for first in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        latencies.sort()
+        _report(label, len(ids), seconds, f"  延迟 p50 {latencies[len(ids) // 2] * 1e3:.2f} ms  "
+                                          f"p99 {latencies[int(len(ids) * 0.99)] * 1e3:.2f} ms")
+    coalescer.close()
+    metrics = coalescer.metrics()
+    print(f"  批次 {metrics['batches']:,} 个，平均 {metrics['mean_batch_size']:.1f} 条，"
+          f"最大 {metrics['max_batch_size']} 条，分布 {metrics['batch_size_buckets']}")
+
+
+def bench_cache(args) -> None:
+    """按幂律分布重复出现的号码：不使用缓存与使用结果缓存的吞吐量和命中率对比"""
+    from id_cache import LRUCache
+    import web_ui
+
+    distinct = sample_ids(args.distinct)
+    # 第 k 常见的号码出现概率与 1/k^s 成正比
+    weights = [1 / (rank ** args.skew) for rank in range(1, len(distinct) + 1)]
+    ids = random.Random(7).choices(distinct, weights, k=args.count)
+    print(f"结果缓存基准测试：{len(ids):,} 条请求，{len(distinct):,} 个不同号码，"
+          f"幂律指数 {args.skew}，缓存上限 {args.maxsize:,} 条")
+
+    request_validator = web_ui.validator.pinned()
+    cache = LRUCache(args.maxsize, None)
+    for label, request_cache in (('不使用缓存', None), ('使用缓存', cache)):
+        start = time.perf_counter()
+        for offset in range(0, len(ids), args.request_lines):
+            web_ui._split_entries(request_validator, ids[offset:offset + args.request_lines], request_cache)
+        _report(label, len(ids), time.perf_counter() - start)
+    stats = cache.stats()
+    print(f"  命中率 {stats['hit_rate']:.1%}，缓存 {stats['size']:,} 条，淘汰 {stats['evictions']:,} 次")
+
+
+def bench_formats(args) -> None:
+    """/validate 的响应格式：逐条 JSON（jsonify）与列式 JSON / MessagePack 的大小和序列化耗时对比"""
+    from id_columnar import MSGPACK_AVAILABLE, dumps_json, dumps_msgpack
+    import web_ui
+
+    ids = sample_ids(args.count)
+    print(f"响应格式基准测试：{len(ids):,} 条记录")
+    request_validator = web_ui.validator.pinned()
+
+    def entries_json():
+        start = time.perf_counter()
+        valid_ids, invalid_ids = web_ui._split_entries(request_validator, ids)
+        built = time.perf_counter()
+        with web_ui.app.app_context():
+            body = web_ui.jsonify({
+                'valid_ids': valid_ids,
+                'invalid_ids': invalid_ids,
+                'total': len(ids),
+                'valid_count': len(valid_ids),
+                'invalid_count': len(invalid_ids)
+            }).get_data()
+        return body, built - start, time.perf_counter() - built
+
+    def columnar(dumps):
+        def run():
+            start = time.perf_counter()
+            data = web_ui._columnar(request_validator, ids).to_dict()
+            built = time.perf_counter()
+            body = dumps(data)
+            return body, built - start, time.perf_counter() - built
+        return run
+
+    formats = [('jsonify', entries_json), ('列式 JSON', columnar(dumps_json))]
+    if MSGPACK_AVAILABLE:
+        formats.append(('MessagePack', columnar(dumps_msgpack)))
+    else:
+        print("  未安装 msgpack，跳过 MessagePack")
+    print(f"  {'格式':<12} {'大小':>12} {'每条':>8} {'验证+构建':>10} {'序列化':>10}")
+    for label, run in formats:
+        body, build_seconds, dump_seconds = run()
+        print(f"  {label:<12} {len(body):>12,} {len(body) / len(ids):>7.1f}B "
+              f"{build_seconds * 1e3:>8.1f}ms {dump_seconds * 1e3:>8.1f}ms")
+
+
+def bench_fields(args) -> None:
+    """/validate 的 fields= / summary=true：只生成请求的字段时的耗时和响应大小"""
+    import web_ui
+
+    ids = sample_ids(args.count)
+    print(f"字段选择基准测试：{len(ids):,} 条记录")
+    web_ui.POOL_WORKERS = 0
+    client = web_ui.app.test_client()
+    body = {'input_text': '\n'.join(ids)}
+    for label, query in (('全部字段', {'cache': '0'}),
+                         ('original,errors', {'fields': 'original,errors'}),
+                         ('只要无效号码', {'fields': 'invalid_ids,original,errors'}),
+                         ('summary=true', {'summary': 'true'})):
+        start = time.perf_counter()
+        response = client.post('/validate', query_string=query, json=body)
+        seconds = time.perf_counter() - start
+        _report(label, len(ids), seconds, f"  响应 {len(response.data):,} 字节")
+
+
+def _upload_once(path: str, compress: bool, results) -> None:
+    """在独立进程中提交一次 /validate 请求，报告请求字节数、响应字节数、状态码和峰值内存的增量"""
+    import resource
+    import web_ui
+
+    web_ui.POOL_WORKERS = 0
+    with open(path, 'rb') as f:
+        body = f.read()
+    headers = {'Content-Type': 'application/json'}
+    if compress:
+        headers.update({'Content-Encoding': 'gzip', 'Accept-Encoding': 'gzip'})
+    client = web_ui.app.test_client()
+    client.post('/validate', json={'input_text': '11010119900307489X'})
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    response = client.post('/validate', data=body, headers=headers)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((len(body), len(response.data), response.status_code, (peak - before) * 1024))
+
+
+def bench_upload(args) -> None:
+    """不同批量大小下 /validate 的传输字节数和服务端峰值内存（未压缩与 gzip 压缩的请求和响应）"""
+    import gzip
+    import json
+    import multiprocessing
+    import web_ui
+
+    print(f"上传基准测试：请求体上限 {web_ui.MAX_BODY_BYTES >> 20}MB，每次请求在新进程中执行")
+    print(f"  {'记录数':>10} {'压缩':>4} {'请求字节':>12} {'响应字节':>12} {'状态':>4} {'峰值内存增量':>12}")
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.sizes:
+            body = json.dumps({'input_text': '\n'.join(sample_ids(count))}).encode('utf-8')
+            for compress in (False, True):
+                path = os.path.join(tmp, 'body')
+                with open(path, 'wb') as f:
+                    f.write(gzip.compress(body) if compress else body)
+                results = context.Queue()
+                process = context.Process(target=_upload_once, args=(path, compress, results))
+                process.start()
+                sent, received, status, peak = results.get()
+                process.join()
+                print(f"  {count:>10,} {'gzip' if compress else '否':>4} {sent:>12,} {received:>12,} "
+                      f"{status:>4} {peak / 1e6:>10.1f}MB")
+
+
+def bench_admission(args) -> None:
+    """一个客户端持续并发提交大批量时，另一个客户端（每 20ms 一次）小请求的延迟：不限制与准入控制的对比"""
+    import threading
+    from id_admission import AdmissionController
+    import web_ui
+
+    web_ui.POOL_WORKERS = 0
+    large = {'input_text': '\n'.join(sample_ids(args.count))}
+    small = {'input_text': '\n'.join(sample_ids(100, seed=1))}
+    print(f"准入控制基准测试：{args.flood_threads} 个线程持续提交 {args.count:,} 条的大批量，"
+          f"另一客户端提交 100 条 × {args.requests} 次")
+
+    for label, max_active in (('不限制', 0), (f'准入 {args.max_active:,} 条', args.max_active)):
+        web_ui.ADMISSION_MAX_ACTIVE_IDS = max_active
+        web_ui.admission = AdmissionController(max_active, args.max_active * 3, 5.0)
+        stop = threading.Event()
+        bulk = {'accepted': 0, 'rejected': 0}
+
+        def flood():
+            client = web_ui.app.test_client()
+            while not stop.is_set():
+                response = client.post('/validate?summary=true', json=large, headers={'X-Client-Id': 'bulk'})
+                if response.status_code == 429:
+                    bulk['rejected'] += 1
+                    time.sleep(int(response.headers['Retry-After']) / 10)
+                else:
+                    bulk['accepted'] += 1
+
+        flooders = [threading.Thread(target=flood) for _ in range(args.flood_threads)]
+        start = time.perf_counter()
+        for flooder in flooders:
+            flooder.start()
+        time.sleep(0.5)
+        client = web_ui.app.test_client()
+        latencies = []
+        small_rejected = 0
+        for _ in range(args.requests):
+            request_start = time.perf_counter()
+            response = client.post('/validate', json=small, headers={'X-Client-Id': 'interactive'})
+            latencies.append(time.perf_counter() - request_start)
+            small_rejected += response.status_code == 429
+            time.sleep(0.02)
+        stop.set()
+        for flooder in flooders:
+            flooder.join()
+        seconds = time.perf_counter() - start
+        latencies.sort()
+        print(f"  {label:<14} 小请求 p50 {latencies[len(latencies) // 2] * 1e3:7.1f} ms  "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:7.1f} ms  429 {small_rejected} 次  "
+              f"大批量 {bulk['accepted'] * args.count / seconds:,.0f} 条/秒，429 {bulk['rejected']} 次")
+
+
+def _memory_kb(pid: int) -> dict:
+    """进程的 Rss / Pss / 私有内存（KB，来自 /proc/<pid>/smaps_rollup）"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[name] = int(rest.split()[0])
+    return {'rss': values['Rss'], 'pss': values['Pss'],
+            'private': values['Private_Clean'] + values['Private_Dirty']}
+
+
+def _process_tree(pid: int) -> List[int]:
+    """pid 及其全部子孙进程"""
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        children = [int(child) for child in f.read().split()]
+    return [pid] + [descendant for child in children for descendant in _process_tree(child)]
+
+
+def bench_serve(args) -> None:
+    """启动耗时和每个进程的内存：当前的 web_ui.py（调试服务器）与 serve.py 多进程（是否预先加载查找表）"""
+    import json
+    import signal
+    import subprocess
+    import sys
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    serve = [sys.executable, 'serve.py', '--port', str(args.port), '--workers', str(args.workers), '--quiet']
+    setups = [('web_ui.py', [sys.executable, 'web_ui.py'], 5000),
+              (f'不预加载 ×{args.workers}', serve + ['--no-preload'], args.port),
+              (f'预加载 ×{args.workers}', serve, args.port)]
+    body = json.dumps({'input_text': '\n'.join(sample_ids(1000))}).encode('utf-8')
+    print(f"Web 服务启动与内存基准测试：启动后发送 {args.requests} 个 1000 条的请求，再统计各进程内存")
+    print(f"  {'方式':<16} {'启动到首个响应':>12}  各进程 RSS / PSS / 私有（MB）")
+
+    for label, command, port in setups:
+        url = f'http://127.0.0.1:{port}'
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                   start_new_session=True)
+        try:
+            while True:
+                try:
+                    urllib.request.urlopen(f'{url}/validate/one?id=11010519491231002X', timeout=5).read()
+                    break
+                except OSError:
+                    if time.perf_counter() - start > 60:
+                        raise RuntimeError(f'{label} 启动失败')
+                    time.sleep(0.02)
+            startup = time.perf_counter() - start
+
+            def post(_):
+                request = urllib.request.Request(f'{url}/validate', data=body,
+                                                 headers={'Content-Type': 'application/json'})
+                urllib.request.urlopen(request, timeout=60).read()
+
+            with ThreadPoolExecutor(8) as executor:
+                list(executor.map(post, range(args.requests)))
+
+            usage = [_memory_kb(pid) for pid in _process_tree(process.pid)]
+            detail = '  '.join(f"{u['rss'] / 1024:.0f}/{u['pss'] / 1024:.0f}/{u['private'] / 1024:.0f}" for u in usage)
+            total_pss = sum(u['pss'] for u in usage) / 1024
+            print(f"  {label:<16} {startup * 1e3:>10.0f}ms  {detail}  合计 PSS {total_pss:.0f}MB")
+        finally:
+            os.killpg(process.pid, signal.SIGTERM)
+            process.wait(30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='身份证验证器性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    batch = subparsers.add_parser('batch', help='逐条验证与批量验证的吞吐量对比')
+    batch.add_argument('-n', '--count', type=int, default=200000, help='记录数')
+    batch.set_defaults(func=bench_batch)
+
+    scaling = subparsers.add_parser('scaling', help='多进程分片验证的扩展性')
+    scaling.add_argument('-n', '--count', type=int, default=2000000, help='记录数')
+    scaling.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='进程数列表')
+    scaling.add_argument('--shard-size', type=int, default=4 << 20, help='分片大小（字节）')
+    scaling.set_defaults(func=bench_scaling)
+
+    mmap_parser = subparsers.add_parser('mmap', help='定长文件内存映射扫描')
+    mmap_parser.add_argument('-n', '--count', type=int, default=2000000, help='记录数')
+    mmap_parser.set_defaults(func=bench_mmap)
+
+    extract = subparsers.add_parser('extract', help='从日志中提取号码的吞吐量')
+    extract.add_argument('--lines', type=int, default=500000, help='日志行数')
+    extract.set_defaults(func=bench_extract)
+
+    redact = subparsers.add_parser('redact', help='流式脱敏的吞吐量')
+    redact.add_argument('--lines', type=int, default=500000, help='日志行数')
+    redact.set_defaults(func=bench_redact)
+
+    scan = subparsers.add_parser('scan', help='目录树并行扫描的吞吐量')
+    scan.add_argument('--files', type=int, default=2000, help='小文件个数')
+    scan.add_argument('--lines', type=int, default=1000000, help='大文件的行数')
+    scan.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='工作进程数')
+    scan.set_defaults(func=bench_scan)
+
+    csv_parser = subparsers.add_parser('csv', help='CSV 列验证的吞吐量和峰值内存')
+    csv_parser.add_argument('--rows', type=int, default=1000000, help='较大文件的行数（较小文件为其1/10）')
+    csv_parser.set_defaults(func=bench_csv)
+
+    dates = subparsers.add_parser('dates', help='出生日期查找表的单条耗时')
+    dates.add_argument('-n', '--count', type=int, default=500000, help='记录数')
+    dates.set_defaults(func=bench_dates)
+
+    memory = subparsers.add_parser('memory', help='验证结果对象的内存占用')
+    memory.add_argument('-n', '--count', type=int, default=1000000, help='结果数')
+    memory.set_defaults(func=bench_memory)
+
+    fastpath = subparsers.add_parser('fastpath', help='is_valid / reason_code 的单次调用耗时')
+    fastpath.add_argument('-n', '--count', type=int, default=200000, help='记录数')
+    fastpath.set_defaults(func=bench_fastpath)
+
+    normalize = subparsers.add_parser('normalize', help='输入规范化和格式检查的单条耗时')
+    normalize.add_argument('-n', '--count', type=int, default=500000, help='记录数')
+    normalize.set_defaults(func=bench_normalize)
+
+    areas = subparsers.add_parser('areas', help='行政区划代码索引的加载耗时与内存占用')
+    areas.add_argument('--rounds', type=int, default=20, help='查询轮数')
+    areas.add_argument('-n', '--count', type=int, default=200000, help='验证耗时对比的记录数')
+    areas.set_defaults(func=bench_areas)
+
+    ages = subparsers.add_parser('ages', help='年龄计算的单条耗时')
+    ages.add_argument('-n', '--count', type=int, default=200000, help='记录数')
+    ages.set_defaults(func=bench_ages)
+
+    web = subparsers.add_parser('web', help='并发大批量请求时 Web 小请求的延迟')
+    web.add_argument('-n', '--count', type=int, default=50000, help='大批量请求的记录数')
+    web.add_argument('--requests', type=int, default=200, help='小请求次数')
+    web.add_argument('--pool-workers', type=int, default=os.cpu_count() or 1, help='进程池工作进程数')
+    web.set_defaults(func=bench_web)
+
+    coalesce = subparsers.add_parser('coalesce', help='并发单条请求合并成批验证的吞吐量')
+    coalesce.add_argument('-n', '--count', type=int, default=100000, help='请求数')
+    coalesce.add_argument('--threads', type=int, default=64, help='并发线程数')
+    coalesce.add_argument('--max-batch', type=int, default=64, help='每批最多合并的请求数')
+    coalesce.add_argument('--max-delay-us', type=int, default=0, help='正在形成一批时第一条请求最多等待的微秒数')
+    coalesce.set_defaults(func=bench_coalesce)
+
+    cache = subparsers.add_parser('cache', help='重复号码的结果缓存命中率与吞吐量')
+    cache.add_argument('-n', '--count', type=int, default=200000, help='请求的号码总数')
+    cache.add_argument('--distinct', type=int, default=50000, help='不同号码的个数')
+    cache.add_argument('--skew', type=float, default=1.0, help='幂律分布的指数，越大重复越集中')
+    cache.add_argument('--maxsize', type=int, default=10000, help='缓存条数上限')
+    cache.add_argument('--request-lines', type=int, default=100, help='每个请求的号码数')
+    cache.set_defaults(func=bench_cache)
+
+    formats = subparsers.add_parser('formats', help='/validate 响应格式的大小与序列化耗时')
+    formats.add_argument('-n', '--count', type=int, default=100000, help='记录数')
+    formats.set_defaults(func=bench_formats)
+
+    fields = subparsers.add_parser('fields', help='/validate 只返回部分字段或条数时的耗时')
+    fields.add_argument('-n', '--count', type=int, default=100000, help='记录数')
+    fields.set_defaults(func=bench_fields)
+
+    upload = subparsers.add_parser('upload', help='/validate 的传输字节数与峰值内存（含压缩）')
+    upload.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 500000, 1000000],
+                        help='批量大小列表')
+    upload.set_defaults(func=bench_upload)
+
+    admission = subparsers.add_parser('admission', help='大批量请求持续涌入时，其他客户端小请求的延迟')
+    admission.add_argument('-n', '--count', type=int, default=20000, help='每个大批量请求的记录数')
+    admission.add_argument('--flood-threads', type=int, default=8, help='持续提交大批量的线程数')
+    admission.add_argument('--requests', type=int, default=200, help='小请求次数')
+    admission.add_argument('--max-active', type=int, default=25000, help='同时验证的号码总数上限')
+    admission.set_defaults(func=bench_admission)
+
+    serve = subparsers.add_parser('serve', help='Web 服务的启动耗时和各进程内存（需要 Linux）')
+    serve.add_argument('--workers', type=int, default=4, help='serve.py 的工作进程数')
+    serve.add_argument('--requests', type=int, default=200, help='统计内存前发送的请求数')
+    serve.add_argument('--port', type=int, default=8765, help='serve.py 的监听端口')
+    serve.set_defaults(func=bench_serve)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 行政区划代码索引
+Chinese ID Card Validator - GB/T 2260 Administrative Division Index
+
+从 data/gbt2260.tsv 懒加载完整的六位行政区划代码表（含已撤销的历史代码），提供：
+- 地址码是否曾经存在的 O(1) 判断（逐条验证查字典，批量验证用125KB 的位图）
+- 省、地（市）、县（区）名称的 O(1) 查询
+- 地址码在某一年是否有效的区间索引：每个代码的有效年份区间合并为一个128位的年份位掩码，
+  查询只需一次字典查找和一次移位
+"""
+
+import os
+import sys
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from id_dates import FIRST_YEAR
+
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'gbt2260.tsv')
+
+# 地址码取值范围（六位数字）
+CODE_SPACE = 1000000
+
+# 1980、1982年版本中省辖市的“××××20 市区”，以及1984年版本起的
+# “××××01 市辖区”“××××02 城区”“××××11 郊区”，在现实身份证中存在，
+# 但历年公布的代码表中未必收录，只要所属地级单位存在即视为有效
+LEGACY_SUFFIXES = {'01': '市辖区', '02': '城区', '11': '郊区', '20': '市区'}
+
+# 只校验省级代码的地区：台湾、香港、澳门
+PROVINCE_ONLY = ('71', '81', '82')
+
+# 年份位掩码的位数：第 i 位表示 FIRST_YEAR + i 年，超出范围的年份按最后一位处理
+YEAR_BITS = 128
+
+# 作为地级单位名称时不参与拼接的占位名称
+PLACEHOLDER_NAMES = frozenset(['市辖区', '县', '省直辖县级行政区划', '自治区直辖县级行政区划'])
+
+
+class AreaIndex:
+    """六位行政区划代码索引"""
+
+    def __init__(self, names: Dict[str, str], year_masks: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            names: 代码 -> 名称（同一代码有多个历史名称时取最新的名称）
+            year_masks: 代码 -> 有效年份位掩码（见 year_bits），为 None 时不支持按年份查询
+        """
+        self.names = names
+        self.year_masks = year_masks or {}
+        self.bitmap = bytearray(CODE_SPACE // 8)
+
+        for code in names:
+            self._mark(int(code))
+            if code[2:] == '0000' and code[:2] in PROVINCE_ONLY:
+                # 整个省级号段有效（起点和长度都是8的倍数）
+                start = int(code) >> 3
+                self.bitmap[start:start + 10000 // 8] = b'\xff' * (10000 // 8)
+            elif code[4:] == '00' and code[2:4] != '00':
+                for suffix in LEGACY_SUFFIXES:
+                    self._mark(int(code[:4] + suffix))
+
+        # 逐条查询用：代码 -> 年份位掩码，代码表中未收录的市辖区代码按 year_mask 的规则展开，
+        # contains / in_force 对绝大多数输入只需一次字典查找；台湾、香港、澳门的整个号段不展开
+        self._masks: Dict[str, int] = {code: self.year_masks.get(code, 0) for code in names}
+        for code in names:
+            if code[4:] == '00' and code[2:4] != '00' and code[:2] not in PROVINCE_ONLY:
+                for suffix in LEGACY_SUFFIXES:
+                    self._masks.setdefault(code[:4] + suffix, self.year_mask(code[:4] + suffix))
+        self._province_only = frozenset(code[:2] for code in names
+                                        if code[:2] in PROVINCE_ONLY and code[2:] == '0000')
+
+    def _mark(self, value: int) -> None:
+        self.bitmap[value >> 3] |= 1 << (value & 7)
+
+    def contains(self, code: str) -> bool:
+        """
+        判断六位地址码是否有效（曾经存在过）
+
+        Args:
+            code: 六位地址码
+
+        Returns:
+            bool: 是否有效
+        """
+        return code in self._masks or self._in_province_only(code)
+
+    def _in_province_only(self, code: str) -> bool:
+        """是否为台湾、香港、澳门号段内的六位数字（只校验省级代码）"""
+        return code[:2] in self._province_only and len(code) == 6 and code.isascii() and code.isdigit()
+
+    def year_mask(self, code: str) -> int:
+        """
+        地址码的有效年份位掩码
+
+        代码表中未收录的“××××01”等市辖区代码沿用所属地级单位的年份，
+        台湾、香港、澳门沿用省级代码的年份。
+
+        Args:
+            code: 六位地址码
+
+        Returns:
+            int: 年份位掩码，代码不存在时为 0
+        """
+        mask = self.year_masks.get(code)
+        if mask is not None:
+            return mask
+        if code[:2] in PROVINCE_ONLY:
+            return self.year_masks.get(code[:2] + '0000', 0)
+        if code[4:6] in LEGACY_SUFFIXES and code[2:4] != '00':
+            return self.year_masks.get(code[:4] + '00', 0)
+        return 0
+
+    def in_force(self, code: str, year: int) -> bool:
+        """
+        判断地址码在指定年份是否有效
+
+        Args:
+            code: 六位地址码
+            year: 年份
+
+        Returns:
+            bool: 该年份是否在代码的有效区间内
+        """
+        mask = self._masks.get(code)
+        if mask is None:
+            if not self._in_province_only(code):
+                return False
+            mask = self.year_masks.get(code[:2] + '0000', 0)
+        bit = year - FIRST_YEAR
+        if not 0 <= bit < YEAR_BITS:
+            bit = 0 if bit < 0 else YEAR_BITS - 1
+        return mask >> bit & 1 == 1
+
+    def province(self, code: str) -> Optional[str]:
+        """省级名称"""
+        return self.names.get(code[:2] + '0000')
+
+    def city(self, code: str) -> Optional[str]:
+        """地级名称（直辖市的“市辖区”“县”等占位名称返回 None）"""
+        if code[:2] in PROVINCE_ONLY or code[2:4] == '00':
+            return None
+        name = self.names.get(code[:4] + '00')
+        return None if name in PLACEHOLDER_NAMES else name
+
+    def county(self, code: str) -> Optional[str]:
+        """县级名称"""
+        if code[:2] in PROVINCE_ONLY or code[4:6] == '00':
+            return None
+        name = self.names.get(code)
+        if name is None:
+            name = LEGACY_SUFFIXES.get(code[4:6])
+        return name
+
+    def describe(self, code: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """返回 (省, 地, 县) 三级名称"""
+        return self.province(code), self.city(code), self.county(code)
+
+    def full_name(self, code: str) -> Optional[str]:
+        """
+        拼接后的完整地区名称，如“河北省石家庄市长安区”
+
+        Args:
+            code: 六位地址码
+
+        Returns:
+            Optional[str]: 地区名称，省级代码不存在时为 None
+        """
+        province, city, county = self.describe(code)
+        if province is None:
+            return None
+        return province + (city or '') + (county or '')
+
+
+def year_bits(start_year: Optional[int], end_year: Optional[int]) -> int:
+    """
+    将年份区间转换为年份位掩码
+
+    Args:
+        start_year: 启用年份，None 表示不限
+        end_year: 停用年份，None 表示至今仍有效
+
+    Returns:
+        int: 年份位掩码
+    """
+    if start_year is not None and end_year is not None and start_year > end_year:
+        # 少数记录的启用年份晚于停用年份（同一版本间隔内启用又撤销），按两者之间的区间处理
+        start_year, end_year = end_year, start_year
+    first = 0 if start_year is None else min(max(start_year - FIRST_YEAR, 0), YEAR_BITS - 1)
+    last = YEAR_BITS - 1 if end_year is None else min(max(end_year - FIRST_YEAR, 0), YEAR_BITS - 1)
+    return ((1 << (last + 1)) - 1) ^ ((1 << first) - 1)
+
+
+def load_table(path: str = DATA_PATH) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """
+    读取代码表
+
+    Args:
+        path: 代码表路径
+
+    Returns:
+        Tuple[Dict[str, str], Dict[str, int]]: (代码 -> 最新名称, 代码 -> 有效年份位掩码)
+    """
+    names, year_masks = {}, {}
+    current = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            code, name, start_year, end_year = line.rstrip('\n').split('\t')
+            # 至今仍有效的名称优先，否则取最后出现的名称
+            if code not in current:
+                names[code] = sys.intern(name)
+                if not end_year:
+                    current.add(code)
+            year_masks[code] = year_masks.get(code, 0) | year_bits(
+                int(start_year) if start_year else None, int(end_year) if end_year else None)
+    return names, year_masks
+
+
+@lru_cache(maxsize=1)
+def area_index() -> AreaIndex:
+    """
+    获取行政区划代码索引（首次调用时加载，进程内共享）
+
+    Returns:
+        AreaIndex: 行政区划代码索引
+    """
+    return AreaIndex(*load_table())
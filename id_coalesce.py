@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 请求合并
+Chinese ID Card Validator - Micro-batching Request Coalescer
+
+把并发到达的单条验证请求攒成一批，交给批量验证函数一次处理，再把结果分发给各个调用方。
+后台线程每次取出排队的全部请求（最多 max_batch 条）：处理上一批期间到达的请求自然组成下一批，
+只有一条请求时立即处理，不增加等待。max_delay_us 大于0时，排队的请求多于一条（正在形成一批）
+才继续等待，直到攒够 max_batch 条或第一条请求等待了 max_delay_us 微秒：批次更大，单条请求的延迟也更高。
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Generic, List, TypeVar
+
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class _Slot:
+    """一条请求的结果槽：用一把已经锁上的锁代替 Future，结果就绪时释放，开销更小"""
+
+    __slots__ = ('item', 'result', 'error', 'ready')
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.ready = threading.Lock()
+        self.ready.acquire()
+
+
+class Coalescer(Generic[T, R]):
+    """单条请求合并器"""
+
+    def __init__(self, process_batch: Callable[[List[T]], List[R]], max_batch: int = 256,
+                 max_delay_us: int = 0):
+        """
+        Args:
+            process_batch: 批量处理函数，返回值与输入一一对应
+            max_batch: 每批最多合并的请求数
+            max_delay_us: 正在形成一批（排队的请求多于一条）时第一条请求最多等待的微秒数，
+                为0时不等待，只合并处理上一批期间到达的请求
+        """
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay_us / 1e6
+        self._pending: List[_Slot] = []
+        self._first_arrival = 0.0
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # 统计：批次数、请求数、批次大小分布（按2的幂分桶：1、2~3、4~7……）
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self.size_buckets: Dict[int, int] = {}
+
+        self._thread = threading.Thread(target=self._run, name='id-coalescer', daemon=True)
+        self._thread.start()
+
+    def submit(self, item: T) -> R:
+        """
+        提交一条请求并等待结果
+
+        Args:
+            item: 请求
+
+        Returns:
+            R: 该请求的处理结果（批量处理函数抛出的异常会在这里重新抛出）
+        """
+        slot = _Slot(item)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('合并器已关闭')
+            if not self._pending:
+                self._first_arrival = time.perf_counter()
+            self._pending.append(slot)
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch:
+                self._condition.notify()
+        slot.ready.acquire()
+        if slot.error is not None:
+            raise slot.error
+        return slot.result
+
+    def metrics(self) -> Dict:
+        """批次统计"""
+        with self._condition:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch_seen,
+                'batch_size_buckets': {f'{low}-{low * 2 - 1}' if low > 1 else '1': count
+                                       for low, count in sorted(self.size_buckets.items())},
+                'max_batch': self.max_batch,
+                'max_delay_us': round(self.max_delay * 1e6),
+            }
+
+    def close(self) -> None:
+        """处理完已提交的请求后停止后台线程"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _next_batch(self) -> List[_Slot]:
+        """等待并取出下一批请求；合并器关闭且没有待处理请求时返回空列表"""
+        with self._condition:
+            while not self._pending and not self._closed:
+                self._condition.wait()
+            # 只有一条请求（没有并发）时立即处理，不必等待；
+            # 已有多条请求排队时正在形成一批：攒够一批或者第一条请求等待超时
+            while 1 < len(self._pending) < self.max_batch and not self._closed:
+                remaining = self._first_arrival + self.max_delay - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            if self._pending:
+                self._first_arrival = time.perf_counter()
+
+            size = len(batch)
+            if size:
+                self.batches += 1
+                self.items += size
+                self.max_batch_seen = max(self.max_batch_seen, size)
+                bucket = 1 << (size.bit_length() - 1)
+                self.size_buckets[bucket] = self.size_buckets.get(bucket, 0) + 1
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            try:
+                results = self.process_batch([slot.item for slot in batch])
+            except Exception as e:
+                for slot in batch:
+                    slot.error = e
+                    slot.ready.release()
+            else:
+                for slot, result in zip(batch, results):
+                    slot.result = result
+                    slot.ready.release()
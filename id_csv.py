@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - CSV 列验证
+Chinese ID Card Validator - Streaming CSV Column Validation
+
+逐批读取 CSV，按列名或列序号取出身份证号码列批量验证（有 numpy 时走 id_batch 向量化引擎），
+在每行末尾追加结果列 valid、reason、province、birth_date、gender，其余各列原样写出；
+字段数少于表头的行先用空字段补齐，结果列总是对齐到表头中的位置。
+内存占用只与批次大小有关；输出使用大缓冲区写出。
+
+编码默认为 UTF-8，输入带 BOM（Excel 导出的 CSV）时输出也带 BOM；GBK 等其他编码用 encoding 指定，
+输入输出使用同一编码。输入无法按编码解码时报错（ValueError，提示指定编码），不会替换成乱码写出。
+换行符与输入的第一行相同（LF 或 CRLF），引号内字段中的换行符原样保留。空行原样保留，不计入统计。
+"""
+
+import codecs
+import csv
+import io
+import sys
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Tuple, Union
+
+from id_stream import BUFFER_SIZE, StreamStats, validate_chunk
+from id_validator import REASON_AREA, REASON_DATE, REASON_FORMAT, ChineseIDValidator, reason_messages
+
+
+# 追加的结果列
+RESULT_COLUMNS = ('valid', 'reason', 'province', 'birth_date', 'gender')
+
+# 每批处理的行数：CSV 行比单独的号码大得多，批次小一些内存占用更低，吞吐量基本不变
+CHUNK_SIZE = 4096
+
+# UTF-8 BOM
+_BOM = b'\xef\xbb\xbf'
+
+
+def resolve_column(header: Optional[Sequence[str]], column: Union[str, int]) -> int:
+    """
+    确定号码所在的列序号
+
+    Args:
+        header: 表头（没有表头时为 None）
+        column: 列名，或从0开始的列序号（整数或数字字符串；与表头中的列名相同时按列名处理）
+
+    Returns:
+        int: 列序号
+    """
+    if isinstance(column, str):
+        if header is not None and column in header:
+            return list(header).index(column)
+        if not column.isdigit():
+            raise ValueError(f'表头中没有列: {column}' if header is not None else '没有表头时只能按列序号指定号码列')
+        column = int(column)
+    if column < 0 or (header is not None and column >= len(header)):
+        raise ValueError(f'列序号超出范围: {column}')
+    return column
+
+
+class _ResultColumns:
+    """由规范化后的号码和错误原因位掩码生成结果列"""
+
+    def __init__(self, validator: ChineseIDValidator):
+        self.validator = validator
+        self._provinces: Dict[str, Optional[str]] = {}    # 地址码 -> 省级名称（只缓存有效的地址码，数量有限）
+        self._messages: Dict[int, str] = {}
+
+    def row(self, id_number: str, reasons: int) -> List[str]:
+        if reasons & REASON_FORMAT:
+            return ['false', self._message(reasons), '', '', '']
+        province = ''
+        if not reasons & REASON_AREA:
+            code = id_number[:6]
+            if code not in self._provinces:
+                self._provinces[code] = self.validator.describe_area(code)[0]
+            province = self._provinces[code] or ''
+        birth_date = '' if reasons & REASON_DATE else f'{id_number[6:10]}-{id_number[10:12]}-{id_number[12:14]}'
+        gender = '男' if int(id_number[16]) % 2 == 1 else '女'
+        return ['false' if reasons else 'true', self._message(reasons), province, birth_date, gender]
+
+    def _message(self, reasons: int) -> str:
+        message = self._messages.get(reasons)
+        if message is None:
+            message = self._messages[reasons] = '; '.join(reason_messages(reasons))
+        return message
+
+
+def validate_rows(rows: Iterator[List[str]], index: int, validator: ChineseIDValidator,
+                  chunk_size: int = CHUNK_SIZE, stats: Optional[StreamStats] = None,
+                  width: int = 0) -> Iterator[List[List[str]]]:
+    """
+    逐批验证 CSV 行中的号码列
+
+    Args:
+        rows: csv.reader 产出的行（不含表头）
+        index: 号码所在的列序号（行中缺少该列时按空值处理）
+        validator: 验证器实例
+        chunk_size: 每批处理的行数
+        stats: 统计信息
+        width: 字段数少于此数的行先用空字段补齐，使结果列对齐到表头中的位置（通常为表头的列数）
+
+    Yields:
+        List[List[str]]: 一批追加了结果列的行（空行原样产出）
+    """
+    columns = _ResultColumns(validator)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        values = [row[index] if index < len(row) else '' for row in batch if row]
+        ids, reasons = validate_chunk(values, validator)
+        results = iter(zip(ids, reasons))
+        output = []
+        for row in batch:
+            if row:
+                id_number, reason = next(results)
+                if len(row) < width:
+                    row.extend([''] * (width - len(row)))
+                row.extend(columns.row(id_number, reason))
+            output.append(row)
+        if stats is not None:
+            invalid = sum(1 for reason in reasons if reason)
+            stats.total += len(values)
+            stats.invalid += invalid
+            stats.valid += len(values) - invalid
+        yield output
+
+
+def _open_input(path: str, encoding: Optional[str]) -> Tuple[TextIO, str, str]:
+    """
+    打开输入的 CSV 文件，'-' 表示标准输入
+
+    Returns:
+        Tuple[TextIO, str, str]: (文本流, 输出使用的编码, 输入的换行符)
+
+    Raises:
+        ValueError: 文件开头就无法按编码解码（例如未指定编码的 GBK 文件），此时还没有写出任何内容
+    """
+    raw = sys.stdin.buffer if path == '-' else open(path, 'rb', buffering=BUFFER_SIZE)
+    head = raw.peek(BUFFER_SIZE) if hasattr(raw, 'peek') else b''
+    if encoding is None:
+        encoding = 'utf-8-sig' if head.startswith(_BOM) else 'utf-8'
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(head)
+    except UnicodeDecodeError as error:
+        if raw is not sys.stdin.buffer:
+            raw.close()
+        raise _encoding_error(encoding, error) from error
+    # 按第一个换行符判断换行方式（Excel 导出的 CSV 为 CRLF）
+    newline = head.find(b'\n')
+    lineterminator = '\r\n' if newline > 0 and head[newline - 1] == ord('\r') else '\n'
+    return io.TextIOWrapper(raw, encoding=encoding, newline=''), encoding, lineterminator
+
+
+def _encoding_error(encoding: str, error: UnicodeDecodeError) -> ValueError:
+    """输入无法解码时的错误（提示指定编码）"""
+    return ValueError(f'输入不是 {encoding} 编码（{error.reason}），请指定文件的编码，例如 encoding=\'gbk\'（命令行 --encoding gbk）')
+
+
+def _open_output(path: str, encoding: str) -> TextIO:
+    """打开输出的 CSV 文件，'-' 表示标准输出"""
+    raw = sys.stdout.buffer if path == '-' else open(path, 'wb', buffering=BUFFER_SIZE)
+    return io.TextIOWrapper(raw, encoding=encoding, newline='', write_through=True)
+
+
+def validate_csv(input_path: str, output_path: str = '-', column: Union[str, int] = 0, header: bool = True,
+                 delimiter: str = ',', encoding: Optional[str] = None, chunk_size: int = CHUNK_SIZE,
+                 validator: Optional[ChineseIDValidator] = None) -> StreamStats:
+    """
+    流式验证 CSV 文件中的号码列，追加结果列后写出
+
+    Args:
+        input_path: 输入文件路径，'-' 表示标准输入
+        output_path: 输出文件路径，'-' 表示标准输出
+        column: 号码列的列名或从0开始的列序号（见 resolve_column）
+        header: 第一行是否为表头（为 True 时输出的表头追加 RESULT_COLUMNS）
+        delimiter: 分隔符
+        encoding: 输入输出的编码，默认为 UTF-8（输入带 BOM 时输出也带 BOM）
+        chunk_size: 每批处理的行数（决定内存上限）
+        validator: 验证器实例，默认新建一个；整个文件使用开始时的参考日期
+
+    Returns:
+        StreamStats: 统计信息（total 为验证的行数）
+
+    Raises:
+        ValueError: 分隔符不是单个字符、号码列不存在，或输入无法按编码解码；
+            前两种情况以及输入开头就无法解码时不会打开（截断）输出文件
+    """
+    if len(delimiter) != 1:
+        raise ValueError(f'分隔符必须是单个字符: {delimiter!r}')
+    if validator is None:
+        validator = ChineseIDValidator()
+    validator = validator.pinned()
+    stats = StreamStats()
+
+    source, encoding, lineterminator = _open_input(input_path, encoding)
+    target = None
+    try:
+        reader = csv.reader(source, delimiter=delimiter)
+        try:
+            # 先确定号码列再打开输出，列名写错时不会截断已有的输出文件
+            first = next(reader, None) if header else None
+            index = resolve_column(first, column)
+            target = _open_output(output_path, encoding)
+            writer = csv.writer(target, delimiter=delimiter, lineterminator=lineterminator)
+            if first is not None:
+                writer.writerow(first + list(RESULT_COLUMNS))
+            width = max(len(first) if first is not None else 0, index + 1)
+            for rows in validate_rows(reader, index, validator, chunk_size, stats, width):
+                writer.writerows(rows)
+        except UnicodeDecodeError as error:
+            raise _encoding_error(encoding, error) from error
+        try:
+            stats.bytes_read = source.buffer.tell()
+        except OSError:     # 标准输入为管道时无法得到读取的字节数
+            pass
+    finally:
+        if input_path == '-':
+            source.detach()
+        else:
+            source.close()
+        if target is not None:
+            if output_path == '-':
+                target.flush()
+                target.detach()
+            else:
+                target.close()
+    return stats.finish()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 出生日期查找表
+Chinese ID Card Validator - Birth Date Lookup Table
+
+预先计算1900年1月1日至参考日期之间每一天的日序数（date.toordinal()），
+按 (年-1900)*372 + (月-1)*31 + (日-1) 排列在一个紧凑的 int32 数组中，
+非法日期和未来日期对应 0。逐条验证和批量验证共用同一张表。
+"""
+
+import datetime
+from array import array
+from functools import lru_cache
+
+
+FIRST_YEAR = 1900
+
+# 每年占用的槽位数（12个月 × 31天）
+YEAR_SLOTS = 12 * 31
+
+
+class BirthDateTable:
+    """出生日期有效性与日序数查找表"""
+
+    def __init__(self, as_of: datetime.date):
+        """
+        构建查找表
+
+        Args:
+            as_of: 参考日期，晚于该日期的出生日期视为无效
+        """
+        self.as_of = as_of
+        self.last_year = as_of.year
+        self.ordinals = array('i', bytes(4 * (self.last_year - FIRST_YEAR + 1) * YEAR_SLOTS))
+
+        ordinal = datetime.date(FIRST_YEAR, 1, 1).toordinal()
+        for year in range(FIRST_YEAR, self.last_year + 1):
+            for month in range(1, 13):
+                base = (year - FIRST_YEAR) * YEAR_SLOTS + (month - 1) * 31
+                for day in range(1, _days_in_month(year, month) + 1):
+                    if ordinal > as_of.toordinal():
+                        return
+                    self.ordinals[base + day - 1] = ordinal
+                    ordinal += 1
+
+    def lookup(self, birth_date_str: str) -> int:
+        """
+        查询出生日期
+
+        Args:
+            birth_date_str: 出生日期字符串 (YYYYMMDD)
+
+        Returns:
+            int: 日序数（可用 datetime.date.fromordinal 还原），日期无效时为 0
+        """
+        try:
+            value = int(birth_date_str)
+        except ValueError:
+            return 0
+        year, month, day = value // 10000, value // 100 % 100, value % 100
+        if year < FIRST_YEAR or year > self.last_year or not 1 <= month <= 12 or not 1 <= day <= 31:
+            return 0
+        return self.ordinals[(year - FIRST_YEAR) * YEAR_SLOTS + (month - 1) * 31 + day - 1]
+
+
+def _days_in_month(year: int, month: int) -> int:
+    if month == 2:
+        return 29 if year % 4 == 0 and (year % 100 != 0 or year % 400 == 0) else 28
+    return 30 if month in (4, 6, 9, 11) else 31
+
+
+@lru_cache(maxsize=4)
+def birth_date_table(as_of: datetime.date) -> BirthDateTable:
+    """
+    获取指定参考日期的出生日期查找表（带缓存）
+
+    Args:
+        as_of: 参考日期
+
+    Returns:
+        BirthDateTable: 查找表
+    """
+    return BirthDateTable(as_of)
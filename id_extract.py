@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 从任意文本中提取号码
+Chinese ID Card Validator - ID Extraction from Free Text and Logs
+
+逐块读取任意文本（日志、聊天记录、文档导出等），找出前后不紧邻其他数字的
+“17位数字加一位数字或 X”候选，只保留通过校验码、出生日期和地区代码检查的号码，
+输出号码在输入中的字节偏移和规范化后的号码（小写 x 转为 X）。
+
+候选的定义由 CANDIDATE_PATTERN 给出；安装了 numpy 时改为在字节数组上按数字串的起止位置
+向量化查找候选并用 id_batch.check_matrix 整批验证，结果与正则完全一致，速度快数倍。
+号码中间带空格、连字符或全角数字的写法在自由文本中不作为候选（误报太多）。
+"""
+
+import re
+import sys
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple
+
+from id_normalize import normalize
+from id_stream import StreamStats, close_streams, open_output
+from id_validator import ChineseIDValidator
+
+try:
+    import numpy as np
+    from id_batch import area_table, check_matrix
+except ImportError:  # 未安装 numpy 时用正则逐个查找候选
+    np = None
+
+
+# 候选号码：前后不紧邻其他数字的17位数字加一位数字或 X（不区分大小写）
+CANDIDATE_PATTERN = re.compile(rb'(?<![0-9])[0-9]{17}[0-9Xx](?![0-9])')
+
+# 每次读取的字节数
+CHUNK_SIZE = 1 << 20
+
+# 候选号码之后需要再看一个字节才能确定它后面没有紧跟数字
+_LOOKAHEAD = 19
+
+# 短于这个字节数的输入用正则查找（numpy 每次调用的固定开销在短输入上更慢）
+_VECTOR_MIN_BYTES = 1024
+
+# 可能出现在号码中的字节；一块输入以其他字节（例如换行符）结尾时，其中的候选都已完整
+_ID_BYTES = frozenset(b'0123456789Xx')
+
+
+class Found(NamedTuple):
+    """提取到的号码"""
+
+    offset: int         # 号码在输入中的起始字节偏移
+    id_number: str      # 规范化后的号码
+
+
+class ExtractStats(StreamStats):
+    """提取统计信息：total 为候选数，valid 为通过验证的号码数，invalid 为被排除的候选数"""
+
+    def summary(self) -> str:
+        """吞吐量报告"""
+        seconds = self.elapsed or 1e-9
+        return (f"扫描 {self.bytes_read / 1e6:,.1f} MB，候选 {self.total:,} 个，有效号码 {self.valid:,} 个；"
+                f"耗时 {self.elapsed:.2f}s，{self.bytes_read / seconds / 1e6:,.1f} MB/s")
+
+
+class IdScanner:
+    """
+    增量查找号码：逐块送入字节，返回已经可以确定的一段输入以及其中的号码
+
+    块边界上可能被截断的候选（最后19个字节）留到下一块一起处理；一块以不可能出现在号码中的字节
+    （例如换行符）结尾时全部返回。返回的每一段都不会把一个号码拆到两段中，依次拼接各段即为完整的输入。
+    """
+
+    def __init__(self, validator: Optional[ChineseIDValidator] = None):
+        """
+        Args:
+            validator: 验证器实例，默认新建一个
+        """
+        self.validator = validator if validator is not None else ChineseIDValidator()
+        self._area_ok = area_table(self.validator) if np is not None else None
+        self.offset = 0         # 已经返回的字节数（下一段在输入中的起始偏移）
+        self.candidates = 0     # 候选数
+        self.found = 0          # 通过验证的号码数
+        self._context = b''     # 已返回的最后一个字节（判断下一段开头的候选前面是否紧邻数字）
+        self._pending = b''     # 尚未返回的字节
+
+    def feed(self, chunk: bytes, final: bool = False) -> Tuple[bytes, List[Tuple[int, str]]]:
+        """
+        送入一块输入
+
+        Args:
+            chunk: 输入字节
+            final: 是否为最后一块（为 True 时返回全部剩余输入）
+
+        Returns:
+            Tuple[bytes, List[Tuple[int, str]]]: (可以确定的一段输入, [(号码在该段中的位置, 规范化后的号码)])
+        """
+        buffer = self._context + self._pending + chunk
+        skip = len(self._context)
+        if final or (buffer and buffer[-1] not in _ID_BYTES):
+            # 按行写入的日志每块都以换行符结尾，不必留下末尾的字节等待下一块
+            limit = len(buffer)
+        else:
+            limit = len(buffer) - _LOOKAHEAD
+        if limit <= skip:
+            self._pending = buffer[skip:]
+            return b'', []
+
+        ids = self._find(buffer, skip, limit)
+        # 在 limit 处截断，但不截断 limit 前开始的号码
+        cut = max(limit, ids[-1][0] + 18) if ids else limit
+        segment = buffer[skip:cut]
+        self._context = buffer[cut - 1:cut]
+        self._pending = buffer[cut:]
+        self.offset += len(segment)
+        return segment, [(position - skip, id_number) for position, id_number in ids]
+
+    def _find(self, buffer: bytes, skip: int, limit: int) -> List[Tuple[int, str]]:
+        """查找起始位置在 [skip, limit) 内、通过验证的号码"""
+        if np is None or limit - skip < _VECTOR_MIN_BYTES:
+            ids = []
+            for match in CANDIDATE_PATTERN.finditer(buffer, skip):
+                if match.start() >= limit:
+                    break
+                self.candidates += 1
+                id_number = normalize(match.group().decode('ascii'))
+                if self.validator.is_valid(id_number):
+                    ids.append((match.start(), id_number))
+            self.found += len(ids)
+            return ids
+
+        array = np.frombuffer(buffer, dtype=np.uint8)
+        starts = _candidate_starts(array, skip, limit)
+        if not len(starts):
+            return []
+        self.candidates += len(starts)
+        chars = array[starts[:, None] + np.arange(18)]
+        valid = check_matrix(chars, self._area_ok, self.validator.birth_date_table()) == 0
+        chars = chars[valid]
+        chars[:, 17] = np.where(chars[:, 17] == ord('x'), np.uint8(ord('X')), chars[:, 17])
+        text = chars.tobytes().decode('ascii')
+        self.found += len(chars)
+        return list(zip(starts[valid].tolist(), [text[i:i + 18] for i in range(0, len(text), 18)]))
+
+
+def _candidate_starts(array: 'np.ndarray', skip: int, limit: int) -> 'np.ndarray':
+    """
+    按数字串的起止位置找出候选的起始位置（与 CANDIDATE_PATTERN 的匹配一致）
+
+    候选是恰好18位的数字串，或者恰好17位的数字串后面紧跟 X/x、再后面不是数字。
+    """
+    size = len(array)
+    digit = (array - ord('0')) < 10
+    edges = np.flatnonzero(digit[1:] != digit[:-1]) + 1
+    if digit[0]:
+        edges = np.concatenate(([0], edges))
+    if digit[-1]:
+        edges = np.concatenate((edges, [size]))
+    starts = edges[0::2]
+    lengths = edges[1::2] - starts
+
+    full = starts[lengths == 18]
+    short = starts[lengths == 17]
+    # 17位数字之后的一个字节是 X/x，再之后的一个字节（如果有）不是数字
+    after = short + 17
+    short, after = short[after < size], after[after < size]
+    is_x = (array[after] | 0x20) == ord('x')
+    short, after = short[is_x], after[is_x]
+    following = after + 1
+    short = short[(following >= size) | ~digit[np.minimum(following, size - 1)]]
+
+    starts = np.sort(np.concatenate((full, short)))
+    return starts[(starts >= skip) & (starts < limit)]
+
+
+def extract(data: bytes, validator: Optional[ChineseIDValidator] = None) -> List[Found]:
+    """
+    提取一段输入中的全部号码
+
+    Args:
+        data: 输入字节（文本请先编码，偏移量按编码后的字节计算）
+        validator: 验证器实例，默认新建一个
+
+    Returns:
+        List[Found]: 按出现顺序排列的号码
+    """
+    _, ids = IdScanner(validator).feed(data, final=True)
+    return [Found(position, id_number) for position, id_number in ids]
+
+
+def extract_stream(stream: BinaryIO, validator: Optional[ChineseIDValidator] = None,
+                   chunk_size: int = CHUNK_SIZE, stats: Optional[ExtractStats] = None) -> Iterator[Found]:
+    """
+    逐块读取二进制流并提取号码，内存占用只与 chunk_size 有关
+
+    Args:
+        stream: 二进制输入流
+        validator: 验证器实例，默认新建一个
+        chunk_size: 每次读取的字节数
+        stats: 统计信息（累计读取字节数、候选数和号码数）
+
+    Yields:
+        Found: 按出现顺序排列的号码
+    """
+    scanner = IdScanner(validator)
+    while True:
+        chunk = stream.read(chunk_size)
+        base = scanner.offset
+        _, ids = scanner.feed(chunk, final=not chunk)
+        if stats is not None:
+            stats.bytes_read += len(chunk)
+            stats.total = scanner.candidates
+            stats.valid = scanner.found
+            stats.invalid = scanner.candidates - scanner.found
+        for position, id_number in ids:
+            yield Found(base + position, id_number)
+        if not chunk:
+            return
+
+
+def extract_range(source: BinaryIO, start: int, end: int, validator: Optional[ChineseIDValidator] = None,
+                  chunk_size: int = CHUNK_SIZE) -> Iterator[Found]:
+    """
+    提取可随机访问的二进制流中起始偏移在 [start, end) 内的号码
+
+    读取 start 之前的一个字节和 end 之后的19个字节判断边界，把大文件切成相邻的多段分别提取时，
+    每个号码恰好出现在一段中。
+
+    Args:
+        source: 可随机访问的二进制流
+        start: 起始偏移
+        end: 结束偏移（不含）
+        validator: 验证器实例，默认新建一个
+        chunk_size: 每次读取的字节数
+
+    Yields:
+        Found: 按出现顺序排列的号码，offset 为在整个流中的偏移
+    """
+    scanner = IdScanner(validator)
+    if start > 0:
+        source.seek(start - 1)
+        scanner._context = source.read(1)
+    else:
+        source.seek(0)
+    scanner.offset = start
+    position = start
+    while True:
+        size = min(chunk_size, end + _LOOKAHEAD - position)
+        chunk = source.read(size) if size > 0 else b''
+        position += len(chunk)
+        base = scanner.offset
+        _, ids = scanner.feed(chunk, final=not chunk)
+        for position_in_segment, id_number in ids:
+            if base + position_in_segment >= end:
+                return
+            yield Found(base + position_in_segment, id_number)
+        if not chunk:
+            return
+
+
+def extract_file(input_path: str, output_path: Optional[str] = '-',
+                 validator: Optional[ChineseIDValidator] = None, chunk_size: int = CHUNK_SIZE) -> ExtractStats:
+    """
+    提取文件中的号码，每行写出“字节偏移<TAB>号码”
+
+    Args:
+        input_path: 输入文件路径，'-' 表示标准输入
+        output_path: 输出文件路径，'-' 表示标准输出，None 表示只统计
+        validator: 验证器实例，默认新建一个；整个文件使用开始时的参考日期
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        ExtractStats: 统计信息
+    """
+    if validator is None:
+        validator = ChineseIDValidator()
+    validator = validator.pinned()
+    stats = ExtractStats()
+    source = sys.stdin.buffer if input_path == '-' else open(input_path, 'rb', buffering=0)
+    output = open_output(output_path)
+    try:
+        found = extract_stream(source, validator, chunk_size, stats)
+        if output is None:
+            for _ in found:
+                pass
+        else:
+            output.writelines(f'{offset}\t{id_number}\n' for offset, id_number in found)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        close_streams(output)
+    return stats.finish()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 定长文件内存映射扫描
+Chinese ID Card Validator - Memory-mapped Fixed-width Scanner
+
+针对每行恰好一个18位号码的文件（每行19字节，或CRLF换行时20字节），
+通过 mmap 将文件零拷贝地视为形状为 (N, 行宽) 的 uint8 数组，直接在字节上验证，
+只为验证失败的行计算偏移量和错误信息。
+"""
+
+import mmap
+import os
+from typing import Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from id_validator import ChineseIDValidator, reason_messages
+from id_batch import area_table, check_matrix
+from id_stream import StreamStats, close_streams, open_output
+
+
+# 每次验证的行数（控制临时数组的内存占用）
+BLOCK_ROWS = 1 << 20
+
+_NEWLINE = ord('\n')
+_CARRIAGE_RETURN = ord('\r')
+
+
+class FixedWidthLayout(NamedTuple):
+    """定长文件布局"""
+
+    width: int       # 行宽（含换行符），19 或 20
+    rows: int        # 带换行符的完整行数
+    tail: bool       # 最后一行是否缺少换行符
+
+
+class ScanResult(NamedTuple):
+    """定长文件扫描结果"""
+
+    total: int                # 总行数
+    offsets: np.ndarray       # 验证失败行的起始字节偏移，int64 数组
+    reasons: np.ndarray       # 验证失败行的错误原因位掩码，uint8 数组
+
+
+def _row_view(mm: mmap.mmap, layout: FixedWidthLayout) -> np.ndarray:
+    """将文件视为 (rows, width) 的 uint8 数组（零拷贝）"""
+    return np.frombuffer(mm, dtype=np.uint8, count=layout.rows * layout.width).reshape(layout.rows, layout.width)
+
+
+def detect_layout(mm: mmap.mmap) -> Optional[FixedWidthLayout]:
+    """
+    检测文件是否为每行一个18位号码的定长布局
+
+    Args:
+        mm: 文件的内存映射
+
+    Returns:
+        Optional[FixedWidthLayout]: 定长布局；不是定长文件时返回 None
+    """
+    size = len(mm)
+    first = mm.find(b'\n', 0, 21)
+    if first == 18:
+        width = 19
+    elif first == 19 and mm[18] == _CARRIAGE_RETURN:
+        width = 20
+    else:
+        return None
+
+    rows, remainder = divmod(size, width)
+    if remainder not in (0, 18):
+        return None
+    layout = FixedWidthLayout(width, rows, remainder == 18)
+
+    # 逐块确认每一行的换行符都在固定位置
+    view = _row_view(mm, layout)
+    for start in range(0, rows, BLOCK_ROWS):
+        block = view[start:start + BLOCK_ROWS]
+        if not (block[:, width - 1] == _NEWLINE).all():
+            return None
+        if width == 20 and not (block[:, 18] == _CARRIAGE_RETURN).all():
+            return None
+    return layout
+
+
+def _iter_blocks(mm: mmap.mmap, layout: FixedWidthLayout) -> Iterator[Tuple[int, np.ndarray]]:
+    """按块产出 (起始行号, 18列的号码字节视图)"""
+    view = _row_view(mm, layout)
+    for start in range(0, layout.rows, BLOCK_ROWS):
+        yield start, view[start:start + BLOCK_ROWS, :18]
+    if layout.tail:
+        tail = np.frombuffer(mm, dtype=np.uint8, count=18, offset=layout.rows * layout.width)
+        yield layout.rows, tail.reshape(1, 18)
+
+
+def scan_fixed_width(path: str, validator: Optional[ChineseIDValidator] = None) -> Optional[ScanResult]:
+    """
+    扫描定长号码文件，返回验证失败行的偏移量
+
+    Args:
+        path: 文件路径
+        validator: 验证器实例（提供地区代码表和出生日期表），默认新建一个
+
+    Returns:
+        Optional[ScanResult]: 扫描结果；文件不是定长布局时返回 None
+    """
+    if validator is None:
+        validator = ChineseIDValidator()
+    area_ok = area_table(validator)
+    # 整个文件使用同一个参考日期
+    dates = validator.birth_date_table()
+
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            layout = detect_layout(mm)
+            if layout is None:
+                return None
+
+            offsets, reasons = [], []
+            for start, chars in _iter_blocks(mm, layout):
+                block_reasons = check_matrix(chars, area_ok, dates)
+                failed = np.flatnonzero(block_reasons)
+                offsets.append((failed + start) * layout.width)
+                reasons.append(block_reasons[failed])
+                del chars
+
+    total = layout.rows + layout.tail
+    return ScanResult(total, np.concatenate(offsets).astype(np.int64), np.concatenate(reasons))
+
+
+def validate_file_mmap(input_path: str, valid_out: Optional[str] = None, invalid_out: Optional[str] = None,
+                       validator: Optional[ChineseIDValidator] = None) -> Optional[StreamStats]:
+    """
+    以内存映射方式验证定长号码文件，输出格式与 id_stream.validate_file 相同
+
+    Args:
+        input_path: 输入文件路径
+        valid_out: 合法号码输出文件路径，'-' 表示标准输出
+        invalid_out: 不合法号码输出文件路径，'-' 表示标准输出
+        validator: 验证器实例，默认新建一个
+
+    Returns:
+        Optional[StreamStats]: 统计信息；文件不是定长布局时返回 None（调用方应退回流式验证）
+    """
+    if validator is None:
+        validator = ChineseIDValidator()
+    area_ok = area_table(validator)
+    dates = validator.birth_date_table()
+    stats = StreamStats()
+
+    with open(input_path, 'rb') as f:
+        stats.bytes_read = os.fstat(f.fileno()).st_size
+        if stats.bytes_read == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            layout = detect_layout(mm)
+            if layout is None:
+                return None
+
+            valid_stream = open_output(valid_out)
+            invalid_stream = open_output(invalid_out)
+            try:
+                for _, chars in _iter_blocks(mm, layout):
+                    reasons = check_matrix(chars, area_ok, dates)
+                    valid = reasons == 0
+                    valid_count = int(valid.sum())
+
+                    if valid_stream is not None and valid_count:
+                        lines = np.empty((valid_count, 19), dtype=np.uint8)
+                        lines[:, :18] = chars[valid]
+                        # 与流式验证一样写出规范化后的号码（小写 x 转为 X）
+                        lines[:, 17] = np.where(lines[:, 17] == ord('x'), np.uint8(ord('X')), lines[:, 17])
+                        lines[:, 18] = _NEWLINE
+                        valid_stream.write(lines.tobytes().decode('ascii'))
+
+                    # 只为失败行解码出字符串；全为空白的行与流式验证一样跳过
+                    invalid_count = 0
+                    invalid_lines = []
+                    for row in np.flatnonzero(~valid):
+                        line = chars[row].tobytes().decode('utf-8', errors='replace').strip()
+                        if not line:
+                            continue
+                        invalid_count += 1
+                        if invalid_stream is not None:
+                            invalid_lines.append(f"{line}\t{'; '.join(reason_messages(int(reasons[row])))}\n")
+                    if invalid_lines:
+                        invalid_stream.writelines(invalid_lines)
+
+                    stats.total += valid_count + invalid_count
+                    stats.valid += valid_count
+                    stats.invalid += invalid_count
+                    del chars
+            finally:
+                close_streams(valid_stream, invalid_stream)
+    return stats.finish()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 多进程分片验证
+Chinese ID Card Validator - Multi-process Sharded Validation
+
+将输入文件按字节范围切分为若干分片（分片边界对齐到行尾），
+在 ProcessPoolExecutor 中并行验证，结果按输入顺序（或完成顺序）合并写出。
+WorkerPool 为 Web 服务等长期运行的进程提供常驻、预热的工作进程池。
+"""
+
+import datetime
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+
+from id_validator import ChineseIDValidator
+from id_stream import (
+    StreamStats, chunked, close_streams, open_output, read_lines, validate_chunks, write_results,
+)
+
+
+# 默认分片大小（字节）
+DEFAULT_SHARD_SIZE = 16 << 20
+
+# 每个进程内常驻的验证器，由 _init_worker 创建
+_worker_validator: Optional[ChineseIDValidator] = None
+
+
+def plan_shards(path: str, shard_size: int = DEFAULT_SHARD_SIZE) -> List[Tuple[int, int]]:
+    """
+    将文件切分为按行对齐的字节范围
+
+    Args:
+        path: 文件路径
+        shard_size: 目标分片大小（字节）
+
+    Returns:
+        List[Tuple[int, int]]: 分片列表 [(起始偏移, 结束偏移), ...]，结束偏移不含
+    """
+    size = os.path.getsize(path)
+    shards = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + shard_size
+            if end >= size:
+                end = size
+            else:
+                # 将分片结束位置推进到下一个换行符之后
+                f.seek(end)
+                f.readline()
+                end = min(f.tell(), size)
+            shards.append((start, end))
+            start = end
+    return shards
+
+
+def _init_worker(area_check: str = ChineseIDValidator.AREA_CHECK_COUNTY,
+                 as_of: Optional[datetime.date] = None) -> None:
+    """进程初始化：创建常驻验证器（参考日期由主进程统一指定），预先加载查找表并预热批量验证引擎"""
+    global _worker_validator
+    _worker_validator = ChineseIDValidator(area_check, as_of)
+    _worker_validator.area_index
+    _worker_validator.birth_date_table()
+    try:
+        from id_batch import area_table
+    except ImportError:
+        pass
+    else:
+        area_table(_worker_validator)
+
+
+def _ping(_: int) -> int:
+    """空任务，用于启动和预热工作进程"""
+    return os.getpid()
+
+
+def worker_validator(as_of: Optional[datetime.date] = None) -> ChineseIDValidator:
+    """
+    当前工作进程的常驻验证器（在主进程中调用时新建一个）
+
+    Args:
+        as_of: 参考日期，指定时返回地区代码检查方式相同、参考日期固定的验证器
+
+    Returns:
+        ChineseIDValidator: 验证器
+    """
+    validator = _worker_validator or ChineseIDValidator()
+    if as_of is None or as_of == validator.fixed_as_of:
+        return validator
+    return ChineseIDValidator(validator.area_check, as_of)
+
+
+class WorkerPool:
+    """
+    常驻的预热进程池
+
+    创建时立即启动全部工作进程，并在每个进程中加载地区代码表和出生日期表，
+    之后的请求无需等待进程启动和数据加载。提交的函数必须可以被 pickle（模块级函数），
+    在函数中通过 worker_validator() 取得验证器。
+    """
+
+    def __init__(self, workers: Optional[int] = None, validator: Optional[ChineseIDValidator] = None):
+        """
+        Args:
+            workers: 工作进程数，默认为 CPU 核数
+            validator: 提供地区代码检查方式的验证器，默认新建一个；参考日期由每次调用传入
+        """
+        self.workers = workers or os.cpu_count() or 1
+        area_check = validator.area_check if validator is not None else ChineseIDValidator.AREA_CHECK_COUNTY
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(area_check, None))
+        # 同时提交与进程数相同的任务，促使执行器启动全部进程并完成初始化
+        list(self._executor.map(_ping, range(self.workers)))
+
+    def submit(self, fn: Callable, *args):
+        """提交一个任务，返回 Future"""
+        return self._executor.submit(fn, *args)
+
+    def map_chunks(self, fn: Callable, items: Sequence, chunk_size: int, *args) -> Iterator:
+        """
+        将 items 按 chunk_size 分块，在工作进程中并行执行 fn(chunk, *args)
+
+        Returns:
+            Iterator: 按分块顺序产出每块的返回值
+        """
+        futures = [self._executor.submit(fn, items[start:start + chunk_size], *args)
+                   for start in range(0, len(items), chunk_size)]
+        return (future.result() for future in futures)
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        self._executor.shutdown(wait=True)
+
+
+def _validate_shard(path: str, start: int, end: int, chunk_size: int,
+                    keep_valid: bool, keep_invalid: bool) -> Tuple[str, str, StreamStats]:
+    """
+    验证一个分片（在工作进程中执行）
+
+    Returns:
+        Tuple[str, str, StreamStats]: (合法输出文本, 不合法输出文本, 统计信息)
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    stats = StreamStats()
+    source = io.StringIO(data.decode('utf-8', errors='replace'), newline=None)
+    valid_out = io.StringIO() if keep_valid else None
+    invalid_out = io.StringIO() if keep_invalid else None
+    chunks = chunked(read_lines(source), chunk_size)
+    write_results(validate_chunks(chunks, _worker_validator), valid_out, invalid_out, stats)
+    stats.bytes_read = len(data)
+    return (valid_out.getvalue() if keep_valid else '',
+            invalid_out.getvalue() if keep_invalid else '',
+            stats)
+
+
+def validate_file_parallel(input_path: str, valid_out: Optional[str] = None, invalid_out: Optional[str] = None,
+                           workers: Optional[int] = None, ordered: bool = True,
+                           shard_size: int = DEFAULT_SHARD_SIZE, chunk_size: int = 65536,
+                           validator: Optional[ChineseIDValidator] = None) -> StreamStats:
+    """
+    多进程分片验证文件中的身份证号码（每行一个）
+
+    同时在途的分片数不超过 workers 的两倍，内存占用与文件大小无关。
+
+    Args:
+        input_path: 输入文件路径（必须是可随机访问的普通文件）
+        valid_out: 合法号码输出文件路径，'-' 表示标准输出
+        invalid_out: 不合法号码输出文件路径，'-' 表示标准输出
+        workers: 工作进程数，默认为 CPU 核数
+        ordered: 是否按输入顺序写出结果；为 False 时按分片完成顺序写出，速度更快
+        shard_size: 分片大小（字节）
+        chunk_size: 分片内每批处理的记录数
+        validator: 提供地区代码检查方式和参考日期的验证器，默认新建一个；
+            参考日期在开始时确定，所有工作进程共用
+
+    Returns:
+        StreamStats: 统计信息
+    """
+    workers = workers or os.cpu_count() or 1
+    if validator is None:
+        validator = ChineseIDValidator()
+    validator = validator.pinned()
+    stats = StreamStats()
+    shards = plan_shards(input_path, shard_size)
+
+    valid_stream = open_output(valid_out)
+    invalid_stream = open_output(invalid_out)
+
+    def merge(result: Tuple[str, str, StreamStats]) -> None:
+        valid_text, invalid_text, shard_stats = result
+        if valid_stream is not None:
+            valid_stream.write(valid_text)
+        if invalid_stream is not None:
+            invalid_stream.write(invalid_text)
+        stats.total += shard_stats.total
+        stats.valid += shard_stats.valid
+        stats.invalid += shard_stats.invalid
+        stats.bytes_read += shard_stats.bytes_read
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(validator.area_check, validator.as_of)) as executor:
+            pending = []
+            max_in_flight = workers * 2
+            for start, end in shards:
+                pending.append(executor.submit(_validate_shard, input_path, start, end, chunk_size,
+                                               valid_stream is not None, invalid_stream is not None))
+                while len(pending) >= max_in_flight:
+                    pending = _drain(pending, merge, ordered)
+            while pending:
+                pending = _drain(pending, merge, ordered)
+    finally:
+        close_streams(valid_stream, invalid_stream)
+    return stats.finish()
+
+
+def _drain(pending: list, merge, ordered: bool) -> list:
+    """写出至少一个已完成的分片，返回剩余的在途分片"""
+    if ordered:
+        merge(pending[0].result())
+        return pending[1:]
+    done, not_done = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        merge(future.result())
+    return [future for future in pending if future in not_done]
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 目录树并行扫描
+Chinese ID Card Validator - Parallel Directory-tree Scan
+
+遍历目录树中的 .txt / .csv / .json 文件，在多进程中提取其中的有效身份证号码（见 id_extract），
+每个文件写出一行 JSON 报告（号码个数和每个号码的字节偏移，不写出号码本身）。
+
+按字节数调度：大文件切成若干段（PIECE_SIZE）分给不同的进程，小文件合并成总字节数相近的批次，
+任务按字节数从大到小提交，单个大文件不会拖到最后由一个进程独自扫描。
+
+报告同时是断点记录：每个文件的全部分段完成后才写出它的一行并立即刷新，
+中断后用 resume=True（命令行 --resume）重新运行时跳过报告中大小和修改时间都没有变化的文件，
+上次无法读取的文件会重新扫描。
+
+报告每行的格式：
+    {"path": "...", "size": 12345, "mtime_ns": ..., "count": 2, "offsets": [100, 2048]}
+无法读取的文件："count" 为 0，另有 "error" 字段。
+"""
+
+import errno
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from id_extract import CHUNK_SIZE, extract_range
+from id_parallel import _init_worker, worker_validator
+from id_stream import StreamStats
+from id_validator import ChineseIDValidator
+
+
+# 默认扫描的文件扩展名（不区分大小写）
+DEFAULT_EXTENSIONS = ('.txt', '.csv', '.json')
+
+# 大文件按这个字节数切段；小文件合并成不超过这个字节数的批次
+PIECE_SIZE = 8 << 20
+
+# 一个批次最多包含的小文件数（限制单个任务的结果大小和断点粒度）
+BATCH_FILES = 256
+
+# 输出进度的间隔秒数
+PROGRESS_INTERVAL = 5.0
+
+
+class FileEntry(NamedTuple):
+    """待扫描的文件"""
+
+    path: str
+    size: int
+    mtime_ns: int
+
+
+class ScanStats(StreamStats):
+    """目录扫描统计信息：total 为扫描的文件数，valid 为找到的号码数"""
+
+    def __init__(self):
+        super().__init__()
+        self.planned = 0        # 需要扫描的文件数
+        self.skipped = 0        # 断点续扫时跳过的文件数
+        self.errors = 0         # 无法读取的文件数
+        self.files_with_ids = 0
+
+    def summary(self) -> str:
+        """吞吐量报告"""
+        seconds = self.elapsed or 1e-9
+        return (f"扫描 {self.total:,} 个文件（跳过已完成的 {self.skipped:,} 个，无法读取 {self.errors:,} 个），"
+                f"{self.bytes_read / 1e6:,.1f} MB，{self.files_with_ids:,} 个文件中共 {self.valid:,} 个号码；"
+                f"耗时 {self.elapsed:.2f}s，{self.bytes_read / seconds / 1e6:,.1f} MB/s，"
+                f"{self.total / seconds:,.0f} 个文件/秒")
+
+    def progress(self) -> str:
+        """进度报告"""
+        seconds = (time.perf_counter() - self.started) or 1e-9
+        return (f"已完成 {self.total:,}/{self.planned:,} 个文件，{self.bytes_read / 1e6:,.1f} MB，"
+                f"{self.valid:,} 个号码，{self.bytes_read / seconds / 1e6:,.1f} MB/s")
+
+
+def walk_files(root: str, extensions: Sequence[str] = DEFAULT_EXTENSIONS) -> Iterator[FileEntry]:
+    """
+    遍历目录树中指定扩展名的普通文件（不跟随符号链接，无法进入的目录跳过）
+
+    Args:
+        root: 根目录
+        extensions: 扩展名列表（不区分大小写）
+
+    Yields:
+        FileEntry: 文件路径、大小和修改时间，同一目录内按名称排序
+    """
+    extensions = tuple(extension.lower() for extension in extensions)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirectories = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                elif entry.is_file(follow_symlinks=False) and entry.name.lower().endswith(extensions):
+                    info = entry.stat(follow_symlinks=False)
+                    yield FileEntry(entry.path, info.st_size, info.st_mtime_ns)
+            except OSError:
+                continue
+        stack.extend(reversed(subdirectories))
+
+
+def plan_tasks(files: Iterable[FileEntry], piece_size: int = PIECE_SIZE,
+               batch_files: int = BATCH_FILES) -> List[List[Tuple[str, int, int]]]:
+    """
+    按字节数把文件划分为任务
+
+    大于 piece_size 的文件切成多段，每段单独成为一个任务；小文件按顺序合并，
+    每批的总字节数不超过 piece_size、文件数不超过 batch_files。任务按字节数从大到小排列。
+
+    Args:
+        files: 待扫描的文件
+        piece_size: 切段和合并的目标字节数
+        batch_files: 每批最多包含的小文件数
+
+    Returns:
+        List[List[Tuple[str, int, int]]]: 任务列表，每个任务为 [(路径, 起始偏移, 结束偏移), ...]
+    """
+    tasks = []
+    batch: List[Tuple[str, int, int]] = []
+    batch_bytes = 0
+    for entry in files:
+        if entry.size > piece_size:
+            for start in range(0, entry.size, piece_size):
+                tasks.append([(entry.path, start, min(start + piece_size, entry.size))])
+            continue
+        if batch and (batch_bytes + entry.size > piece_size or len(batch) >= batch_files):
+            tasks.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append((entry.path, 0, entry.size))
+        batch_bytes += entry.size
+    if batch:
+        tasks.append(batch)
+    tasks.sort(key=lambda task: sum(end - start for _, start, end in task), reverse=True)
+    return tasks
+
+
+def _scan_task(pieces: List[Tuple[str, int, int]],
+               chunk_size: int) -> List[Tuple[str, int, int, List[int], Optional[str]]]:
+    """
+    扫描一个任务中的各段（在工作进程中执行）
+
+    Returns:
+        List[Tuple[str, int, int, List[int], Optional[str]]]: [(路径, 起始偏移, 读取字节数, 号码偏移, 错误信息), ...]
+    """
+    validator = worker_validator()
+    results = []
+    for path, start, end in pieces:
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                offsets = [found.offset for found in extract_range(f, start, end, validator, chunk_size)]
+            results.append((path, start, end - start, offsets, None))
+        except OSError as error:
+            results.append((path, start, 0, [], f'{type(error).__name__}: {error.strerror or error}'))
+    return results
+
+
+def load_report(report_path: str) -> Dict[str, Tuple[int, int]]:
+    """
+    读取已有的报告，并截掉中断时没有写完的最后一行
+
+    Args:
+        report_path: 报告文件路径
+
+    Returns:
+        Dict[str, Tuple[int, int]]: 已完成的文件 -> (大小, 修改时间)；同一文件出现多次时以最后一行为准，
+            带有 "error" 的记录不算完成
+    """
+    done = {}
+    complete = 0
+    try:
+        with open(report_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line.decode('utf-8', errors='surrogateescape'))
+                except ValueError:
+                    break
+                if 'error' in record:
+                    # 上次无法读取的文件（权限、I/O 错误等可能是暂时的）重新扫描
+                    done.pop(record['path'], None)
+                else:
+                    done[record['path']] = (record['size'], record['mtime_ns'])
+                complete += len(line)
+    except FileNotFoundError:
+        return done
+    if complete < os.path.getsize(report_path):
+        os.truncate(report_path, complete)
+    return done
+
+
+def scan_tree(root: str, report_path: str, workers: Optional[int] = None, resume: bool = False,
+              extensions: Sequence[str] = DEFAULT_EXTENSIONS, piece_size: int = PIECE_SIZE,
+              validator: Optional[ChineseIDValidator] = None,
+              progress: Optional[Callable[[ScanStats], None]] = None) -> ScanStats:
+    """
+    多进程扫描目录树中的文件，逐个文件写出报告
+
+    Args:
+        root: 根目录
+        report_path: 报告文件路径（JSON Lines）
+        workers: 工作进程数，默认为 CPU 核数
+        resume: 是否从已有的报告继续（跳过报告中大小和修改时间都没有变化的文件）；为 False 时覆盖报告
+        extensions: 扫描的文件扩展名
+        piece_size: 切段和合并的目标字节数
+        validator: 提供地区代码检查方式和参考日期的验证器，默认新建一个；参考日期在开始时确定
+        progress: 每隔 PROGRESS_INTERVAL 秒调用一次的进度回调
+
+    Returns:
+        ScanStats: 统计信息
+
+    Raises:
+        NotADirectoryError: root 不存在或不是目录
+    """
+    if not os.path.isdir(root):
+        raise NotADirectoryError(errno.ENOTDIR, '不存在或不是目录', root)
+    workers = workers or os.cpu_count() or 1
+    if validator is None:
+        validator = ChineseIDValidator()
+    validator = validator.pinned()
+    stats = ScanStats()
+
+    done = load_report(report_path) if resume else {}
+    files = []
+    for entry in walk_files(root, extensions):
+        if done.get(entry.path) == (entry.size, entry.mtime_ns):
+            stats.skipped += 1
+        else:
+            files.append(entry)
+    stats.planned = len(files)
+    tasks = plan_tasks(files, piece_size)
+
+    # 切成多段的文件在全部分段完成后才写出
+    entries = {entry.path: entry for entry in files}
+    pieces_left = {entry.path: max(1, -(-entry.size // piece_size)) for entry in files}
+    partial: Dict[str, List[Tuple[int, List[int]]]] = {}
+    errors: Dict[str, str] = {}
+
+    report = open(report_path, 'a' if resume else 'w', encoding='utf-8', errors='surrogateescape')
+
+    def merge(results) -> None:
+        for path, start, size, offsets, error in results:
+            stats.bytes_read += size
+            partial.setdefault(path, []).append((start, offsets))
+            if error is not None:
+                errors[path] = error
+            pieces_left[path] -= 1
+            if pieces_left[path]:
+                continue
+            offsets = [offset for _, piece in sorted(partial.pop(path)) for offset in piece]
+            entry = entries[path]
+            record = {'path': path, 'size': entry.size, 'mtime_ns': entry.mtime_ns,
+                      'count': len(offsets), 'offsets': offsets}
+            if path in errors:
+                record = {**record, 'count': 0, 'offsets': [], 'error': errors.pop(path)}
+                stats.errors += 1
+            report.write(json.dumps(record, ensure_ascii=False) + '\n')
+            report.flush()
+            stats.total += 1
+            stats.valid += record['count']
+            stats.files_with_ids += record['count'] > 0
+
+    next_progress = time.perf_counter() + PROGRESS_INTERVAL
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(validator.area_check, validator.as_of)) as executor:
+            pending = set()
+            for task in tasks:
+                pending.add(executor.submit(_scan_task, task, CHUNK_SIZE))
+                while len(pending) >= workers * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        merge(future.result())
+                if progress is not None and time.perf_counter() >= next_progress:
+                    progress(stats)
+                    next_progress = time.perf_counter() + PROGRESS_INTERVAL
+            while pending:
+                finished, pending = wait(pending, timeout=PROGRESS_INTERVAL, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    merge(future.result())
+                if progress is not None and time.perf_counter() >= next_progress:
+                    progress(stats)
+                    next_progress = time.perf_counter() + PROGRESS_INTERVAL
+    finally:
+        report.close()
+    return stats.finish()
+
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 流式文件验证
+Chinese ID Card Validator - Streaming File Validation
+
+读取 -> 规范化 -> 验证 -> 写出 组成的生成器流水线，按固定大小的批次处理，
+内存占用只与批次大小有关，与文件大小无关。
+"""
+
+import sys
+import time
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from id_validator import ChineseIDValidator, reason_messages
+
+try:
+    from id_batch import validate_many as _validate_many
+except ImportError:  # 未安装 numpy 时退回逐条验证
+    _validate_many = None
+
+
+# 读写缓冲区大小
+BUFFER_SIZE = 1 << 20
+
+
+class StreamStats:
+    """流式验证统计信息"""
+
+    def __init__(self):
+        self.total = 0
+        self.valid = 0
+        self.invalid = 0
+        self.bytes_read = 0      # 读取的字符数（身份证文件为ASCII，与字节数相同）
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def finish(self) -> 'StreamStats':
+        """记录结束时间"""
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def summary(self) -> str:
+        """吞吐量报告"""
+        seconds = self.elapsed or 1e-9
+        return (f"共 {self.total:,} 条，合法 {self.valid:,} 条，不合法 {self.invalid:,} 条；"
+                f"耗时 {self.elapsed:.2f}s，{self.total / seconds:,.0f} 条/秒，"
+                f"{self.bytes_read / seconds / 1e6:,.1f} MB/s")
+
+
+def read_lines(stream: TextIO, stats: Optional[StreamStats] = None) -> Iterator[str]:
+    """
+    逐行读取输入，去除首尾空白并跳过空行
+
+    Args:
+        stream: 文本输入流
+        stats: 统计信息（累计读取字节数）
+
+    Yields:
+        str: 非空的输入行
+    """
+    for line in stream:
+        if stats is not None:
+            stats.bytes_read += len(line)
+        line = line.strip()
+        if line:
+            yield line
+
+
+def chunked(records: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    """
+    将记录流切分为固定大小的批次
+
+    Args:
+        records: 记录流
+        chunk_size: 每批最多记录数
+
+    Yields:
+        List[str]: 一批记录
+    """
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_chunk(lines: List[str], validator: ChineseIDValidator) -> Tuple[List[str], List[int]]:
+    """
+    验证一批记录
+
+    Args:
+        lines: 一批原始输入
+        validator: 验证器实例
+
+    Returns:
+        Tuple[List[str], List[int]]: (规范化后的号码, 错误原因位掩码)，位掩码为0表示合法
+    """
+    if _validate_many is not None:
+        result = _validate_many(lines, validator)
+        return result.ids, result.reasons.tolist()
+
+    ids, reasons = [], []
+    for line in lines:
+        result = validator.validate(line)
+        ids.append(result.id_number)
+        reasons.append(result.reasons)
+    return ids, reasons
+
+
+def validate_chunks(chunks: Iterable[List[str]],
+                    validator: ChineseIDValidator) -> Iterator[Tuple[List[str], List[str], List[int]]]:
+    """
+    逐批验证
+
+    Yields:
+        Tuple[List[str], List[str], List[int]]: (原始输入, 规范化后的号码, 错误原因位掩码)
+    """
+    for lines in chunks:
+        ids, reasons = validate_chunk(lines, validator)
+        yield lines, ids, reasons
+
+
+def write_results(results: Iterable[Tuple[List[str], List[str], List[int]]],
+                  valid_out: Optional[TextIO], invalid_out: Optional[TextIO],
+                  stats: StreamStats) -> StreamStats:
+    """
+    写出验证结果
+
+    合法号码每行写出规范化后的号码；不合法号码写出原始输入和错误信息（制表符分隔）。
+
+    Args:
+        results: validate_chunks 的输出
+        valid_out: 合法号码输出流（可为 None）
+        invalid_out: 不合法号码输出流（可为 None）
+        stats: 统计信息
+
+    Returns:
+        StreamStats: 更新后的统计信息
+    """
+    for lines, ids, reasons in results:
+        valid_lines, invalid_lines = [], []
+        for line, id_number, reason in zip(lines, ids, reasons):
+            if reason:
+                invalid_lines.append(f"{line}\t{'; '.join(reason_messages(reason))}\n")
+            else:
+                valid_lines.append(id_number + '\n')
+
+        stats.total += len(lines)
+        stats.valid += len(valid_lines)
+        stats.invalid += len(invalid_lines)
+
+        if valid_out is not None:
+            valid_out.writelines(valid_lines)
+        if invalid_out is not None:
+            invalid_out.writelines(invalid_lines)
+    return stats
+
+
+def open_input(path: str) -> TextIO:
+    """打开输入文件，'-' 表示标准输入"""
+    if path == '-':
+        return sys.stdin
+    return open(path, 'r', encoding='utf-8', errors='replace', buffering=BUFFER_SIZE)
+
+
+def open_output(path: Optional[str]) -> Optional[TextIO]:
+    """打开带缓冲的输出文件，'-' 表示标准输出，None 表示不输出"""
+    if path is None:
+        return None
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', encoding='utf-8', buffering=BUFFER_SIZE)
+
+
+def close_streams(*streams: Optional[TextIO]) -> None:
+    """关闭由 open_input / open_output 打开的文件（标准输入输出除外）"""
+    for stream in streams:
+        if stream is not None and stream not in (sys.stdin, sys.stdout):
+            stream.close()
+
+
+def validate_file(input_path: str, valid_out: Optional[str] = None, invalid_out: Optional[str] = None,
+                  chunk_size: int = 65536, validator: Optional[ChineseIDValidator] = None) -> StreamStats:
+    """
+    流式验证文件中的身份证号码（每行一个）
+
+    Args:
+        input_path: 输入文件路径，'-' 表示标准输入
+        valid_out: 合法号码输出文件路径，'-' 表示标准输出
+        invalid_out: 不合法号码输出文件路径，'-' 表示标准输出
+        chunk_size: 每批处理的记录数
+        validator: 验证器实例，默认新建一个；整个文件使用开始时的参考日期
+
+    Returns:
+        StreamStats: 统计信息
+    """
+    if validator is None:
+        validator = ChineseIDValidator()
+    validator = validator.pinned()
+    stats = StreamStats()
+
+    source = open_input(input_path)
+    valid_stream = open_output(valid_out)
+    invalid_stream = open_output(invalid_out)
+    try:
+        chunks = chunked(read_lines(source, stats), chunk_size)
+        write_results(validate_chunks(chunks, validator), valid_stream, invalid_stream, stats)
+    finally:
+        close_streams(source, valid_stream, invalid_stream)
+    return stats.finish()
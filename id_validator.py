@@ -13,8 +13,165 @@ Chinese ID Card Validator
 """
 
 import re
+import time
 import datetime
-from typing import Dict, Tuple, Optional
+from collections.abc import Mapping
+from operator import mul
+from typing import Dict, List, Tuple, Optional
+
+from id_areas import AreaIndex, area_index
+from id_dates import BirthDateTable, birth_date_table
+from id_normalize import normalize
+
+
+# 错误原因位掩码（批量接口按位返回，顺序与 validate() 中 errors 的顺序一致）
+REASON_FORMAT = 0x1
+REASON_AREA = 0x2
+REASON_DATE = 0x4
+REASON_CHECKSUM = 0x8
+
+REASON_MESSAGES = (
+    (REASON_FORMAT, '身份证号码格式不正确'),
+    (REASON_AREA, '地区代码不存在'),
+    (REASON_DATE, '出生日期不合法'),
+    (REASON_CHECKSUM, '校验码不正确'),
+)
+
+
+# 前17位必须是数字，最后一位可以是数字或X（不区分大小写）
+_FORMAT_PATTERN = re.compile(r'\d{17}[\dXx]')
+
+
+def reason_messages(reasons: int) -> List[str]:
+    """
+    将错误原因位掩码转换为错误信息列表
+    
+    Args:
+        reasons: 错误原因位掩码
+        
+    Returns:
+        List[str]: 错误信息列表，顺序与 validate() 返回的 errors 一致
+    """
+    return [message for bit, message in REASON_MESSAGES if reasons & bit]
+
+
+class ValidationResult(Mapping):
+    """
+    验证结果
+    
+    只保存规范化后的号码、错误原因位掩码和出生日期序数，地区、出生日期、年龄、性别
+    在访问时才计算。同时实现只读映射接口，兼容原来的字典结果：
+    result['valid']、result['errors']、result['info']['area'] 等写法保持不变。
+    """
+    
+    __slots__ = ('id_number', 'original_input', 'reasons', '_ordinal', '_as_of', '_validator')
+    
+    _KEYS = ('valid', 'id_number', 'original_input', 'errors', 'info')
+    
+    def __init__(self, validator: 'ChineseIDValidator', original_input: str, id_number: str,
+                 reasons: int, ordinal: int = 0, as_of: Optional[datetime.date] = None):
+        """
+        Args:
+            validator: 生成该结果的验证器（提供地区名称）
+            original_input: 原始输入
+            id_number: 规范化后的号码
+            reasons: 错误原因位掩码，0 表示有效
+            ordinal: 出生日期序数，0 表示出生日期无效
+            as_of: 验证时使用的参考日期（计算年龄），出生日期无效时可以省略
+        """
+        self._validator = validator
+        self.original_input = original_input
+        self.id_number = id_number
+        self.reasons = reasons
+        self._ordinal = ordinal
+        self._as_of = as_of
+    
+    @property
+    def valid(self) -> bool:
+        """是否有效"""
+        return not self.reasons
+    
+    @property
+    def errors(self) -> List[str]:
+        """错误信息列表"""
+        return reason_messages(self.reasons)
+    
+    @property
+    def area(self) -> Optional[str]:
+        """地区名称，如“北京市东城区”（地区代码无效或格式错误时为 None）"""
+        if self.reasons & (REASON_FORMAT | REASON_AREA):
+            return None
+        return self._validator.area_name(self.id_number[:6])
+    
+    @property
+    def province(self) -> Optional[str]:
+        """省级名称"""
+        return self._division()[0]
+    
+    @property
+    def city(self) -> Optional[str]:
+        """地级名称"""
+        return self._division()[1]
+    
+    @property
+    def county(self) -> Optional[str]:
+        """县级名称"""
+        return self._division()[2]
+    
+    def _division(self) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        if self.reasons & (REASON_FORMAT | REASON_AREA):
+            return None, None, None
+        return self._validator.describe_area(self.id_number[:6])
+    
+    @property
+    def birth_date(self) -> Optional[datetime.date]:
+        """出生日期（无效时为 None）"""
+        return datetime.date.fromordinal(self._ordinal) if self._ordinal else None
+    
+    @property
+    def age(self) -> Optional[int]:
+        """年龄（出生日期无效时为 None）"""
+        return self._validator._calculate_age(self.birth_date, self._as_of) if self._ordinal else None
+    
+    @property
+    def gender(self) -> Optional[str]:
+        """性别（格式错误时为 None）"""
+        if self.reasons & REASON_FORMAT:
+            return None
+        return '男' if int(self.id_number[16]) % 2 == 1 else '女'
+    
+    @property
+    def info(self) -> Dict:
+        """详细信息字典，键与原字典结果一致"""
+        info = {}
+        if self.reasons & REASON_FORMAT:
+            return info
+        if not self.reasons & REASON_AREA:
+            info['area'] = self.area
+        if self._ordinal:
+            birth_date = self.birth_date
+            info['birth_date'] = birth_date.strftime('%Y-%m-%d')
+            info['age'] = self._validator._calculate_age(birth_date, self._as_of)
+        info['gender'] = self.gender
+        return info
+    
+    def __getitem__(self, key: str):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __iter__(self):
+        return iter(self._KEYS)
+    
+    def __len__(self) -> int:
+        return len(self._KEYS)
+    
+    def to_dict(self) -> Dict:
+        """转换为普通字典（与原 validate() 返回值相同）"""
+        return {key: self[key] for key in self._KEYS}
+    
+    def __repr__(self) -> str:
+        return f'ValidationResult(id_number={self.id_number!r}, valid={self.valid}, reasons={self.reasons})'
 
 
 class ChineseIDValidator:
@@ -23,10 +180,20 @@ class ChineseIDValidator:
     # 校验码权重数组
     WEIGHTS = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
     
+    # 17个字符 '0' 的加权和，用于直接对字节值加权求和
+    _ZERO_WEIGHT = ord('0') * sum(WEIGHTS)
+    
     # 校验码对应表
     CHECK_CODES = ['1', '0', 'X', '9', '8', '7', '6', '5', '4', '3', '2']
     
-    # 地区代码映射表（部分主要地区）
+    # 地区代码检查方式：只检查两位省级代码、检查完整的六位行政区划代码（含历史代码），
+    # 或要求六位代码在出生年份有效
+    AREA_CHECK_PROVINCE = 'province'
+    AREA_CHECK_COUNTY = 'county'
+    AREA_CHECK_EFFECTIVE = 'effective'
+    AREA_CHECKS = (AREA_CHECK_PROVINCE, AREA_CHECK_COUNTY, AREA_CHECK_EFFECTIVE)
+    
+    # 省级地区代码映射表（完整的六位代码表见 id_areas）
     AREA_CODES = {
         '11': '北京市', '12': '天津市', '13': '河北省', '14': '山西省', '15': '内蒙古自治区',
         '21': '辽宁省', '22': '吉林省', '23': '黑龙江省',
@@ -37,11 +204,27 @@ class ChineseIDValidator:
         '71': '台湾省', '81': '香港特别行政区', '82': '澳门特别行政区'
     }
     
-    def __init__(self):
-        """初始化验证器"""
-        pass
+    def __init__(self, area_check: str = AREA_CHECK_COUNTY, as_of: Optional[datetime.date] = None):
+        """
+        初始化验证器
+        
+        Args:
+            area_check: 地区代码检查方式，'county'（默认）检查完整的六位行政区划代码（含历史代码），
+                'effective' 要求六位代码在出生年份有效，'province' 只检查两位省级代码
+            as_of: 参考日期（判断未来日期、计算年龄），指定后固定不变，便于重跑得到相同结果；
+                默认使用当天日期，跨过午夜后自动切换
+        """
+        if area_check not in self.AREA_CHECKS:
+            raise ValueError(f'不支持的地区代码检查方式: {area_check}')
+        self.area_check = area_check
+        self.fixed_as_of = as_of
+        # (出生日期查找表, 失效时间戳)，整体替换，多线程下不会读到不匹配的一对
+        if as_of is None:
+            self._date_state = (None, 0.0)
+        else:
+            self._date_state = (birth_date_table(as_of), float('inf'))
     
-    def validate(self, id_number: str) -> Dict:
+    def validate(self, id_number: str) -> ValidationResult:
         """
         验证身份证号码
         
@@ -49,54 +232,122 @@ class ChineseIDValidator:
             id_number: 身份证号码字符串
             
         Returns:
-            Dict: 验证结果，包含是否有效、错误信息、详细信息等
+            ValidationResult: 验证结果（兼容字典访问），包含是否有效、错误信息、详细信息等
         """
-        # 去除首尾和中间的所有空格
+        # 去除空白、连字符和零宽字符，全角数字转为 ASCII、x 转为大写
         original_id = id_number
-        id_number = id_number.replace(' ', '').strip() if id_number else ''
-        
-        result = {
-            'valid': False,
-            'id_number': id_number,
-            'original_input': original_id,
-            'errors': [],
-            'info': {}
-        }
+        id_number = normalize(id_number)
         
         # 基本格式检查
         if not self._check_format(id_number):
-            result['errors'].append('身份证号码格式不正确')
-            return result
+            return ValidationResult(self, original_id, id_number, REASON_FORMAT)
+        
+        reasons = 0
+        
+        # 出生日期检查（只查表，出生日期、年龄在访问结果时按同一参考日期计算）
+        dates = self.birth_date_table()
+        ordinal = dates.lookup(id_number[6:14])
         
         # 地区代码检查
-        area_code = id_number[:2]
-        if not self._check_area_code(area_code):
-            result['errors'].append('地区代码不存在')
-        else:
-            result['info']['area'] = self.AREA_CODES.get(area_code, '未知地区')
+        if not self._check_area(id_number, ordinal):
+            reasons |= REASON_AREA
         
-        # 出生日期检查
-        birth_date_str = id_number[6:14]
-        birth_date, birth_valid = self._check_birth_date(birth_date_str)
-        if not birth_valid:
-            result['errors'].append('出生日期不合法')
-        else:
-            result['info']['birth_date'] = birth_date.strftime('%Y-%m-%d')
-            result['info']['age'] = self._calculate_age(birth_date)
+        if not ordinal:
+            reasons |= REASON_DATE
         
         # 校验码检查
         if not self._check_verification_code(id_number):
-            result['errors'].append('校验码不正确')
+            reasons |= REASON_CHECKSUM
         
-        # 性别信息
-        sequence_code = int(id_number[16])
-        result['info']['gender'] = '男' if sequence_code % 2 == 1 else '女'
+        return ValidationResult(self, original_id, id_number, reasons, ordinal, dates.as_of)
+    
+    def reason_code(self, id_number: str) -> int:
+        """
+        计算错误原因位掩码（不构建结果对象和错误信息）
         
-        # 如果没有错误，则验证通过
-        if not result['errors']:
-            result['valid'] = True
+        Args:
+            id_number: 身份证号码字符串
+            
+        Returns:
+            int: 错误原因位掩码（REASON_FORMAT / REASON_AREA / REASON_DATE / REASON_CHECKSUM），0 表示有效
+        """
+        id_number = normalize(id_number)
+        if not self._check_format(id_number):
+            return REASON_FORMAT
         
-        return result
+        reasons = 0
+        ordinal = self.birth_date_table().lookup(id_number[6:14])
+        if not self._check_area(id_number, ordinal):
+            reasons |= REASON_AREA
+        if not ordinal:
+            reasons |= REASON_DATE
+        if not self._check_verification_code(id_number):
+            reasons |= REASON_CHECKSUM
+        return reasons
+    
+    def is_valid(self, id_number: str) -> bool:
+        """
+        判断身份证号码是否有效（遇到第一个错误即返回）
+        
+        Args:
+            id_number: 身份证号码字符串
+            
+        Returns:
+            bool: 是否有效
+        """
+        id_number = normalize(id_number)
+        if not self._check_format(id_number):
+            return False
+        ordinal = self.birth_date_table().lookup(id_number[6:14])
+        return (ordinal != 0
+                and self._check_area(id_number, ordinal)
+                and self._check_verification_code(id_number))
+    
+    def validate_many(self, ids):
+        """
+        批量验证身份证号码（需要 numpy）
+        
+        Args:
+            ids: 身份证号码字符串序列
+            
+        Returns:
+            id_batch.BatchResult: 规范化后的号码、是否有效的布尔掩码以及每条记录的错误原因位掩码
+        """
+        from id_batch import validate_many
+        return validate_many(ids, self)
+    
+    def birth_date_table(self) -> BirthDateTable:
+        """
+        获取参考日期的出生日期查找表（未指定 as_of 时跨过午夜后自动切换到新的一天）
+        
+        批量接口每批只调用一次，同一批记录使用同一个参考日期。
+        
+        Returns:
+            BirthDateTable: 出生日期查找表，参考日期为其 as_of 属性
+        """
+        table, expires = self._date_state
+        now = time.time()
+        if now >= expires:
+            today = datetime.date.fromtimestamp(now)
+            table = birth_date_table(today)
+            self._date_state = (table, time.mktime((today + datetime.timedelta(days=1)).timetuple()))
+        return table
+    
+    @property
+    def as_of(self) -> datetime.date:
+        """当前参考日期"""
+        return self.birth_date_table().as_of
+    
+    def pinned(self) -> 'ChineseIDValidator':
+        """
+        返回参考日期固定为当前参考日期的验证器（用于跨越午夜的长任务，保证前后结果一致）
+        
+        Returns:
+            ChineseIDValidator: 地区代码检查方式相同、参考日期固定的验证器；已经固定时返回自身
+        """
+        if self.fixed_as_of is not None:
+            return self
+        return ChineseIDValidator(self.area_check, self.as_of)
     
     def _check_format(self, id_number: str) -> bool:
         """
@@ -111,21 +362,76 @@ class ChineseIDValidator:
         if not id_number or len(id_number) != 18:
             return False
         
-        # 前17位必须是数字，最后一位可以是数字或X
-        pattern = r'^\d{17}[\dX]$'
-        return bool(re.match(pattern, id_number.upper()))
+        # 规范化后的输入绝大多数是 ASCII，按字节判断（bytes.isdigit 比 str.isdigit 快），不必运行正则
+        if id_number.isascii():
+            data = id_number.encode('ascii')
+            return data.isdigit() or (id_number[17] in 'Xx' and data[:17].isdigit())
+        return _FORMAT_PATTERN.fullmatch(id_number) is not None
     
-    def _check_area_code(self, area_code: str) -> bool:
+    def _check_area(self, id_number: str, ordinal: int) -> bool:
+        """
+        检查号码中的地区代码（按出生年份检查时，出生日期无效则只检查代码是否存在过）
+        
+        Args:
+            id_number: 格式正确的身份证号码
+            ordinal: 出生日期序数，0 表示出生日期无效
+            
+        Returns:
+            bool: 地区代码是否有效
+        """
+        if ordinal and self.area_check == self.AREA_CHECK_EFFECTIVE:
+            return self._check_area_code(id_number[:6], int(id_number[6:10]))
+        return self._check_area_code(id_number[:6])
+    
+    def _check_area_code(self, area_code: str, birth_year: Optional[int] = None) -> bool:
         """
         检查地区代码是否有效
         
         Args:
-            area_code: 地区代码
+            area_code: 六位地址码（只检查省级代码时也可以只传前两位）
+            birth_year: 出生年份，按出生年份检查时要求代码在该年份有效
             
         Returns:
             bool: 地区代码是否有效
         """
-        return area_code in self.AREA_CODES
+        if self.area_check == self.AREA_CHECK_PROVINCE:
+            return area_code[:2] in self.AREA_CODES
+        if birth_year is not None and self.area_check == self.AREA_CHECK_EFFECTIVE:
+            return self.area_index.in_force(area_code, birth_year)
+        return self.area_index.contains(area_code)
+    
+    @property
+    def area_index(self) -> AreaIndex:
+        """完整的六位行政区划代码索引（首次访问时加载）"""
+        return area_index()
+    
+    def area_name(self, area_code: str) -> str:
+        """
+        地区名称
+        
+        Args:
+            area_code: 六位地址码
+            
+        Returns:
+            str: 检查六位代码时为“省+地+县”的完整名称，只检查省级代码时为省级名称
+        """
+        if self.area_check == self.AREA_CHECK_PROVINCE:
+            return self.AREA_CODES.get(area_code[:2], '未知地区')
+        return self.area_index.full_name(area_code) or '未知地区'
+    
+    def describe_area(self, area_code: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """
+        省、地、县三级名称
+        
+        Args:
+            area_code: 六位地址码
+            
+        Returns:
+            Tuple[Optional[str], Optional[str], Optional[str]]: (省, 地, 县)，只检查省级代码时地、县为 None
+        """
+        if self.area_check == self.AREA_CHECK_PROVINCE:
+            return self.AREA_CODES.get(area_code[:2]), None, None
+        return self.area_index.describe(area_code)
     
     def _check_birth_date(self, birth_date_str: str) -> Tuple[Optional[datetime.date], bool]:
         """
@@ -137,26 +443,11 @@ class ChineseIDValidator:
         Returns:
             Tuple[Optional[datetime.date], bool]: (日期对象, 是否有效)
         """
-        try:
-            year = int(birth_date_str[:4])
-            month = int(birth_date_str[4:6])
-            day = int(birth_date_str[6:8])
-            
-            # 检查年份范围（1900-当前年份）
-            current_year = datetime.date.today().year
-            if year < 1900 or year > current_year:
-                return None, False
-            
-            birth_date = datetime.date(year, month, day)
-            
-            # 检查日期是否在未来
-            if birth_date > datetime.date.today():
-                return None, False
-                
-            return birth_date, True
-            
-        except ValueError:
+        # 查表得到日序数：0 表示日期不存在、早于1900年或晚于今天
+        ordinal = self.birth_date_table().lookup(birth_date_str)
+        if not ordinal:
             return None, False
+        return datetime.date.fromordinal(ordinal), True
     
     def _check_verification_code(self, id_number: str) -> bool:
         """
@@ -168,8 +459,14 @@ class ChineseIDValidator:
         Returns:
             bool: 校验码是否正确
         """
-        expected_code = self.generate_check_code(id_number[:17])
-        return id_number[17].upper() == expected_code
+        if id_number.isascii():
+            # ASCII 数字直接按字节值加权求和，避免逐位 int()
+            total = sum(map(mul, self.WEIGHTS, id_number.encode('ascii'))) - self._ZERO_WEIGHT
+        else:
+            total = sum(map(mul, self.WEIGHTS, map(int, id_number[:17])))
+        expected_code = self.CHECK_CODES[total % 11]
+        last = id_number[17]
+        return last == expected_code or (last == 'x' and expected_code == 'X')
     
     def generate_check_code(self, id_17: str) -> str:
         """
@@ -191,17 +488,18 @@ class ChineseIDValidator:
         remainder = total % 11
         return self.CHECK_CODES[remainder]
     
-    def _calculate_age(self, birth_date: datetime.date) -> int:
+    def _calculate_age(self, birth_date: datetime.date, as_of: Optional[datetime.date] = None) -> int:
         """
         计算年龄
         
         Args:
             birth_date: 出生日期
+            as_of: 参考日期，默认为验证器的当前参考日期
             
         Returns:
             int: 年龄
         """
-        today = datetime.date.today()
+        today = as_of or self.as_of
         age = today.year - birth_date.year
         
         # 如果今年的生日还没到，年龄减1
@@ -211,8 +509,8 @@ class ChineseIDValidator:
         return age
 
 
-def main():
-    """主函数，用于演示和测试"""
+def run_demo():
+    """运行内置测试用例演示"""
     validator = ChineseIDValidator()
     
     # 测试用例
@@ -248,5 +546,155 @@ def main():
                 print(f"  错误: {error}")
 
 
+def main(argv=None):
+    """
+    命令行入口
+    
+    用法:
+        python -m id_validator                       # 运行内置演示
+        python -m id_validator validate big.txt --valid-out ok.txt --invalid-out bad.txt
+        python -m id_validator extract app.log -o found.tsv
+        python -m id_validator redact app.log -o app.redacted.log
+        python -m id_validator scan /data/exports -o report.jsonl --resume
+        python -m id_validator csv users.csv -o checked.csv --column 身份证号
+    """
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog='python -m id_validator', description='中国身份证号码验证器')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    validate_parser = subparsers.add_parser('validate', help='流式验证文件中的身份证号码（每行一个）')
+    validate_parser.add_argument('input', help="输入文件路径，'-' 表示标准输入")
+    validate_parser.add_argument('--valid-out', help='合法号码输出文件（每行一个规范化后的号码）')
+    validate_parser.add_argument('--invalid-out', help='不合法号码输出文件（原始输入与错误信息，制表符分隔）')
+    validate_parser.add_argument('--chunk-size', type=int, default=65536, help='每批处理的记录数（决定内存上限）')
+    validate_parser.add_argument('--workers', type=int, default=1, help='工作进程数，大于1时按分片并行验证')
+    validate_parser.add_argument('--unordered', action='store_true', help='并行模式下按完成顺序写出结果（更快）')
+    validate_parser.add_argument('--as-of', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                                 help='参考日期（判断未来日期、计算年龄），默认为开始运行的当天')
+    
+    extract_parser = subparsers.add_parser('extract', help='从任意文本（日志、聊天记录等）中提取有效的身份证号码')
+    extract_parser.add_argument('input', help="输入文件路径，'-' 表示标准输入")
+    extract_parser.add_argument('-o', '--output', default='-', help="输出文件（每行“字节偏移<TAB>号码”），默认为标准输出")
+    extract_parser.add_argument('--as-of', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                                help='参考日期（判断未来日期），默认为开始运行的当天')
+    
+    redact_parser = subparsers.add_parser('redact', help='把文本中的有效身份证号码替换为掩码或令牌，其余内容原样输出')
+    redact_parser.add_argument('input', help="输入文件路径，'-' 表示标准输入")
+    redact_parser.add_argument('-o', '--output', default='-', help="输出文件路径，默认为标准输出")
+    redact_parser.add_argument('--keep-head', type=int, default=6, help='掩码保留的前几位')
+    redact_parser.add_argument('--keep-tail', type=int, default=4, help='掩码保留的后几位')
+    redact_parser.add_argument('--mask-char', default='*', help='掩码字符')
+    redact_parser.add_argument('--token-key-file', help='改为替换成 HMAC-SHA256 令牌，密钥从该文件读取')
+    redact_parser.add_argument('--as-of', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                               help='参考日期（判断未来日期），默认为开始运行的当天')
+    
+    scan_parser = subparsers.add_parser('scan', help='多进程扫描目录树中的文件，按文件写出号码个数和偏移')
+    scan_parser.add_argument('root', help='要扫描的目录')
+    scan_parser.add_argument('-o', '--report', required=True, help='报告文件（JSON Lines，每个文件一行）')
+    scan_parser.add_argument('--workers', type=int, default=None, help='工作进程数，默认为 CPU 核数')
+    scan_parser.add_argument('--resume', action='store_true', help='从已有的报告继续，跳过已完成且没有变化的文件')
+    scan_parser.add_argument('--ext', nargs='+', default=['.txt', '.csv', '.json'], help='扫描的文件扩展名')
+    scan_parser.add_argument('--piece-size', type=int, default=8, help='大文件切段和小文件合并的大小（MB）')
+    scan_parser.add_argument('--as-of', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                             help='参考日期（判断未来日期），默认为开始运行的当天')
+    
+    csv_parser = subparsers.add_parser('csv', help='验证 CSV 文件中的号码列，追加结果列，其余各列原样输出')
+    csv_parser.add_argument('input', help="输入文件路径，'-' 表示标准输入")
+    csv_parser.add_argument('-o', '--output', default='-', help='输出文件路径，默认为标准输出')
+    csv_parser.add_argument('--column', default='0', help='号码列的列名或从0开始的列序号（默认第一列）')
+    csv_parser.add_argument('--no-header', action='store_true', help='第一行不是表头（只能按列序号指定号码列）')
+    csv_parser.add_argument('--delimiter', default=',', help='分隔符')
+    csv_parser.add_argument('--encoding', help='输入输出的编码（如 gbk），默认为 UTF-8，输入带 BOM 时输出也带 BOM')
+    csv_parser.add_argument('--chunk-size', type=int, default=4096, help='每批处理的行数（决定内存上限）')
+    csv_parser.add_argument('--as-of', type=datetime.date.fromisoformat, metavar='YYYY-MM-DD',
+                            help='参考日期（判断未来日期），默认为开始运行的当天')
+    
+    args = parser.parse_args(argv)
+    
+    if args.command == 'csv':
+        import sys
+        from id_csv import validate_csv
+        
+        try:
+            stats = validate_csv(args.input, args.output, args.column, not args.no_header, args.delimiter,
+                                 args.encoding, args.chunk_size, ChineseIDValidator(as_of=args.as_of))
+        except ValueError as e:
+            print(f'错误: {e}', file=sys.stderr)
+            return 2
+        print(stats.summary(), file=sys.stderr)
+        return 0
+    
+    if args.command == 'scan':
+        import sys
+        from id_scan import scan_tree
+        
+        extensions = [ext if ext.startswith('.') else '.' + ext for ext in args.ext]
+        try:
+            stats = scan_tree(args.root, args.report, args.workers, args.resume, extensions, args.piece_size << 20,
+                              ChineseIDValidator(as_of=args.as_of),
+                              progress=lambda stats: print(stats.progress(), file=sys.stderr, flush=True))
+        except NotADirectoryError as e:
+            print(f'错误: {e}', file=sys.stderr)
+            return 2
+        print(stats.summary(), file=sys.stderr)
+        return 0
+    
+    if args.command == 'redact':
+        import sys
+        from id_redact import keyed_token, masker, redact_file
+        
+        try:
+            if args.token_key_file:
+                with open(args.token_key_file, 'rb') as f:
+                    replace = keyed_token(f.read().strip())
+            else:
+                replace = masker(args.keep_head, args.keep_tail, args.mask_char)
+        except ValueError as e:
+            print(f'错误: {e}', file=sys.stderr)
+            return 2
+        stats = redact_file(args.input, args.output, replace, ChineseIDValidator(as_of=args.as_of))
+        print(stats.summary(), file=sys.stderr)
+        return 0
+    
+    if args.command == 'extract':
+        import sys
+        from id_extract import extract_file
+        
+        stats = extract_file(args.input, args.output, ChineseIDValidator(as_of=args.as_of))
+        print(stats.summary(), file=sys.stderr)
+        return 0
+    
+    if args.command == 'validate':
+        import sys
+        
+        # 整个任务使用同一个参考日期
+        validator = ChineseIDValidator(as_of=args.as_of).pinned()
+        if args.workers > 1 and args.input != '-':
+            from id_parallel import validate_file_parallel
+            stats = validate_file_parallel(args.input, args.valid_out, args.invalid_out, workers=args.workers,
+                                           ordered=not args.unordered, chunk_size=args.chunk_size,
+                                           validator=validator)
+        else:
+            stats = None
+            if args.input != '-':
+                # 每行一个18位号码的定长文件直接在内存映射的字节上验证
+                try:
+                    from id_mmap import validate_file_mmap
+                except ImportError:
+                    pass
+                else:
+                    stats = validate_file_mmap(args.input, args.valid_out, args.invalid_out, validator)
+            if stats is None:
+                from id_stream import validate_file
+                stats = validate_file(args.input, args.valid_out, args.invalid_out, chunk_size=args.chunk_size,
+                                      validator=validator)
+        print(stats.summary(), file=sys.stderr)
+        return 0
+    
+    run_demo()
+    return 0
+
+
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    raise SystemExit(main())
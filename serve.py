@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 生产环境 Web 服务
+Chinese ID Card Validator - Pre-fork Production Server
+
+主进程加载 Web 应用和全部查找表（行政区划代码索引、出生日期查找表、批量验证引擎的数组表）后，
+fork 出多个工作进程共享同一个监听套接字；查找表所在的内存页在工作进程之间写时复制共享，
+每个工作进程不必各自加载一份。工作进程异常退出时主进程会重新启动一个。
+
+信号（发给主进程）：
+    SIGTERM / SIGINT  平滑停止：工作进程不再接受新连接，处理完正在进行的请求后退出
+    SIGHUP            平滑重启：主进程重新执行自身（进程号不变，重新加载代码和查找表，继承监听套接字），
+                      启动新的工作进程后让旧的工作进程平滑退出；新代码无法导入时放弃重启，继续服务
+
+用法:
+    python serve.py [--host 127.0.0.1] [--port 8000] [--workers N] [--graceful-timeout 30]
+
+注意：后台任务（/jobs）、结果缓存和准入控制的状态保存在各工作进程内，
+使用 /jobs 时请用 --workers 1，或者在前端代理按任务编号固定转发到同一个工作进程。
+"""
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Set
+
+# 平滑停止时等待正在处理的请求的最长秒数
+GRACEFUL_TIMEOUT = 30
+
+# 工作进程启动后这么多秒内退出视为启动失败，重新启动前先等待，避免反复 fork
+MIN_WORKER_LIFETIME = 1.0
+
+# 平滑重启时，重新执行的主进程通过环境变量得到继承的监听套接字和需要停止的旧工作进程
+ENV_LISTEN_FD = 'ID_SERVE_LISTEN_FD'
+ENV_OLD_WORKERS = 'ID_SERVE_OLD_WORKERS'
+
+
+def _log(message: str) -> None:
+    print(f'[serve {os.getpid()}] {message}', file=sys.stderr, flush=True)
+
+
+def load_app(pool_workers: int = 0, preload: bool = True):
+    """
+    加载 Web 应用
+
+    Args:
+        pool_workers: 每个工作进程的验证进程池大小（0 表示不使用，多个工作进程本身已经并行）
+        preload: 是否预先加载全部查找表
+
+    Returns:
+        Flask: Web 应用
+    """
+    import web_ui
+
+    web_ui.POOL_WORKERS = pool_workers
+    if preload:
+        validator = web_ui.validator
+        validator.area_index
+        validator.birth_date_table()
+        validator.validate('11010519491231002X')
+        try:
+            from id_batch import area_table, validate_many
+        except ImportError:
+            pass
+        else:
+            area_table(validator)
+            validate_many(['11010519491231002X'] * 16, validator)
+        # 已加载的对象不再参与垃圾回收扫描：回收时改写对象头会让共享的内存页被复制
+        gc.collect()
+        gc.freeze()
+    return web_ui.app
+
+
+class _InFlight:
+    """统计正在处理的请求数的 WSGI 中间件，平滑停止时用来等待请求处理完"""
+
+    def __init__(self, app):
+        self.app = app
+        self.count = 0
+        self._idle = threading.Condition()
+
+    def __call__(self, environ, start_response):
+        from werkzeug.wsgi import ClosingIterator
+
+        with self._idle:
+            self.count += 1
+        try:
+            return ClosingIterator(self.app(environ, start_response), self._done)
+        except BaseException:
+            self._done()
+            raise
+
+    def _done(self):
+        with self._idle:
+            self.count -= 1
+            if not self.count:
+                self._idle.notify_all()
+
+    def wait_idle(self, timeout: float) -> bool:
+        """等待正在处理的请求全部完成，超时返回 False"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self.count == 0, timeout)
+
+
+def run_worker(listener: socket.socket, app, pool_workers: int, graceful_timeout: float, quiet: bool) -> None:
+    """工作进程：在继承的监听套接字上处理请求，收到 SIGTERM 后平滑退出"""
+    import logging
+    from werkzeug.serving import make_server
+
+    if quiet:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    # Ctrl+C 会发给整个进程组，由主进程统一处理
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+
+    if app is None:
+        app = load_app(pool_workers, preload=False)
+    inflight = _InFlight(app)
+    host, port = listener.getsockname()[:2]
+    server = make_server(host, port, inflight, threaded=True, fd=listener.fileno())
+    # 多个工作进程同时被新连接唤醒时只有一个能 accept() 成功，其余的不能阻塞在 accept() 上
+    # （否则收不到停止请求）；非阻塞的监听套接字 accept() 失败时直接回到 serve_forever 的循环
+    server.socket.setblocking(False)
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        if not stopping.is_set():
+            stopping.set()
+            # shutdown() 等待 serve_forever() 返回，不能在同一个线程中调用
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    server.serve_forever()
+    if not inflight.wait_idle(graceful_timeout):
+        _log(f'仍有 {inflight.count} 个请求未完成，强制退出')
+
+
+class Master:
+    """主进程：维护固定数量的工作进程，处理停止和重启信号"""
+
+    def __init__(self, listener: socket.socket, app, workers: int, pool_workers: int = 0,
+                 graceful_timeout: float = GRACEFUL_TIMEOUT, quiet: bool = False):
+        """
+        Args:
+            listener: 已经开始监听的套接字
+            app: 预先加载的 Web 应用，None 表示由每个工作进程各自加载
+            workers: 工作进程数
+            pool_workers: 每个工作进程的验证进程池大小（不预先加载时使用）
+            graceful_timeout: 平滑停止时等待请求完成的最长秒数
+            quiet: 是否关闭逐条请求日志
+        """
+        self.listener = listener
+        self.app = app
+        self.worker_count = workers
+        self.pool_workers = pool_workers
+        self.graceful_timeout = graceful_timeout
+        self.quiet = quiet
+        self.workers: Dict[int, float] = {}     # pid -> 启动时间
+        self.retiring: Set[int] = set()          # 平滑重启前的旧工作进程
+        self._stopping = False
+        self._reload = False
+
+    def spawn(self) -> int:
+        """fork 一个工作进程"""
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                run_worker(self.listener, self.app, self.pool_workers, self.graceful_timeout, self.quiet)
+                code = 0
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        return pid
+
+    def run(self, old_workers: Iterable[int] = ()) -> None:
+        """
+        启动工作进程并一直运行到收到停止信号
+
+        Args:
+            old_workers: 平滑重启前的工作进程，新的工作进程启动后让它们平滑退出
+        """
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+
+        for _ in range(self.worker_count):
+            self.spawn()
+        host, port = self.listener.getsockname()[:2]
+        _log(f'{self.worker_count} 个工作进程已启动，监听 http://{host}:{port}')
+        # 平滑重启：新的工作进程已经在同一个套接字上接受连接，旧的处理完正在进行的请求后退出
+        for pid in old_workers:
+            self.retiring.add(pid)
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.retiring.discard(pid)
+
+        while not self._stopping:
+            self._reap(respawn=True)
+            if self._reload:
+                self._reload = False
+                self._reexec()
+            time.sleep(0.2)
+        self._shutdown()
+
+    def _on_stop(self, signum, frame) -> None:
+        self._stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self._reload = True
+
+    def _reap(self, respawn: bool) -> None:
+        """回收已退出的工作进程，需要时补足数量"""
+        while self.workers or self.retiring:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.retiring.discard(pid)
+            started = self.workers.pop(pid, None)
+            if started is None or not respawn or self._stopping:
+                continue
+            _log(f'工作进程 {pid} 意外退出（状态 {status}），重新启动')
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+    def _reexec(self) -> None:
+        """重新执行主进程（进程号不变），监听套接字和现有工作进程交给新的主进程"""
+        # 先确认新代码可以导入，否则放弃重启，继续用现有的工作进程服务
+        check = subprocess.run([sys.executable, '-c', 'import serve, web_ui'],
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        if check.returncode != 0:
+            _log('平滑重启失败：新代码无法导入，继续使用当前版本')
+            return
+        _log('平滑重启：重新加载代码和查找表')
+        fd = self.listener.fileno()
+        os.set_inheritable(fd, True)
+        os.environ[ENV_LISTEN_FD] = str(fd)
+        os.environ[ENV_OLD_WORKERS] = ','.join(map(str, [*self.workers, *self.retiring]))
+        sys.stderr.flush()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    def _shutdown(self) -> None:
+        """平滑停止全部工作进程，超时后强制结束"""
+        _log('正在停止工作进程')
+        for pid in [*self.workers, *self.retiring]:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while (self.workers or self.retiring) and time.monotonic() < deadline:
+            self._reap(respawn=False)
+            time.sleep(0.1)
+        for pid in [*self.workers, *self.retiring]:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self._reap(respawn=False)
+        _log('已停止')
+
+
+def open_listener(host: str, port: int) -> socket.socket:
+    """创建监听套接字；平滑重启时改为使用重新执行前的套接字"""
+    inherited = os.environ.pop(ENV_LISTEN_FD, None)
+    if inherited:
+        return socket.socket(fileno=int(inherited))
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    return socket.create_server((host, port), family=family, backlog=1024)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='身份证验证器 Web 服务（多进程生产环境）')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8000, help='监听端口')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='工作进程数（默认为 CPU 核数）')
+    parser.add_argument('--graceful-timeout', type=float, default=GRACEFUL_TIMEOUT,
+                        help='停止时等待正在处理的请求的最长秒数')
+    parser.add_argument('--pool-workers', type=int, default=0,
+                        help='每个工作进程的大批量验证进程池大小（默认不使用）')
+    parser.add_argument('--no-preload', action='store_true',
+                        help='不在主进程中预先加载，由每个工作进程各自加载应用和查找表')
+    parser.add_argument('--quiet', action='store_true', help='不输出逐条请求日志')
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, 'fork'):
+        parser.error('需要支持 fork 的操作系统（Linux / macOS）')
+
+    start = time.perf_counter()
+    listener = open_listener(args.host, args.port)
+    app = None if args.no_preload else load_app(args.pool_workers)
+    if app is not None:
+        _log(f'应用和查找表已加载（{time.perf_counter() - start:.2f}s）')
+    old_workers = os.environ.pop(ENV_OLD_WORKERS, '')
+    Master(listener, app, args.workers, args.pool_workers, args.graceful_timeout, args.quiet).run(
+        [int(pid) for pid in old_workers.split(',') if pid])
+
+
+if __name__ == '__main__':
+    main()
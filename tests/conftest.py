@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""测试使用仓库根目录下的模块（与 python -m id_validator 相同的导入方式）"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""id_redact 掩码参数检查"""
+
+import pytest
+
+from id_redact import masker, redact_chunks
+from id_validator import main
+
+ID_NUMBER = '11010519491231002X'
+
+
+def test_masker_keeps_length():
+    replace = masker(6, 4, '#')
+    assert replace(ID_NUMBER) == '110105########002X'
+    assert b''.join(redact_chunks([f'id={ID_NUMBER}\n'.encode()], replace)) == b'id=110105########002X\n'
+
+
+@pytest.mark.parametrize('mask_char', ['●', '##', ''])
+def test_masker_rejects_non_ascii_or_multi_char(mask_char):
+    with pytest.raises(ValueError):
+        masker(mask_char=mask_char)
+
+
+@pytest.mark.parametrize('mask_char', ['●', '##'])
+def test_cli_rejects_mask_char_before_writing(tmp_path, capsys, mask_char):
+    source = tmp_path / 'app.log'
+    source.write_text(f'user {ID_NUMBER} login\n', encoding='utf-8')
+    target = tmp_path / 'app.redacted.log'
+    target.write_text('previous\n', encoding='utf-8')
+
+    assert main(['redact', str(source), '-o', str(target), '--mask-char', mask_char]) == 2
+    assert '掩码字符' in capsys.readouterr().err
+    assert target.read_text(encoding='utf-8') == 'previous\n'
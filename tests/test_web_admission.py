@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""/jobs 和 /validate/stream 的准入控制"""
+
+import json
+import time
+
+import pytest
+
+import web_ui
+from id_admission import REJECT_QUEUE_FULL, AdmissionController
+
+IDS = ['11010519491231002X', '110101199003074899', '440524188001010014', '11010519491231002Y']
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    """容量为4条、不排队的准入控制器"""
+    controller = AdmissionController(max_active_ids=4, max_queued_ids=0, max_wait=0.1)
+    monkeypatch.setattr(web_ui, 'admission', controller)
+    return controller
+
+
+@pytest.fixture
+def client():
+    return web_ui.app.test_client()
+
+
+def _wait_idle(controller, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while controller.metrics()['active_ids'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return controller.metrics()['active_ids'] == 0
+
+
+def test_jobs_rejected_when_capacity_is_taken(admission, client):
+    admission.acquire('other', 4)
+    try:
+        response = client.post('/jobs', json={'input_text': '\n'.join(IDS[:2])})
+    finally:
+        admission.release(4)
+    assert response.status_code == 429
+    assert response.headers['Retry-After']
+    assert response.get_json()['reason'] == REJECT_QUEUE_FULL
+
+
+def test_jobs_hold_capacity_until_finished(admission, client):
+    response = client.post('/jobs', json={'input_text': '\n'.join(IDS)})
+    assert response.status_code == 202
+    assert admission.metrics()['admitted'] == 1
+    assert _wait_idle(admission)
+    status = client.get(response.get_json()['status_url']).get_json()
+    assert status['processed'] == len(IDS)
+
+
+def test_stream_rejected_before_first_batch(admission, client):
+    admission.acquire('other', 4)
+    try:
+        response = client.post('/validate/stream', data='\n'.join(IDS), content_type='text/plain')
+    finally:
+        admission.release(4)
+    assert response.status_code == 429
+    assert response.headers['Retry-After']
+
+
+class _AdmitFirst(AdmissionController):
+    """只准入第一批"""
+
+    def acquire(self, client, cost):
+        if self.admitted:
+            self._reject(REJECT_QUEUE_FULL, cost)
+        super().acquire(client, cost)
+
+
+def test_stream_ends_when_a_later_batch_is_rejected(monkeypatch, client):
+    controller = _AdmitFirst(max_active_ids=4, max_queued_ids=0, max_wait=0.1)
+    monkeypatch.setattr(web_ui, 'admission', controller)
+    monkeypatch.setattr(web_ui, 'STREAM_FLUSH_LINES', 2)
+
+    response = client.post('/validate/stream', data='\n'.join(IDS), content_type='text/plain')
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    results, last = records[:-1], records[-1]
+    assert results and len(results) < len(IDS)
+    assert [record['line'] for record in results] == list(range(1, len(results) + 1))
+    assert last['reason'] == REJECT_QUEUE_FULL and last['retry_after'] >= 1
+    assert last['next_line'] == len(results) + 1
+    assert last['summary']['total'] == len(results)
+    assert controller.metrics()['active_ids'] == 0
+
+
+def test_stream_admits_every_batch(admission, monkeypatch, client):
+    monkeypatch.setattr(web_ui, 'STREAM_FLUSH_LINES', 2)
+    response = client.post('/validate/stream', data='\n'.join(IDS), content_type='text/plain')
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    valid_count = sum(web_ui.validator.validate(id_number).valid for id_number in IDS)
+    assert records[-1] == {'summary': {'total': 4, 'valid_count': valid_count, 'invalid_count': 4 - valid_count}}
+    assert admission.metrics()['admitted'] >= 2
+    assert admission.metrics()['active_ids'] == 0
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 准入控制
+Chinese ID Card Validator - Admission Control
+
+按号码条数限制同时进行的批量验证：正在验证的号码总数不超过 max_active_ids，
+其余请求在有界的等待队列中排队，队列已满或等待超时时立即拒绝（Web 服务返回 429 和 Retry-After）。
+有空闲容量时优先放行最近验证号码最少的客户端；队列已满时，用量较少的客户端的请求
+可以挤掉用量最多的客户端最晚排队的请求。按号码条数而不是请求次数分配，
+一个客户端持续提交的大批量不会挤占其他客户端。
+"""
+
+import itertools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterator, List
+
+
+# 拒绝原因
+REJECT_QUEUE_FULL = 'queue_full'
+REJECT_TIMEOUT = 'timeout'
+REJECT_PREEMPTED = 'preempted'
+
+
+class Rejected(Exception):
+    """请求未被准入"""
+
+    def __init__(self, reason: str, retry_after: int):
+        """
+        Args:
+            reason: 拒绝原因（REJECT_QUEUE_FULL / REJECT_TIMEOUT / REJECT_PREEMPTED）
+            retry_after: 建议的重试等待秒数
+        """
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('client', 'cost', 'seq', 'admitted', 'preempted')
+
+    def __init__(self, client, cost, seq):
+        self.client = client
+        self.cost = cost
+        self.seq = seq
+        self.admitted = False
+        self.preempted = False
+
+
+class AdmissionController:
+    """按号码条数的准入控制器（线程安全）"""
+
+    def __init__(self, max_active_ids: int = 100000, max_queued_ids: int = 500000, max_wait: float = 10.0,
+                 usage_half_life: float = 30.0):
+        """
+        Args:
+            max_active_ids: 同时验证的号码总数上限（超过上限的单个请求在没有其他请求时单独放行）
+            max_queued_ids: 等待队列中的号码总数上限，超过时立即拒绝
+            max_wait: 在队列中最多等待的秒数
+            usage_half_life: 客户端用量的半衰期（秒），用量越少越优先
+        """
+        self.max_active_ids = max_active_ids
+        self.max_queued_ids = max_queued_ids
+        self.max_wait = max_wait
+        self.usage_half_life = usage_half_life
+        self._condition = threading.Condition()
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._usage: Dict[Hashable, tuple] = {}     # 客户端 -> (用量, 更新时间)
+        self._completed: deque = deque()           # 最近完成的 (时间, 号码数)，估算吞吐量
+        self._completed_ids = 0
+        self.active_ids = 0
+        self.active_requests = 0
+        self.queued_ids = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {REJECT_QUEUE_FULL: 0, REJECT_TIMEOUT: 0, REJECT_PREEMPTED: 0}
+        self.rejected_ids = 0
+
+    @contextmanager
+    def admit(self, client: Hashable, cost: int) -> Iterator[None]:
+        """
+        在准入后执行 with 语句块，结束时释放容量
+
+        Args:
+            client: 客户端标识
+            cost: 请求的号码条数
+
+        Raises:
+            Rejected: 队列已满或等待超时
+        """
+        self.acquire(client, cost)
+        try:
+            yield
+        finally:
+            self.release(cost)
+
+    def acquire(self, client: Hashable, cost: int) -> None:
+        """等待准入（与 release 成对调用）；未准入时抛出 Rejected"""
+        with self._condition:
+            if not self._waiters and self._fits(cost):
+                self._start(client, cost)
+                return
+            if self.queued_ids + cost > self.max_queued_ids and not self._preempt(client, cost):
+                self._reject(REJECT_QUEUE_FULL, cost)
+
+            # 先排队再按用量放行：用量较少的客户端在剩余容量够用时可以越过排队中的大批量
+            waiter = _Waiter(client, cost, next(self._seq))
+            self._waiters.append(waiter)
+            self.queued_ids += cost
+            self._dispatch()
+            deadline = time.monotonic() + self.max_wait
+            while not waiter.admitted:
+                if waiter.preempted:
+                    self._reject(REJECT_PREEMPTED, cost)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._waiters.remove(waiter)
+                    self.queued_ids -= cost
+                    # 队首的大请求超时离开后，后面的请求可能已经可以放行
+                    self._dispatch()
+                    self._reject(REJECT_TIMEOUT, cost)
+                self._condition.wait(remaining)
+
+    def release(self, cost: int) -> None:
+        """释放 acquire 占用的容量，并放行等待中的请求"""
+        with self._condition:
+            self.active_ids -= cost
+            self.active_requests -= 1
+            self._completed.append((time.monotonic(), cost))
+            self._completed_ids += cost
+            self._throughput()
+            self._dispatch()
+
+    def metrics(self) -> Dict:
+        """队列深度、在途量和拒绝次数"""
+        with self._condition:
+            return {
+                'active_requests': self.active_requests,
+                'active_ids': self.active_ids,
+                'queued_requests': len(self._waiters),
+                'queued_ids': self.queued_ids,
+                'admitted': self.admitted,
+                'rejected': dict(self.rejected),
+                'rejected_ids': self.rejected_ids,
+                'ids_per_second': round(self._throughput(), 1),
+                'max_active_ids': self.max_active_ids,
+                'max_queued_ids': self.max_queued_ids,
+                'max_wait': self.max_wait,
+            }
+
+    def _fits(self, cost: int) -> bool:
+        return self.active_ids + cost <= self.max_active_ids or self.active_requests == 0
+
+    def _start(self, client, cost) -> None:
+        """记录放行（调用方持有锁）"""
+        self.active_ids += cost
+        self.active_requests += 1
+        self.admitted += 1
+        self._usage[client] = (self._client_usage(client) + cost, time.monotonic())
+
+    def _client_usage(self, client) -> float:
+        """按半衰期衰减后的客户端用量（调用方持有锁）"""
+        usage, updated = self._usage.get(client, (0.0, 0.0))
+        return usage * 0.5 ** ((time.monotonic() - updated) / self.usage_half_life)
+
+    def _dispatch(self) -> None:
+        """按客户端用量从少到多放行等待中的请求，直到容量用完（调用方持有锁）"""
+        dispatched = False
+        while self._waiters:
+            waiter = min(self._waiters, key=lambda w: (self._client_usage(w.client), w.seq))
+            if not self._fits(waiter.cost):
+                break
+            self._waiters.remove(waiter)
+            self.queued_ids -= waiter.cost
+            waiter.admitted = True
+            self._start(waiter.client, waiter.cost)
+            dispatched = True
+        if dispatched:
+            self._condition.notify_all()
+        # 长时间不活跃的客户端不再保留用量
+        if len(self._usage) > 4096:
+            self._usage = {client: value for client, value in self._usage.items()
+                           if self._client_usage(client) >= 1}
+
+    def _preempt(self, client, cost: int) -> bool:
+        """
+        队列已满时，从用量比 client 多的客户端中，按用量从多到少、排队从晚到早挤出请求，
+        腾出 cost 条的位置（调用方持有锁）
+
+        Returns:
+            bool: 是否腾出了足够的位置（不够时不挤出任何请求）
+        """
+        usage = self._client_usage(client)
+        candidates = [(self._client_usage(waiter.client), waiter.seq, waiter) for waiter in self._waiters]
+        candidates = sorted((item for item in candidates if item[0] > usage), key=lambda item: item[:2], reverse=True)
+        needed = self.queued_ids + cost - self.max_queued_ids
+        victims = []
+        for _, _, waiter in candidates:
+            if needed <= 0:
+                break
+            victims.append(waiter)
+            needed -= waiter.cost
+        if needed > 0:
+            return False
+        for waiter in victims:
+            self._waiters.remove(waiter)
+            self.queued_ids -= waiter.cost
+            waiter.preempted = True
+        self._condition.notify_all()
+        return True
+
+    def _throughput(self, window: float = 10.0) -> float:
+        """最近 window 秒内每秒完成的号码数（调用方持有锁）"""
+        now = time.monotonic()
+        while self._completed and now - self._completed[0][0] > window:
+            self._completed_ids -= self._completed.popleft()[1]
+        return self._completed_ids / window
+
+    def _reject(self, reason: str, cost: int) -> None:
+        """记录拒绝并抛出 Rejected，重试时间按当前积压量和吞吐量估算（调用方持有锁）"""
+        self.rejected[reason] += 1
+        self.rejected_ids += cost
+        throughput = self._throughput()
+        backlog = self.active_ids + self.queued_ids
+        retry_after = math.ceil(backlog / throughput) if throughput else 1
+        raise Rejected(reason, min(max(retry_after, 1), 60))
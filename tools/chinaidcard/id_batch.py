@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 批量验证引擎
+Chinese ID Card Validator - Vectorized Batch Engine
+
+基于 numpy 的批量验证：将输入转换为 N×18 的字节矩阵，
+用一次矩阵-向量乘法计算校验码，用数组查表检查地区代码和出生日期。
+结果与逐条调用 ChineseIDValidator.validate() 完全一致。
+"""
+
+import datetime
+from functools import lru_cache, partial
+from typing import Callable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from id_validator import (
+    ChineseIDValidator, REASON_FORMAT, REASON_AREA, REASON_DATE, REASON_CHECKSUM,
+    reason_messages,
+)
+from id_normalize import normalize_many
+from id_areas import LEGACY_SUFFIXES, PROVINCE_ONLY, YEAR_BITS, AreaIndex
+from id_dates import FIRST_YEAR, YEAR_SLOTS, BirthDateTable
+
+
+_WEIGHTS = np.array(ChineseIDValidator.WEIGHTS, dtype=np.int32)
+
+# 前六位数字 -> 六位地址码
+_AREA_WEIGHTS = np.array([100000, 10000, 1000, 100, 10, 1], dtype=np.int32)
+
+# 第7~14位数字 -> YYYYMMDD 整数
+_DATE_WEIGHTS = np.array([10000000, 1000000, 100000, 10000, 1000, 100, 10, 1], dtype=np.int32)
+
+_PROVINCE_ONLY = np.array([int(code) for code in PROVINCE_ONLY], dtype=np.int32)
+
+# 余数 -> 校验码字节
+_CHECK_BYTES = np.frombuffer(''.join(ChineseIDValidator.CHECK_CODES).encode('ascii'), dtype=np.uint8)
+
+
+class BatchResult(NamedTuple):
+    """批量验证结果"""
+
+    ids: List[str]           # 规范化后的身份证号码（见 id_normalize.normalize）
+    valid: np.ndarray        # 是否有效，bool 数组，形状 (N,)
+    reasons: np.ndarray      # 错误原因位掩码，uint8 数组，形状 (N,)
+    birth_dates: np.ndarray  # 出生日期 YYYYMMDD，int32 数组，出生日期无效的记录为 0
+    as_of: datetime.date     # 本批次使用的参考日期
+
+    def errors(self, index: int) -> List[str]:
+        """返回第 index 条记录的错误信息列表（与 validate() 的 errors 一致）"""
+        return reason_messages(int(self.reasons[index]))
+
+    def ages(self) -> np.ndarray:
+        """每条记录在参考日期的周岁年龄，int16 数组，出生日期无效的记录为 -1"""
+        return ages(self.birth_dates, self.as_of)
+
+
+def ages(birth_dates: np.ndarray, as_of: datetime.date) -> np.ndarray:
+    """
+    向量化计算周岁年龄（与 ChineseIDValidator._calculate_age 一致）
+
+    Args:
+        birth_dates: YYYYMMDD 整数数组，0 表示出生日期无效
+        as_of: 参考日期
+
+    Returns:
+        np.ndarray: int16 年龄数组，出生日期无效的位置为 -1
+    """
+    birth_dates = np.asarray(birth_dates, dtype=np.int32)
+    # 今年的生日还没到时减1
+    age = as_of.year - birth_dates // 10000 - (birth_dates % 10000 > as_of.month * 100 + as_of.day)
+    return np.where(birth_dates > 0, age, -1).astype(np.int16)
+
+
+def area_table(validator: ChineseIDValidator) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    """
+    构建批量地区代码检查函数
+
+    Args:
+        validator: 验证器实例
+
+    Returns:
+        Callable: check(codes, years) -> bool 数组。codes 为六位地址码数组，
+            years 为出生年份数组（出生日期无效时为 -1，此时只检查代码是否存在过）
+    """
+    if validator.area_check == validator.AREA_CHECK_PROVINCE:
+        table = np.zeros(100, dtype=bool)
+        for code in validator.AREA_CODES:
+            if len(code) == 2 and code.isdigit():
+                table[int(code)] = True
+        return lambda codes, years: table[codes // 10000]
+
+    exists = _bitmap_table(validator.area_index)
+    if validator.area_check == validator.AREA_CHECK_COUNTY:
+        return lambda codes, years: exists[codes]
+    return partial(_check_in_force, exists, *_interval_table(validator.area_index))
+
+
+@lru_cache(maxsize=2)
+def _bitmap_table(index: AreaIndex) -> np.ndarray:
+    """将行政区划位图展开为按六位代码下标的布尔数组"""
+    return np.unpackbits(np.frombuffer(index.bitmap, dtype=np.uint8), bitorder='little').view(bool)
+
+
+@lru_cache(maxsize=2)
+def _interval_table(index: AreaIndex) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    区间索引的数组形式：排序后的六位代码，以及年份位掩码的低64位和高64位
+
+    代码表中未收录的“××××01”等市辖区代码按 AreaIndex.year_mask 的规则展开为独立条目。
+    """
+    masks = dict(index.year_masks)
+    for code in index.year_masks:
+        if code[4:] == '00' and code[2:4] != '00' and code[:2] not in PROVINCE_ONLY:
+            for suffix in LEGACY_SUFFIXES:
+                masks.setdefault(code[:4] + suffix, index.year_mask(code[:4] + suffix))
+    codes = sorted(masks)
+    low = (1 << 64) - 1
+    return (np.array([int(code) for code in codes], dtype=np.int32),
+            np.array([masks[code] & low for code in codes], dtype=np.uint64),
+            np.array([masks[code] >> 64 for code in codes], dtype=np.uint64))
+
+
+def _check_in_force(exists: np.ndarray, sorted_codes: np.ndarray, low: np.ndarray, high: np.ndarray,
+                    codes: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """按出生年份检查地址码（与 AreaIndex.in_force 的规则一致）"""
+    ever = exists[codes]
+    # 台湾、香港、澳门沿用省级代码的年份
+    province_only = np.isin(codes // 10000, _PROVINCE_ONLY)
+    lookup = np.where(province_only, codes // 10000 * 10000, codes)
+
+    position = np.minimum(np.searchsorted(sorted_codes, lookup), len(sorted_codes) - 1)
+    found = sorted_codes[position] == lookup
+    bit = np.clip(years - FIRST_YEAR, 0, YEAR_BITS - 1).astype(np.uint64)
+    low_bit = (low[position] >> np.minimum(bit, 63)) & 1
+    high_bit = (high[position] >> (np.maximum(bit, 64) - 64)) & 1
+    in_force = ever & found & (np.where(bit < 64, low_bit, high_bit) == 1)
+    return np.where(years >= 0, in_force, ever)
+
+
+def date_ordinals(dates: BirthDateTable) -> np.ndarray:
+    """出生日期查找表的 numpy 视图（零拷贝）"""
+    return np.frombuffer(dates.ordinals, dtype=np.int32)
+
+
+def check_matrix(chars: np.ndarray, area_ok: Callable[[np.ndarray, np.ndarray], np.ndarray],
+                 dates: BirthDateTable) -> np.ndarray:
+    """
+    对 N×18 的 ASCII 字节矩阵进行向量化验证
+
+    Args:
+        chars: uint8 数组，形状 (N, 18)，每行为一个已规范化的身份证号码
+        area_ok: 地区代码检查函数（见 area_table）
+        dates: 出生日期查找表
+
+    Returns:
+        np.ndarray: uint8 错误原因位掩码数组，形状 (N,)
+    """
+    body = chars[:, :17]
+    last = chars[:, 17]
+
+    # 格式检查：前17位是数字，最后一位是数字或X（不区分大小写）
+    last_upper = np.where(last == ord('x'), np.uint8(ord('X')), last)
+    last_is_digit = (last >= ord('0')) & (last <= ord('9'))
+    format_ok = ((body >= ord('0')) & (body <= ord('9'))).all(axis=1) & (last_is_digit | (last_upper == ord('X')))
+
+    digits = body.astype(np.int32) - ord('0')
+
+    # 出生日期检查
+    year = digits[:, 6] * 1000 + digits[:, 7] * 100 + digits[:, 8] * 10 + digits[:, 9]
+    month = digits[:, 10] * 10 + digits[:, 11]
+    day = digits[:, 12] * 10 + digits[:, 13]
+    in_range = (year >= FIRST_YEAR) & (year <= dates.last_year) & (month >= 1) & (month <= 12) & (day >= 1) & (day <= 31)
+    slot = np.where(in_range, (year - FIRST_YEAR) * YEAR_SLOTS + (month - 1) * 31 + day - 1, 0)
+    date_valid = in_range & (date_ordinals(dates)[slot] != 0)
+
+    # 地区代码检查
+    area = np.where(format_ok, digits[:, :6] @ _AREA_WEIGHTS, 0)
+    area_valid = area_ok(area, np.where(date_valid, year, -1))
+
+    # 校验码检查：一次矩阵-向量乘法
+    remainder = (digits @ _WEIGHTS) % 11
+    checksum_valid = _CHECK_BYTES[np.where(format_ok, remainder, 0)] == last_upper
+
+    reasons = np.zeros(len(chars), dtype=np.uint8)
+    reasons |= np.where(area_valid, 0, REASON_AREA).astype(np.uint8)
+    reasons |= np.where(date_valid, 0, REASON_DATE).astype(np.uint8)
+    reasons |= np.where(checksum_valid, 0, REASON_CHECKSUM).astype(np.uint8)
+    # 格式不正确时只报告格式错误
+    reasons[~format_ok] = REASON_FORMAT
+    return reasons
+
+
+def validate_many(ids: Sequence[str], validator: Optional[ChineseIDValidator] = None) -> BatchResult:
+    """
+    批量验证身份证号码
+
+    Args:
+        ids: 身份证号码字符串序列
+        validator: 验证器实例（提供地区代码和出生日期查找表，并处理非ASCII输入），默认新建一个
+
+    Returns:
+        BatchResult: 规范化后的号码、是否有效的布尔掩码、每条记录的错误原因位掩码和出生日期
+    """
+    if validator is None:
+        validator = ChineseIDValidator()
+    # 整批固定使用同一个参考日期，跨过午夜时同一批的结果也一致
+    validator = validator.pinned()
+    dates = validator.birth_date_table()
+
+    normalized = normalize_many(ids)
+    reasons = np.full(len(normalized), REASON_FORMAT, dtype=np.uint8)
+    birth_dates = np.zeros(len(normalized), dtype=np.int32)
+
+    ascii_rows = []
+    for index, id_number in enumerate(normalized):
+        if len(id_number) != 18:
+            continue
+        if id_number.isascii():
+            ascii_rows.append(index)
+        else:
+            # 全角数字等非ASCII输入交给逐条验证，保证结果一致
+            reasons[index] = validator.validate(id_number).reasons
+            if not reasons[index] & (REASON_FORMAT | REASON_DATE):
+                birth_dates[index] = int(id_number[6:14])
+
+    if ascii_rows:
+        buffer = ''.join([normalized[index] for index in ascii_rows]).encode('ascii')
+        chars = np.frombuffer(buffer, dtype=np.uint8).reshape(-1, 18)
+        ascii_reasons = check_matrix(chars, area_table(validator), dates)
+        reasons[ascii_rows] = ascii_reasons
+        date_known = (ascii_reasons & (REASON_FORMAT | REASON_DATE)) == 0
+        birth_dates[ascii_rows] = np.where(date_known, (chars[:, 6:14].astype(np.int32) - ord('0')) @ _DATE_WEIGHTS, 0)
+
+    return BatchResult(normalized, reasons == 0, reasons, birth_dates, dates.as_of)
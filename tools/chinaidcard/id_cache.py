@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 验证结果缓存
+Chinese ID Card Validator - LRU Result Cache
+
+线程安全的 LRU 缓存，按条数上限和存活时间淘汰，并统计命中率。
+用于缓存与参考日期无关的验证结果（错误原因、地区名称、出生日期、性别），年龄在命中时按当前参考日期重新计算。
+"""
+
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, NamedTuple, Optional
+
+from id_validator import REASON_DATE, ValidationResult
+
+
+class CachedResult(NamedTuple):
+    """验证结果中与参考日期无关的部分"""
+
+    id_number: str                  # 规范化后的号码
+    reasons: int                    # 错误原因位掩码
+    area: Optional[str]             # 地区名称（有效时）
+    birth_date: Optional[str]       # 出生日期 YYYY-MM-DD（有效时）
+    birth: int                      # 出生日期 YYYYMMDD 整数（有效时，否则为 0）
+    gender: Optional[str]           # 性别（有效时）
+    as_of: datetime.date            # 计算时的参考日期（出生日期无效的结果只在同一参考日期内使用）
+
+    @classmethod
+    def from_result(cls, result: ValidationResult, as_of: datetime.date) -> 'CachedResult':
+        """从验证结果中取出需要缓存的部分"""
+        if result.reasons:
+            return cls(result.id_number, result.reasons, None, None, 0, None, as_of)
+        info = result.info
+        return cls(result.id_number, 0, info['area'], info['birth_date'], int(result.id_number[6:14]),
+                   info['gender'], as_of)
+
+    def age(self, as_of: datetime.date) -> int:
+        """在参考日期 as_of 的周岁年龄（与 ChineseIDValidator._calculate_age 一致）"""
+        age = as_of.year - self.birth // 10000
+        # 今年的生日还没到时减1
+        if self.birth % 10000 > as_of.month * 100 + as_of.day:
+            age -= 1
+        return age
+
+    def usable(self, as_of: datetime.date) -> bool:
+        """
+        在参考日期 as_of 下是否仍然可用
+
+        有效的结果以后一直有效；出生日期无效（可能只是晚于当时的参考日期）的结果只在同一参考日期内使用。
+        """
+        return not self.reasons & REASON_DATE or self.as_of == as_of
+
+
+class LRUCache:
+    """按条数上限和存活时间淘汰的线程安全 LRU 缓存"""
+
+    def __init__(self, maxsize: int = 100000, ttl: Optional[float] = 3600):
+        """
+        Args:
+            maxsize: 最多保存的条数
+            ttl: 每条的存活秒数，None 表示不过期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Any:
+        """
+        查询缓存
+
+        Args:
+            key: 键
+
+        Returns:
+            Any: 缓存的值，不存在或已过期时为 None
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires = item
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """写入缓存，超出条数上限时淘汰最久未使用的条目"""
+        expires = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """清空缓存（不清零统计）"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict:
+        """命中率等统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
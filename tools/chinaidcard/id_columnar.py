@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 列式结果格式
+Chinese ID Card Validator - Columnar Result Encoding
+
+把批量验证结果按列存放：每个字段一个数组，不再为每条结果重复字段名；
+地区和性别做字典编码（列中只存字典下标），出生日期存为整数序数
+（datetime.date.toordinal()），错误原因存为位掩码。
+可以序列化为紧凑的 JSON，或者在安装了 msgpack 时序列化为 MessagePack。
+
+格式：
+    {
+      "format": "columnar",
+      "total": 3, "valid_count": 2, "invalid_count": 1,
+      "dictionaries": {"area": [...], "gender": [...], "reasons": [[1, "身份证号码格式不正确"], ...]},
+      "valid": {"original": [...], "processed": [...], "area": [...], "birth_date": [...],
+                "age": [...], "gender": [...]},
+      "invalid": {"original": [...], "processed": [...], "reasons": [...]}
+    }
+original 列中与 processed 相同的输入（不含空格的输入）存为 null。
+"""
+
+import datetime
+import json
+from typing import Dict, List, Optional
+
+from id_cache import CachedResult
+from id_validator import REASON_MESSAGES
+
+try:
+    import msgpack
+except ImportError:  # 未安装 msgpack 时只支持 JSON
+    msgpack = None
+
+
+COLUMNAR_FORMAT = 'columnar'
+
+# 是否支持 MessagePack
+MSGPACK_AVAILABLE = msgpack is not None
+
+
+class ColumnarEncoder:
+    """逐条追加验证结果，按列保存"""
+
+    def __init__(self):
+        self.areas: List[str] = []
+        self.genders: List[str] = []
+        self._area_codes: Dict[str, int] = {}
+        self._gender_codes: Dict[str, int] = {}
+        self._ordinals: Dict[int, int] = {}
+        self.valid: Dict[str, list] = {
+            'original': [], 'processed': [], 'area': [], 'birth_date': [], 'age': [], 'gender': []
+        }
+        self.invalid: Dict[str, list] = {'original': [], 'processed': [], 'reasons': []}
+
+    def add(self, original_input: str, cached: CachedResult, as_of: datetime.date) -> None:
+        """
+        追加一条结果
+
+        Args:
+            original_input: 原始输入
+            cached: 与参考日期无关的验证结果
+            as_of: 计算年龄的参考日期
+        """
+        original = None if original_input == cached.id_number else original_input
+        if cached.reasons:
+            columns = self.invalid
+            columns['original'].append(original)
+            columns['processed'].append(cached.id_number)
+            columns['reasons'].append(cached.reasons)
+            return
+
+        columns = self.valid
+        columns['original'].append(original)
+        columns['processed'].append(cached.id_number)
+        columns['area'].append(self._code(cached.area, self.areas, self._area_codes))
+        ordinal = self._ordinals.get(cached.birth)
+        if ordinal is None:
+            birth = cached.birth
+            ordinal = datetime.date(birth // 10000, birth // 100 % 100, birth % 100).toordinal()
+            self._ordinals[birth] = ordinal
+        columns['birth_date'].append(ordinal)
+        columns['age'].append(cached.age(as_of))
+        columns['gender'].append(self._code(cached.gender, self.genders, self._gender_codes))
+
+    def extend(self, other: 'ColumnarEncoder') -> None:
+        """追加另一个编码器中的全部结果（字典下标按本编码器的字典重新映射）"""
+        area_map = [self._code(area, self.areas, self._area_codes) for area in other.areas]
+        gender_map = [self._code(gender, self.genders, self._gender_codes) for gender in other.genders]
+        for name, values in other.valid.items():
+            if name == 'area':
+                values = [area_map[code] for code in values]
+            elif name == 'gender':
+                values = [gender_map[code] for code in values]
+            self.valid[name].extend(values)
+        for name, values in other.invalid.items():
+            self.invalid[name].extend(values)
+
+    def to_dict(self) -> Dict:
+        """生成列式结果"""
+        valid_count = len(self.valid['processed'])
+        invalid_count = len(self.invalid['processed'])
+        return {
+            'format': COLUMNAR_FORMAT,
+            'total': valid_count + invalid_count,
+            'valid_count': valid_count,
+            'invalid_count': invalid_count,
+            'dictionaries': {
+                'area': self.areas,
+                'gender': self.genders,
+                'reasons': [[bit, message] for bit, message in REASON_MESSAGES],
+            },
+            'valid': self.valid,
+            'invalid': self.invalid,
+        }
+
+    @staticmethod
+    def _code(value: str, dictionary: List[str], codes: Dict[str, int]) -> int:
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(dictionary)
+            dictionary.append(value)
+        return code
+
+
+def dumps_json(data: Dict) -> bytes:
+    """序列化为紧凑的 UTF-8 JSON（中文不转义）"""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_msgpack(data: Dict) -> Optional[bytes]:
+    """序列化为 MessagePack，未安装 msgpack 时返回 None"""
+    if msgpack is None:
+        return None
+    return msgpack.packb(data, use_bin_type=True)
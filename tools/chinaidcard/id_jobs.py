@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 后台批量验证任务
+Chinese ID Card Validator - Background Batch Jobs
+
+进程内的任务存储：提交的批量验证在有界线程池中分块执行，调用方通过任务编号
+查询进度、分页读取结果或等待进度变化（用于服务器推送事件）。
+已完成的任务按存活时间和结果占用的内存淘汰。
+"""
+
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# 任务状态
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+# 每次处理并发布进度的行数
+JOB_CHUNK_LINES = 1000
+
+# 块处理函数：输入一批号码，返回每条的 (是否有效, 已序列化的结果 JSON)
+ChunkProcessor = Callable[[List[str]], List[Tuple[bool, str]]]
+
+
+class Job:
+    """一个批量验证任务"""
+
+    def __init__(self, lines: Sequence[str]):
+        self.id = uuid.uuid4().hex
+        self.lines = lines
+        self.total = len(lines)
+        self.status = STATUS_QUEUED
+        self.processed = 0
+        self.valid_count = 0
+        self.error: Optional[str] = None
+        self.results: List[str] = []   # 已序列化的结果 JSON，顺序与输入一致
+        self.result_bytes = 0
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.changed = threading.Condition()
+
+    def progress(self) -> Dict:
+        """进度快照"""
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'processed': self.processed,
+            'valid_count': self.valid_count,
+            'invalid_count': self.processed - self.valid_count,
+            'error': self.error,
+        }
+
+    def page(self, offset: int, limit: int) -> List[str]:
+        """读取 [offset, offset + limit) 范围内已完成的结果"""
+        return self.results[offset:offset + limit]
+
+    def wait_for_change(self, processed: int, status: str, timeout: float) -> None:
+        """
+        等待进度或状态发生变化
+
+        Args:
+            processed: 调用方上次看到的已处理条数
+            status: 调用方上次看到的状态
+            timeout: 最长等待秒数
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: self.processed != processed or self.status != status, timeout)
+
+    def _publish(self, **updates) -> None:
+        with self.changed:
+            for name, value in updates.items():
+                setattr(self, name, value)
+            self.changed.notify_all()
+
+
+class JobStore:
+    """
+    进程内任务存储
+
+    任务在最多 workers 个线程中执行；已完成的任务超过 max_age 秒，
+    或所有任务结果的总大小超过 max_bytes 时，从最早完成的任务开始淘汰。
+    """
+
+    def __init__(self, workers: int = 2, max_age: float = 3600, max_bytes: int = 256 << 20,
+                 chunk_lines: int = JOB_CHUNK_LINES):
+        """
+        Args:
+            workers: 工作线程数
+            max_age: 已完成任务的保留秒数
+            max_bytes: 所有任务结果的内存上限（字节，按结果 JSON 的长度估算）
+            chunk_lines: 每次处理并发布进度的行数
+        """
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.chunk_lines = chunk_lines
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='id-job')
+
+    def submit(self, lines: Sequence[str], process: ChunkProcessor,
+               on_finish: Optional[Callable[[], None]] = None) -> Job:
+        """
+        提交任务
+
+        Args:
+            lines: 要验证的号码（已去除空行）
+            process: 块处理函数
+            on_finish: 任务结束（完成或失败）后调用，例如释放准入控制占用的容量
+
+        Returns:
+            Job: 新建的任务
+        """
+        job = Job(lines)
+        with self._lock:
+            self._evict()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, process, on_finish)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """按编号查找任务，不存在或已淘汰时返回 None"""
+        with self._lock:
+            self._evict()
+            return self._jobs.get(job_id)
+
+    def result_bytes(self) -> int:
+        """当前保存的结果总大小（字节）"""
+        with self._lock:
+            return sum(job.result_bytes for job in self._jobs.values())
+
+    def shutdown(self) -> None:
+        """停止工作线程（等待正在执行的任务完成）"""
+        self._executor.shutdown(wait=True)
+
+    def _run(self, job: Job, process: ChunkProcessor, on_finish: Optional[Callable[[], None]]) -> None:
+        job._publish(status=STATUS_RUNNING)
+        try:
+            try:
+                for start in range(0, job.total, self.chunk_lines):
+                    chunk = process(list(job.lines[start:start + self.chunk_lines]))
+                    with job.changed:
+                        for valid, text in chunk:
+                            job.results.append(text)
+                            job.result_bytes += len(text)
+                            job.valid_count += valid
+                        job.processed += len(chunk)
+                        job.changed.notify_all()
+            finally:
+                # 在发布结束状态之前调用：调用方看到任务结束时，占用的资源已经释放
+                if on_finish is not None:
+                    on_finish()
+        except Exception as e:
+            job._publish(status=STATUS_FAILED, error=str(e), finished=time.time(), lines=())
+        else:
+            # 输入不再需要，只保留结果
+            job._publish(status=STATUS_DONE, finished=time.time(), lines=())
+
+    def _evict(self) -> None:
+        """淘汰过期任务，并在超出内存上限时淘汰最早完成的任务（调用方持有锁）"""
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished is not None]
+        finished.sort(key=lambda job: job.finished)
+        total_bytes = sum(job.result_bytes for job in self._jobs.values())
+        for job in finished:
+            if now - job.finished <= self.max_age and total_bytes <= self.max_bytes:
+                break
+            del self._jobs[job.id]
+            total_bytes -= job.result_bytes
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 输入规范化
+Chinese ID Card Validator - Table-driven Input Normalization
+
+用一张预先编译的 str.translate 转换表一次完成全部规范化：
+- 删除空白（空格、制表符、换行、不换行空格 NBSP、全角空格等，包括 str.strip() 会去除的全部空白字符）
+- 删除连字符和破折号（-、‐、‑、‒、–、—、―、−、－ 等）
+- 删除零宽字符（零宽空格、零宽连接符、BOM 等）
+- 全角数字转换为 ASCII 数字，小写 x 和全角 Ｘ/ｘ 转换为 X
+
+纯 ASCII 输入（绝大多数情况）改用由同一张表导出的 bytes.translate 转换表，
+每个字节一次查表，比逐字符查字典快得多。非 ASCII 输入先去掉首尾要删除的字符（零宽字符、BOM 等），
+去掉后是 ASCII 的按 ASCII 处理；只含 ASCII 和转换表中字符的，先用 NFKC 把全角数字转为 ASCII，
+同样不必逐字符查字典（结果与转换表一致）。
+"""
+
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional
+
+
+# 删除的空白字符（str.isspace() 为真的全部字符）
+_WHITESPACE = (
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680'
+    '\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000'
+)
+
+# 删除的连字符、破折号和减号（含软连字符、全角连字符）
+_DASHES = '-\xad\u2010\u2011\u2012\u2013\u2014\u2015\u2212\ufe58\ufe63\uff0d'
+
+# 删除的零宽字符（零宽空格、零宽非连接符、零宽连接符、词连接符、BOM）
+_ZERO_WIDTH = '\u200b\u200c\u200d\u2060\ufeff'
+
+
+def _build_table() -> Dict[int, Optional[str]]:
+    table: Dict[int, Optional[str]] = dict.fromkeys(map(ord, _WHITESPACE + _DASHES + _ZERO_WIDTH))
+    for digit in range(10):
+        table[0xFF10 + digit] = str(digit)      # 全角数字 ０~９
+    for char in 'x\uff38\uff58':
+        table[ord(char)] = 'X'
+    return table
+
+
+# str.translate 转换表：码位 -> 替换字符，None 表示删除
+NORMALIZE_TABLE = str.maketrans(_build_table())
+
+# 由 NORMALIZE_TABLE 导出的 ASCII 部分，供 bytes.translate 使用
+_ASCII_TABLE = bytes(ord(NORMALIZE_TABLE.get(byte) or chr(byte)) for byte in range(256))
+_ASCII_DELETE = bytes(byte for byte in range(128) if byte in NORMALIZE_TABLE and NORMALIZE_TABLE[byte] is None)
+
+# 只含 ASCII 和转换表中非 ASCII 字符的输入。NFKC 把其中的全角数字、Ｘ/ｘ 转为 ASCII，
+# 其余字符（空白、连字符、零宽字符）转为 ASCII 空白或连字符，或者仍是要删除的非 ASCII 字符
+_KNOWN_PATTERN = re.compile('[\x00-\x7f%s]*' % re.escape(''.join(chr(code) for code in NORMALIZE_TABLE if code > 0x7f)))
+
+# 全部要删除的字符：它们出现在首尾时（复制粘贴带入的零宽字符、BOM、全角空格等）用 str.strip 一次去掉
+_DELETE_CHARS = ''.join(chr(code) for code, value in NORMALIZE_TABLE.items() if value is None)
+
+# normalize_many 拼接输入时使用的分隔符（不在转换表中，也不会出现在正常输入里）
+_SEPARATOR = '\0'
+
+
+def normalize(id_number: str) -> str:
+    """
+    规范化身份证号码输入
+
+    Args:
+        id_number: 原始输入
+
+    Returns:
+        str: 删除空白、连字符和零宽字符，全角数字转为 ASCII、x 转为大写后的号码；空输入返回空字符串
+    """
+    if not id_number:
+        return ''
+    if id_number.isascii():
+        # 只含 ASCII 字母和数字（绝大多数输入）时没有要删除的字符，转换表中只有 x 需要替换。
+        # bytes.isalnum 按字节查表，比 str.isalnum 逐字符判断 Unicode 类别快一倍
+        data = id_number.encode('ascii')
+        if data.isalnum():
+            return id_number.replace('x', 'X')
+        return data.translate(_ASCII_TABLE, _ASCII_DELETE).decode('ascii')
+    id_number = id_number.strip(_DELETE_CHARS)
+    if id_number.isascii():
+        return normalize(id_number)
+    if _KNOWN_PATTERN.fullmatch(id_number) is not None:
+        # NFKC 之后剩下的非 ASCII 字符都是要删除的字符，编码时直接丢弃
+        data = unicodedata.normalize('NFKC', id_number).encode('ascii', 'ignore')
+        return data.translate(_ASCII_TABLE, _ASCII_DELETE).decode('ascii')
+    return id_number.translate(NORMALIZE_TABLE)
+
+
+def normalize_many(ids: Iterable[str]) -> List[str]:
+    """
+    批量规范化（纯 ASCII 的批次拼接后整体转换一次，再按分隔符拆开）
+
+    Args:
+        ids: 原始输入序列
+
+    Returns:
+        List[str]: 与输入一一对应的规范化结果（与逐条调用 normalize() 一致）
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+    try:
+        joined = _SEPARATOR.join(ids)
+    except TypeError:   # 含有 None 等空值
+        ids = [id_number or '' for id_number in ids]
+        joined = _SEPARATOR.join(ids)
+    # 含非 ASCII 字符时逐条转换（否则整批都要逐字符查字典）；输入本身含有分隔符时无法按分隔符拆开
+    if not joined.isascii() or joined.count(_SEPARATOR) != len(ids) - 1:
+        return [normalize(id_number) for id_number in ids]
+    data = joined.encode('ascii')
+    translated = data.translate(_ASCII_TABLE, _ASCII_DELETE)
+    # 整批都不需要改动（最常见的情况）时直接使用原字符串，不再拆分
+    if translated == data:
+        return ids
+    return translated.decode('ascii').split(_SEPARATOR)
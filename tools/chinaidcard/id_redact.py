@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+中国身份证号码验证器 - 流式脱敏
+Chinese ID Card Validator - Streaming PII Redaction
+
+在文本流经时把其中每个有效的身份证号码（判定方式与 id_extract 相同）替换为掩码
+（例如 110101********4899）或带密钥的令牌（HMAC-SHA256，同一号码得到同一令牌，可用于关联而不暴露号码），
+其余字节原样输出，行结构和编码不变（按字节处理，适用于 UTF-8、GBK 等与 ASCII 兼容的编码）。
+
+提供三种用法：
+- redact_chunks(chunks)：生成器，输入和输出都是字节块
+- RedactingReader(stream)：包装可读的二进制流，读出的是脱敏后的内容
+- RedactingWriter(stream)：包装可写的二进制流，写入的内容脱敏后再写出（适合放在日志发送程序中）
+需要文本流时用 io.TextIOWrapper 包装后两者即可。被块边界截断的号码会留到下一块处理后再输出，
+以换行符结尾的块会全部输出。
+"""
+
+import hashlib
+import hmac
+import io
+import sys
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from id_extract import CHUNK_SIZE, ExtractStats, IdScanner
+from id_stream import BUFFER_SIZE
+from id_validator import ChineseIDValidator
+
+
+# 替换函数：规范化后的号码 -> 替换文本
+Replacer = Callable[[str], str]
+
+# RedactingWriter 累积多少字节后整块脱敏写出
+WRITE_BUFFER_SIZE = 64 * 1024
+
+
+def masker(keep_head: int = 6, keep_tail: int = 4, mask_char: str = '*') -> Replacer:
+    """
+    掩码替换：保留前 keep_head 位和后 keep_tail 位，中间替换为 mask_char（长度不变）
+
+    Args:
+        keep_head: 保留的前几位（默认6位地址码）
+        keep_tail: 保留的后几位（默认顺序码和校验码）
+        mask_char: 掩码字符（单个 ASCII 字符，替换后的长度和编码兼容性才不变）
+
+    Returns:
+        Replacer: 替换函数，例如 '110101199003074899' -> '110101********4899'
+
+    Raises:
+        ValueError: 保留的位数超出范围，或 mask_char 不是单个 ASCII 字符
+    """
+    if keep_head < 0 or keep_tail < 0 or keep_head + keep_tail > 18:
+        raise ValueError('保留的位数必须在0到18之间')
+    if len(mask_char) != 1 or not mask_char.isascii():
+        raise ValueError(f'掩码字符必须是单个 ASCII 字符: {mask_char!r}')
+    middle = mask_char * (18 - keep_head - keep_tail)
+
+    def replace(id_number: str) -> str:
+        return id_number[:keep_head] + middle + id_number[18 - keep_tail:]
+
+    return replace
+
+
+def keyed_token(key: bytes, length: int = 16, prefix: str = 'ID-') -> Replacer:
+    """
+    令牌替换：prefix 加上号码的 HMAC-SHA256 的前 length 个十六进制字符
+
+    Args:
+        key: 密钥（不知道密钥无法由令牌反查号码）
+        length: 令牌的十六进制字符数（1~64）
+        prefix: 令牌前缀
+
+    Returns:
+        Replacer: 替换函数，同一密钥下同一号码总是得到同一令牌
+
+    Raises:
+        ValueError: 密钥为空、长度超出范围，或 prefix 含有非 ASCII 字符
+    """
+    if not key:
+        raise ValueError('密钥不能为空')
+    if not 1 <= length <= 64:
+        raise ValueError('令牌长度必须在1到64之间')
+    if not prefix.isascii():
+        raise ValueError(f'令牌前缀必须是 ASCII 字符: {prefix!r}')
+
+    def replace(id_number: str) -> str:
+        digest = hmac.new(key, id_number.encode('ascii'), hashlib.sha256).hexdigest()
+        return prefix + digest[:length]
+
+    return replace
+
+
+def _rewrite(segment: bytes, ids: List[Tuple[int, str]], replace: Replacer) -> bytes:
+    """把一段输入中的号码替换掉"""
+    if not ids:
+        return segment
+    parts = []
+    position = 0
+    for start, id_number in ids:
+        parts.append(segment[position:start])
+        parts.append(replace(id_number).encode('ascii'))
+        position = start + 18
+    parts.append(segment[position:])
+    return b''.join(parts)
+
+
+class _Redaction:
+    """IdScanner 加替换函数，记录统计信息"""
+
+    def __init__(self, replace: Optional[Replacer], validator: Optional[ChineseIDValidator],
+                 stats: Optional[ExtractStats]):
+        self.scanner = IdScanner(validator)
+        self.replace = replace if replace is not None else masker()
+        self.stats = stats
+
+    def feed(self, chunk: bytes, final: bool = False) -> bytes:
+        segment, ids = self.scanner.feed(chunk, final)
+        if self.stats is not None:
+            self.stats.bytes_read += len(chunk)
+            self.stats.total = self.scanner.candidates
+            self.stats.valid = self.scanner.found
+            self.stats.invalid = self.scanner.candidates - self.scanner.found
+        return _rewrite(segment, ids, self.replace)
+
+
+def redact_chunks(chunks: Iterable[bytes], replace: Optional[Replacer] = None,
+                  validator: Optional[ChineseIDValidator] = None,
+                  stats: Optional[ExtractStats] = None) -> Iterator[bytes]:
+    """
+    逐块脱敏
+
+    Args:
+        chunks: 输入字节块
+        replace: 替换函数（见 masker / keyed_token），默认 masker()
+        validator: 验证器实例，默认新建一个
+        stats: 统计信息（读取字节数、候选数和替换的号码数）
+
+    Yields:
+        bytes: 脱敏后的字节块（拼接起来即为完整输出；空块不产出）
+    """
+    redaction = _Redaction(replace, validator, stats)
+    for chunk in chunks:
+        output = redaction.feed(chunk)
+        if output:
+            yield output
+    output = redaction.feed(b'', final=True)
+    if output:
+        yield output
+
+
+def redact(data: bytes, replace: Optional[Replacer] = None,
+           validator: Optional[ChineseIDValidator] = None) -> bytes:
+    """
+    脱敏一段完整的输入
+
+    Args:
+        data: 输入字节
+        replace: 替换函数，默认 masker()
+        validator: 验证器实例，默认新建一个
+
+    Returns:
+        bytes: 脱敏后的字节
+    """
+    return _Redaction(replace, validator, None).feed(data, final=True)
+
+
+class RedactingReader(io.RawIOBase):
+    """包装可读的二进制流，读出脱敏后的内容"""
+
+    def __init__(self, raw: BinaryIO, replace: Optional[Replacer] = None,
+                 validator: Optional[ChineseIDValidator] = None, chunk_size: int = CHUNK_SIZE,
+                 stats: Optional[ExtractStats] = None):
+        """
+        Args:
+            raw: 可读的二进制流
+            replace: 替换函数，默认 masker()
+            validator: 验证器实例，默认新建一个
+            chunk_size: 每次从 raw 读取的字节数
+            stats: 统计信息
+        """
+        super().__init__()
+        self.raw = raw
+        self.chunk_size = chunk_size
+        self._redaction = _Redaction(replace, validator, stats)
+        self._buffer = b''
+        self._position = 0
+        self._eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while self._position >= len(self._buffer) and not self._eof:
+            chunk = self.raw.read(self.chunk_size)
+            self._eof = not chunk
+            self._buffer = self._redaction.feed(chunk, final=self._eof)
+            self._position = 0
+        size = min(len(b), len(self._buffer) - self._position)
+        b[:size] = self._buffer[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            super().close()
+            self.raw.close()
+
+
+class RedactingWriter(io.RawIOBase):
+    """
+    包装可写的二进制流，写入的内容脱敏后再写出
+
+    写入的内容先在缓冲区中累积，满 buffer_size 字节后整块脱敏写出（逐行写入时比逐行脱敏快得多）；
+    flush() 立即脱敏写出已写入的内容，只有末尾可能是号码开头的最多19个字节会留到之后写出
+    （以换行符结尾时全部写出）；close() 写出全部剩余内容。
+    """
+
+    def __init__(self, raw: BinaryIO, replace: Optional[Replacer] = None,
+                 validator: Optional[ChineseIDValidator] = None, stats: Optional[ExtractStats] = None,
+                 buffer_size: int = WRITE_BUFFER_SIZE, close_raw: bool = True):
+        """
+        Args:
+            raw: 可写的二进制流
+            replace: 替换函数，默认 masker()
+            validator: 验证器实例，默认新建一个
+            stats: 统计信息
+            buffer_size: 累积多少字节后脱敏写出，0 表示每次写入都立即处理
+            close_raw: close() 时是否同时关闭 raw
+        """
+        super().__init__()
+        self.raw = raw
+        self.buffer_size = buffer_size
+        self.close_raw = close_raw
+        self._redaction = _Redaction(replace, validator, stats)
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        if self.closed:
+            raise ValueError('write to closed file')
+        data = bytes(b)
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self.buffer_size:
+            self._drain()
+        return len(data)
+
+    def flush(self) -> None:
+        if not self.closed:
+            self._drain()
+            self.raw.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._drain(final=True)
+        finally:
+            # IOBase.close() 会先调用 flush()，raw 要在它之后关闭
+            super().close()
+            if self.close_raw:
+                self.raw.close()
+
+    def _drain(self, final: bool = False) -> None:
+        """脱敏并写出缓冲区中的内容"""
+        data = b''.join(self._buffer)
+        self._buffer.clear()
+        self._buffered = 0
+        output = self._redaction.feed(data, final)
+        if output:
+            self.raw.write(output)
+
+
+def redact_file(input_path: str, output_path: str = '-', replace: Optional[Replacer] = None,
+                validator: Optional[ChineseIDValidator] = None, chunk_size: int = CHUNK_SIZE) -> ExtractStats:
+    """
+    脱敏文件
+
+    Args:
+        input_path: 输入文件路径，'-' 表示标准输入
+        output_path: 输出文件路径，'-' 表示标准输出
+        replace: 替换函数，默认 masker()
+        validator: 验证器实例，默认新建一个；整个文件使用开始时的参考日期
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        ExtractStats: 统计信息（valid 为替换的号码数）
+    """
+    if validator is None:
+        validator = ChineseIDValidator()
+    validator = validator.pinned()
+    stats = ExtractStats()
+    source = sys.stdin.buffer if input_path == '-' else open(input_path, 'rb', buffering=0)
+    target = sys.stdout.buffer if output_path == '-' else open(output_path, 'wb', buffering=BUFFER_SIZE)
+    try:
+        chunks = iter(lambda: source.read(chunk_size), b'')
+        for output in redact_chunks(chunks, replace, validator, stats):
+            target.write(output)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if target is sys.stdout.buffer:
+            target.flush()
+        else:
+            target.close()
+    return stats.finish()
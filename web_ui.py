@@ -7,13 +7,756 @@ Chinese ID Card Validator - Web Interface
 基于Flask的Web界面，支持批量验证身份证号码
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+import codecs
+import gzip
+import io
 import json
-from id_validator import ChineseIDValidator
+import os
+import queue
+import re
+import threading
+import zlib
+from werkzeug.exceptions import ClientDisconnected
+from id_admission import AdmissionController, Rejected
+from id_cache import CachedResult, LRUCache
+from id_coalesce import Coalescer
+from id_columnar import MSGPACK_AVAILABLE, ColumnarEncoder, dumps_json, dumps_msgpack
+from id_jobs import STATUS_DONE, STATUS_FAILED, JobStore
+from id_normalize import normalize
+from id_parallel import WorkerPool, worker_validator
+from id_validator import ChineseIDValidator, reason_messages
+
+try:
+    from id_batch import validate_many as _validate_many
+except ImportError:  # 未安装 numpy 时合并后的批次逐条验证
+    _validate_many = None
 
 app = Flask(__name__)
 validator = ChineseIDValidator()
 
+# 后台批量验证任务：工作线程数、已完成任务的保留秒数、结果内存上限
+JOB_WORKERS = 2
+JOB_MAX_AGE = 3600
+JOB_MAX_BYTES = 256 << 20
+jobs = JobStore(workers=JOB_WORKERS, max_age=JOB_MAX_AGE, max_bytes=JOB_MAX_BYTES)
+
+# 分页读取任务结果时每页的最大条数
+JOB_PAGE_LIMIT = 10000
+
+# 服务器推送事件在没有进度变化时发送心跳的间隔（秒）
+SSE_KEEPALIVE = 15
+
+# 进程池：工作进程数（0 表示不使用进程池），不少于多少行的请求交给进程池，每块的行数
+POOL_WORKERS = os.cpu_count() or 1
+POOL_MIN_LINES = 2000
+POOL_CHUNK_LINES = 2000
+_pool = None
+_pool_lock = threading.Lock()
+
+# 单条验证请求合并：每批最多合并的请求数（0 表示不合并）、正在形成一批时第一条请求最多等待的微秒数
+# （0 表示不等待，只合并处理上一批期间到达的请求；单独的请求总是立即处理），以及改用 numpy 批量验证的最小批次
+COALESCE_MAX_BATCH = 64
+COALESCE_MAX_DELAY_US = 0
+COALESCE_NUMPY_MIN = 16
+_coalescer = None
+_coalescer_lock = threading.Lock()
+
+# 验证结果缓存（/validate 和 /validate/one 使用）：最多保存的号码数（0 表示不缓存）、每条的存活秒数。
+# 单个请求可以用 ?cache=0 或 Cache-Control: no-cache 跳过缓存
+CACHE_MAXSIZE = 100000
+CACHE_TTL = 3600
+result_cache = LRUCache(CACHE_MAXSIZE, CACHE_TTL)
+
+# /validate 的响应格式：默认为逐条的 JSON；Accept 请求头或 ?format= 可以选择列式 JSON 或 MessagePack
+COLUMNAR_JSON_MIMETYPE = 'application/vnd.idcard.columnar+json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+RESPONSE_FORMATS = ('json', 'columnar', 'msgpack')
+
+# ?fields= 可选的名称：结果列表名选择返回哪些列表，条目字段名选择条目中包含哪些字段（有效号码没有 errors，
+# 无效号码只有 original / processed / errors）；?summary=true 只返回条数
+RESULT_LISTS = ('valid_ids', 'invalid_ids')
+ENTRY_FIELDS = ('original', 'processed', 'area', 'birth_date', 'age', 'gender', 'errors')
+VALID_FIELDS = ('original', 'processed', 'area', 'birth_date', 'age', 'gender')
+INVALID_FIELDS = ('original', 'processed', 'errors')
+
+# /validate、/validate/stream（按批）和 /jobs（提交时）的准入控制：同时验证的号码总数、等待队列中的号码总数、
+# 最长排队秒数、客户端用量的半衰期（秒）。超出时返回 429 和 Retry-After；客户端按 ADMISSION_CLIENT_HEADER 请求头（没有时按来源地址）区分，
+# 有空闲容量时优先放行最近验证号码最少的客户端。ADMISSION_MAX_ACTIVE_IDS = 0 表示不限制
+ADMISSION_MAX_ACTIVE_IDS = 100000
+ADMISSION_MAX_QUEUED_IDS = 500000
+ADMISSION_MAX_WAIT = 10.0
+ADMISSION_USAGE_HALF_LIFE = 30.0
+ADMISSION_CLIENT_HEADER = 'X-Client-Id'
+admission = AdmissionController(ADMISSION_MAX_ACTIVE_IDS, ADMISSION_MAX_QUEUED_IDS, ADMISSION_MAX_WAIT,
+                                ADMISSION_USAGE_HALF_LIFE)
+
+# 流式接口：每攒够多少条结果写出一次、读取队列的容量（行）、单行读取的最大字节数
+STREAM_FLUSH_LINES = 256
+STREAM_QUEUE_LINES = 4096
+STREAM_LINE_LIMIT = 1024
+
+# 请求体：解压后的大小上限（超过时返回 413）、每次读取的字节数；支持的 Content-Encoding 及对应的 zlib wbits
+MAX_BODY_BYTES = 16 << 20
+BODY_READ_CHUNK = 64 << 10
+BODY_ENCODINGS = {'gzip': 16 + zlib.MAX_WBITS, 'deflate': zlib.MAX_WBITS}
+
+# 响应压缩：客户端支持 gzip / deflate 时压缩不小于 COMPRESS_MIN_BYTES 的响应（流式响应除外），
+# 压缩级别1速度最快（10万条结果 18MB -> 2.9MB，约0.1秒）
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_LEVEL = 1
+
+def _valid_entry(original_input, result):
+    """合法号码的结果条目"""
+    info = result['info']
+    return {
+        'original': original_input,
+        'processed': result['id_number'],
+        'area': info.get('area', '未知'),
+        'birth_date': info.get('birth_date', '未知'),
+        'age': info.get('age', '未知'),
+        'gender': info.get('gender', '未知')
+    }
+
+def _invalid_entry(original_input, result):
+    """不合法号码的结果条目"""
+    return {
+        'original': original_input,
+        'processed': result.get('id_number', original_input),
+        'errors': result['errors']
+    }
+
+def _entry(original_input, result):
+    """带有效标记的结果条目（流式接口和后台任务使用）"""
+    if result.valid:
+        return {'valid': True, **_valid_entry(original_input, result)}
+    return {'valid': False, **_invalid_entry(original_input, result)}
+
+def _cached_entry(original_input, cached, as_of):
+    """由缓存的结果生成条目（与 _valid_entry / _invalid_entry 相同），年龄按参考日期 as_of 重新计算"""
+    if cached.reasons:
+        return {
+            'original': original_input,
+            'processed': cached.id_number,
+            'errors': reason_messages(cached.reasons)
+        }
+    return {
+        'original': original_input,
+        'processed': cached.id_number,
+        'area': cached.area,
+        'birth_date': cached.birth_date,
+        'age': cached.age(as_of),
+        'gender': cached.gender
+    }
+
+def _lookup(original_input, as_of, cache, compute):
+    """
+    查询缓存，未命中时计算并写入缓存
+    
+    Args:
+        original_input: 原始输入
+        as_of: 参考日期
+        cache: 结果缓存，None 表示不使用缓存
+        compute: 未命中时调用 compute(original_input) 得到 CachedResult
+    
+    Returns:
+        CachedResult: 与参考日期无关的验证结果
+    """
+    if cache is None:
+        return compute(original_input)
+    key = normalize(original_input)
+    cached = cache.get(key)
+    if cached is None or not cached.usable(as_of):
+        cached = compute(original_input)
+        cache.put(key, cached)
+    return cached
+
+def _request_cache():
+    """本次请求使用的结果缓存（未启用或请求要求跳过时为 None）"""
+    if CACHE_MAXSIZE <= 0 or request.args.get('cache') == '0':
+        return None
+    if 'no-cache' in request.headers.get('Cache-Control', ''):
+        return None
+    return result_cache
+
+def _split_entries(chunk_validator, lines, cache=None):
+    """验证一批号码，返回 (合法条目列表, 不合法条目列表)"""
+    valid_ids = []
+    invalid_ids = []
+    as_of = chunk_validator.as_of
+    
+    def compute(line):
+        return CachedResult.from_result(chunk_validator.validate(line), as_of)
+    
+    for line in lines:
+        cached = _lookup(line, as_of, cache, compute)
+        if cached.reasons:
+            invalid_ids.append(_cached_entry(line, cached, as_of))
+        else:
+            valid_ids.append(_cached_entry(line, cached, as_of))
+    return valid_ids, invalid_ids
+
+def _columnar(chunk_validator, lines, cache=None):
+    """验证一批号码，返回按列保存结果的 ColumnarEncoder"""
+    encoder = ColumnarEncoder()
+    as_of = chunk_validator.as_of
+    
+    def compute(line):
+        return CachedResult.from_result(chunk_validator.validate(line), as_of)
+    
+    for line in lines:
+        encoder.add(line, _lookup(line, as_of, cache, compute), as_of)
+    return encoder
+
+# 条目字段的取值函数（参数为原始输入和验证结果），只在字段被请求时调用，
+# 验证结果的地区、出生日期、年龄等属性在访问时才计算
+_FIELD_VALUES = {
+    'original': lambda line, result: line,
+    'processed': lambda line, result: result.id_number,
+    'area': lambda line, result: result.area,
+    'birth_date': lambda line, result: result.birth_date.strftime('%Y-%m-%d'),
+    'age': lambda line, result: result.age,
+    'gender': lambda line, result: result.gender,
+    'errors': lambda line, result: result.errors,
+}
+
+def _projected_entries(chunk_validator, lines, lists, fields):
+    """
+    验证一批号码，只生成请求的结果列表和字段
+    
+    Args:
+        chunk_validator: 验证器
+        lines: 号码
+        lists: 要返回的结果列表（RESULT_LISTS 的子集），为空时只统计条数
+        fields: 条目中包含的字段（ENTRY_FIELDS 的子集）
+    
+    Returns:
+        tuple: (有效条数, 合法条目列表, 不合法条目列表)，未请求的列表为空
+    """
+    valid_ids = []
+    invalid_ids = []
+    if not lists:
+        # 只统计条数：不生成结果对象，遇到第一个错误即返回
+        return sum(map(chunk_validator.is_valid, lines)), valid_ids, invalid_ids
+    
+    valid_getters = [(name, _FIELD_VALUES[name]) for name in fields if name in VALID_FIELDS]
+    invalid_getters = [(name, _FIELD_VALUES[name]) for name in fields if name in INVALID_FIELDS]
+    want_valid = 'valid_ids' in lists
+    want_invalid = 'invalid_ids' in lists
+    valid_count = 0
+    for line in lines:
+        result = chunk_validator.validate(line)
+        if result.reasons:
+            if want_invalid:
+                invalid_ids.append({name: get(line, result) for name, get in invalid_getters})
+        else:
+            valid_count += 1
+            if want_valid:
+                valid_ids.append({name: get(line, result) for name, get in valid_getters})
+    return valid_count, valid_ids, invalid_ids
+
+def _serialized_entries(chunk_validator, lines):
+    """验证一批号码，返回每条的 (是否有效, 结果 JSON)（后台任务使用）"""
+    results = []
+    for line in lines:
+        result = chunk_validator.validate(line)
+        results.append((result.valid, json.dumps(_entry(line, result), ensure_ascii=False)))
+    return results
+
+def _pool_split_entries(lines, as_of):
+    """在工作进程中执行的 _split_entries"""
+    return _split_entries(worker_validator(as_of), lines)
+
+def _pool_columnar(lines, as_of):
+    """在工作进程中执行的 _columnar"""
+    return _columnar(worker_validator(as_of), lines)
+
+def _pool_projected_entries(lines, as_of, lists, fields):
+    """在工作进程中执行的 _projected_entries"""
+    return _projected_entries(worker_validator(as_of), lines, lists, fields)
+
+def _pool_serialized_entries(lines, as_of):
+    """在工作进程中执行的 _serialized_entries"""
+    return _serialized_entries(worker_validator(as_of), lines)
+
+def get_pool():
+    """获取应用的常驻进程池（首次调用时启动并预热全部工作进程）"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(POOL_WORKERS, validator)
+        return _pool
+
+def _validate_one_batch(id_numbers):
+    """合并器的批量处理函数：一批单条请求一起验证，返回每条与参考日期无关的结果"""
+    batch_validator = validator.pinned()
+    as_of = batch_validator.as_of
+    if _validate_many is None or len(id_numbers) < COALESCE_NUMPY_MIN:
+        return [CachedResult.from_result(batch_validator.validate(id_number), as_of) for id_number in id_numbers]
+    
+    # 批量验证后直接从数组生成结果（与逐条验证相同），地区名称在批内复用
+    batch = _validate_many(id_numbers, batch_validator)
+    area_names = {}
+    results = []
+    for index, id_number in enumerate(batch.ids):
+        reasons = int(batch.reasons[index])
+        if reasons:
+            results.append(CachedResult(id_number, reasons, None, None, 0, None, as_of))
+            continue
+        area_code = id_number[:6]
+        area = area_names.get(area_code)
+        if area is None:
+            area = area_names[area_code] = batch_validator.area_name(area_code)
+        birth = int(batch.birth_dates[index])
+        birth_date = f'{birth // 10000:04d}-{birth // 100 % 100:02d}-{birth % 100:02d}'
+        gender = '男' if int(id_number[16]) % 2 == 1 else '女'
+        results.append(CachedResult(id_number, 0, area, birth_date, birth, gender, as_of))
+    return results
+
+def get_coalescer():
+    """获取单条验证请求合并器（首次调用时启动后台线程）"""
+    global _coalescer
+    with _coalescer_lock:
+        if _coalescer is None:
+            _coalescer = Coalescer(_validate_one_batch, COALESCE_MAX_BATCH, COALESCE_MAX_DELAY_US)
+        return _coalescer
+
+def _response_format():
+    """
+    选择 /validate 的响应格式
+    
+    ?format=json|columnar|msgpack 优先，否则按 Accept 请求头协商（没有匹配时为 json）。
+    
+    Returns:
+        str: 'json'、'columnar' 或 'msgpack'；?format= 的值不支持时为 None
+    """
+    requested = request.args.get('format')
+    if requested is not None:
+        return requested if requested in RESPONSE_FORMATS else None
+    best = request.accept_mimetypes.best_match(['application/json', COLUMNAR_JSON_MIMETYPE, *MSGPACK_MIMETYPES])
+    if best == COLUMNAR_JSON_MIMETYPE:
+        return 'columnar'
+    if best in MSGPACK_MIMETYPES:
+        return 'msgpack'
+    return 'json'
+
+def _client_id():
+    """准入控制使用的客户端标识"""
+    return request.headers.get(ADMISSION_CLIENT_HEADER) or request.remote_addr
+
+def _rejected_response(e):
+    """未被准入时的 429 响应（带 Retry-After）"""
+    response = jsonify({'error': '服务繁忙，请稍后重试', 'reason': e.reason, 'retry_after': e.retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
+def _validate_lines(request_validator, lines, response_format, projection):
+    """按请求的格式和字段验证一批号码，返回响应"""
+    if response_format != 'json':
+        return _columnar_response(request_validator, lines, response_format)
+    
+    if projection is not None:
+        response = _projected_response(request_validator, lines, *projection)
+        response.vary.add('Accept')
+        return response
+    
+    if _use_pool(len(lines)):
+        # 大批量：分块交给进程池并行验证，不占用本进程的 GIL
+        valid_ids = []
+        invalid_ids = []
+        for part_valid, part_invalid in get_pool().map_chunks(
+                _pool_split_entries, lines, POOL_CHUNK_LINES, request_validator.as_of):
+            valid_ids.extend(part_valid)
+            invalid_ids.extend(part_invalid)
+    else:
+        # 逐行验证（重复提交的号码直接使用缓存的结果）
+        valid_ids, invalid_ids = _split_entries(request_validator, lines, _request_cache())
+    
+    response = jsonify({
+        'valid_ids': valid_ids,
+        'invalid_ids': invalid_ids,
+        'total': len(lines),
+        'valid_count': len(valid_ids),
+        'invalid_count': len(invalid_ids)
+    })
+    response.vary.add('Accept')
+    return response
+
+def _projection():
+    """
+    解析 ?summary= 和 ?fields=
+    
+    Returns:
+        tuple: (要返回的结果列表, 条目字段)；summary=true 时两者都为空，都没有指定时为 None（返回全部）。
+            条目中不含任何请求字段的列表不返回
+    
+    Raises:
+        ValueError: 名称不支持
+    """
+    if request.args.get('summary', '').lower() in ('1', 'true', 'yes'):
+        return (), ()
+    fields = request.args.get('fields')
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in RESULT_LISTS and name not in ENTRY_FIELDS]
+    if unknown:
+        raise ValueError(f'不支持的字段: {", ".join(unknown)}，可选: {", ".join(RESULT_LISTS + ENTRY_FIELDS)}')
+    lists = tuple(name for name in RESULT_LISTS if name in names) or RESULT_LISTS
+    entry_fields = tuple(name for name in ENTRY_FIELDS if name in names) or ENTRY_FIELDS
+    # 请求的字段都不属于某个列表的条目时（例如 ?fields=age 对 invalid_ids）不返回该列表，否则只是一串空对象
+    list_fields = {'valid_ids': VALID_FIELDS, 'invalid_ids': INVALID_FIELDS}
+    lists = tuple(name for name in lists if any(field in list_fields[name] for field in entry_fields))
+    return lists, entry_fields
+
+def _projected_response(request_validator, lines, lists, fields):
+    """验证并只返回请求的结果列表和字段"""
+    if _use_pool(len(lines)):
+        valid_count = 0
+        valid_ids = []
+        invalid_ids = []
+        for part_count, part_valid, part_invalid in get_pool().map_chunks(
+                _pool_projected_entries, lines, POOL_CHUNK_LINES, request_validator.as_of, lists, fields):
+            valid_count += part_count
+            valid_ids.extend(part_valid)
+            invalid_ids.extend(part_invalid)
+    else:
+        valid_count, valid_ids, invalid_ids = _projected_entries(request_validator, lines, lists, fields)
+    
+    data = {
+        'total': len(lines),
+        'valid_count': valid_count,
+        'invalid_count': len(lines) - valid_count
+    }
+    if 'valid_ids' in lists:
+        data['valid_ids'] = valid_ids
+    if 'invalid_ids' in lists:
+        data['invalid_ids'] = invalid_ids
+    return jsonify(data)
+
+def _columnar_response(request_validator, lines, response_format):
+    """验证并返回列式结果（列式 JSON 或 MessagePack）"""
+    if _use_pool(len(lines)):
+        # 各工作进程分别编码，再按顺序合并（字典下标重新映射）
+        encoder = ColumnarEncoder()
+        for part in get_pool().map_chunks(_pool_columnar, lines, POOL_CHUNK_LINES, request_validator.as_of):
+            encoder.extend(part)
+    else:
+        encoder = _columnar(request_validator, lines, _request_cache())
+    
+    data = encoder.to_dict()
+    if response_format == 'msgpack':
+        response = Response(dumps_msgpack(data), mimetype=MSGPACK_MIMETYPES[0])
+    else:
+        response = Response(dumps_json(data), mimetype=COLUMNAR_JSON_MIMETYPE)
+    response.vary.add('Accept')
+    return response
+
+def _use_pool(line_count):
+    """是否把该请求交给进程池（小请求留在请求线程中直接验证，延迟更低）"""
+    return POOL_WORKERS > 0 and line_count >= POOL_MIN_LINES
+
+class _BodyError(Exception):
+    """请求体无法读取：过大、编码不支持或无法解压"""
+    
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.status = status
+
+@app.errorhandler(_BodyError)
+def body_error(e):
+    return jsonify({'error': str(e)}), e.status
+
+class _Decompressor(io.RawIOBase):
+    """把 gzip / deflate 编码的请求体解压成可以逐块读取的流（每次解压的输出不超过读取的大小）"""
+    
+    def __init__(self, stream, wbits):
+        self._stream = stream
+        self._zlib = zlib.decompressobj(wbits)
+        self._pending = b''
+    
+    def readable(self):
+        return True
+    
+    def readinto(self, buffer):
+        size = len(buffer)
+        while not self._pending:
+            if self._zlib.unconsumed_tail:
+                self._pending = self._zlib.decompress(self._zlib.unconsumed_tail, size)
+            elif self._zlib.eof:
+                return 0
+            else:
+                chunk = self._stream.read(BODY_READ_CHUNK)
+                if not chunk:
+                    raise zlib.error('压缩数据不完整')
+                self._pending = self._zlib.decompress(chunk, size)
+        data = self._pending[:size]
+        self._pending = self._pending[size:]
+        buffer[:len(data)] = data
+        return len(data)
+
+def _body_stream():
+    """请求体的读取流，按 Content-Encoding 解压"""
+    encoding = request.headers.get('Content-Encoding', 'identity').strip().lower()
+    if encoding == 'identity':
+        return request.stream
+    if encoding not in BODY_ENCODINGS:
+        raise _BodyError(f'不支持的请求体编码: {encoding}，可选: {", ".join(BODY_ENCODINGS)}', 415)
+    return io.BufferedReader(_Decompressor(request.stream, BODY_ENCODINGS[encoding]), BODY_READ_CHUNK)
+
+def _body_chunks():
+    """
+    逐块产出（解压后的）请求体
+    
+    Raises:
+        _BodyError: 超过 MAX_BODY_BYTES（413）、编码不支持（415）或无法解压（400）
+    """
+    too_large = _BodyError(f'请求体超过 {MAX_BODY_BYTES >> 20}MB 上限', 413)
+    if request.content_length is not None and request.content_length > MAX_BODY_BYTES:
+        raise too_large
+    stream = _body_stream()
+    size = 0
+    try:
+        for chunk in iter(lambda: stream.read(BODY_READ_CHUNK), b''):
+            size += len(chunk)
+            if size > MAX_BODY_BYTES:
+                raise too_large
+            yield chunk
+    except zlib.error as e:
+        raise _BodyError(f'压缩的请求体无法解压: {e}', 400)
+
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# 跳过的值中可以整段越过的字符（字符串和括号之外的数字、true / false / null、逗号、冒号和空白）
+_JSON_SKIP = re.compile(r'[-+.0-9a-zA-Z:, \t\n\r]*')
+_JSON_LITERAL = re.compile(r'[-+.0-9a-zA-Z]*')
+_JSON_VALUE_LITERAL = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?|true|false|null')
+
+def _backslashes(text, start, end):
+    """text[start:end] 末尾连续的反斜杠个数（奇数时 text[end] 被转义）"""
+    position = end
+    while position > start and text[position - 1] == '\\':
+        position -= 1
+    return end - position
+
+class _JsonLines:
+    """
+    边读边解析 JSON 请求体 {"input_text": "..."}，从 input_text 中切分出非空行
+    
+    每次只解码读到的一块，input_text 按块转换（json.loads）后立即切分成行，
+    内存中只有已经切分出的行和未处理完的一小段输入，不会保留整个请求体或整个 input_text。
+    其余的键只检查括号和字符串，值不解析。
+    """
+    
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        self._text = ''
+        self._pos = 0
+        self._eof = False
+    
+    def _fill(self):
+        """读入下一块（丢弃已处理的部分）；没有更多输入时返回 False"""
+        while not self._eof:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                text = self._decoder.decode(b'', True)
+            else:
+                text = self._decoder.decode(chunk)
+            if text:
+                self._text = self._text[self._pos:] + text
+                self._pos = 0
+                return True
+        return False
+    
+    def _peek(self):
+        """跳过空白，返回下一个字符（输入结束时为空字符串）"""
+        while True:
+            self._pos = _JSON_WHITESPACE.match(self._text, self._pos).end()
+            if self._pos < len(self._text):
+                return self._text[self._pos]
+            if not self._fill():
+                return ''
+    
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError(f'位置 {self._pos} 处应为 {char!r}')
+        self._pos += 1
+    
+    def _string(self, sink):
+        """读取字符串的内容（开头的引号已读过），按块转换后交给 sink（转义序列和控制字符由 json.loads 检查）"""
+        while True:
+            text = self._text
+            start = self._pos
+            end = text.find('"', start)
+            while end >= 0 and _backslashes(text, start, end) % 2:
+                end = text.find('"', end + 1)
+            closed = end >= 0
+            if not closed:
+                # 块内没有结束的引号：转换到块末尾，末尾不完整的转义序列留到读入下一块后处理
+                end = len(text)
+                backslash = text.rfind('\\', max(start, end - 6), end)
+                if (backslash >= 0 and _backslashes(text, start, backslash + 1) % 2
+                        and (backslash == end - 1 or text[backslash + 1] == 'u' and backslash + 6 > end)):
+                    end = backslash
+            if end > start:
+                part = json.loads(f'"{text[start:end]}"')
+                if not closed and not self._eof and '\ud800' <= part[-1] <= '\udbff':
+                    # 代理对的前一半在块末尾：留到和读入的后一半一起转换
+                    part = part[:-1]
+                    end -= 6
+                if part:
+                    sink(part)
+                self._pos = end
+            if closed:
+                self._pos = end + 1
+                return
+            if not self._fill():
+                raise ValueError('字符串不完整')
+    
+    def _skip_value(self):
+        """跳过一个值"""
+        char = self._peek()
+        if char == '"':
+            self._pos += 1
+            self._string(lambda part: None)
+        elif char in ('{', '['):
+            depth = 0
+            while True:
+                self._pos = _JSON_SKIP.match(self._text, self._pos).end()
+                if self._pos == len(self._text):
+                    if not self._fill():
+                        raise ValueError('对象或数组不完整')
+                    continue
+                char = self._text[self._pos]
+                self._pos += 1
+                if char == '"':
+                    self._string(lambda part: None)
+                elif char in '{[':
+                    depth += 1
+                elif char in '}]':
+                    depth -= 1
+                    if depth == 0:
+                        return
+                else:
+                    raise ValueError(f'位置 {self._pos - 1} 处的字符无效')
+        else:
+            literal = []
+            while True:
+                end = _JSON_LITERAL.match(self._text, self._pos).end()
+                literal.append(self._text[self._pos:end])
+                self._pos = end
+                if end < len(self._text) or not self._fill():
+                    break
+            if not _JSON_VALUE_LITERAL.fullmatch(''.join(literal)):
+                raise ValueError(f'位置 {self._pos} 处应为 JSON 值')
+    
+    def lines(self):
+        """
+        解析整个请求体，返回 input_text 中去掉首尾空白的非空行（没有 input_text 时为空列表）
+        
+        Raises:
+            ValueError: 请求体不是合法的 JSON 对象
+            _BodyError: input_text 不是字符串（400）
+        """
+        lines = []
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                self._expect('"')
+                key = []
+                self._string(key.append)
+                self._expect(':')
+                if ''.join(key) == 'input_text':
+                    char = self._peek()
+                    if not char:
+                        raise ValueError('请求体不完整')
+                    if char != '"':
+                        raise _BodyError('input_text 必须是字符串', 400)
+                    self._pos += 1
+                    # 与 json.loads 相同，重复的键以最后一个为准
+                    lines = []
+                    current = []
+                    
+                    def sink(part):
+                        parts = part.split('\n')
+                        current.append(parts[0])
+                        if len(parts) > 1:
+                            line = ''.join(current).strip()
+                            if line:
+                                lines.append(line)
+                            lines.extend(line.strip() for line in parts[1:-1] if line.strip())
+                            current[:] = [parts[-1]]
+                    
+                    self._string(sink)
+                    line = ''.join(current).strip()
+                    if line:
+                        lines.append(line)
+                else:
+                    self._skip_value()
+                char = self._peek()
+                self._pos += 1
+                if char == '}':
+                    break
+                if char != ',':
+                    raise ValueError(f'位置 {self._pos - 1} 处应为 \',\' 或 \'}}\'')
+        if self._peek():
+            raise ValueError(f'位置 {self._pos} 处有多余的内容')
+        return lines
+
+def _input_lines():
+    """
+    从 JSON 请求的 input_text 或纯文本请求体中取出非空行
+    
+    请求体分块读取（gzip / deflate 编码的边读边解压），累计超过 MAX_BODY_BYTES 时立即返回 413，
+    不会先把整个请求体读进内存：JSON 请求体边读边解析（见 _JsonLines），纯文本请求体边读边切分成行。
+    
+    Raises:
+        _BodyError: 请求体无法读取，JSON 请求体不是合法的 JSON 对象，或 input_text 不是字符串（400）
+    """
+    chunks = _body_chunks()
+    if request.is_json:
+        try:
+            return _JsonLines(chunks).lines()
+        except ValueError as e:
+            raise _BodyError(f'请求体不是合法的 JSON 对象: {e}', 400)
+    
+    lines = []
+    tail = b''
+    for chunk in chunks:
+        parts = (tail + chunk).split(b'\n')
+        tail = parts.pop()
+        for part in parts:
+            line = part.decode('utf-8', errors='replace').strip()
+            if line:
+                lines.append(line)
+    line = tail.decode('utf-8', errors='replace').strip()
+    if line:
+        lines.append(line)
+    return lines
+
+@app.after_request
+def compress_response(response):
+    """客户端支持时用 gzip / deflate 压缩较大的响应"""
+    if (response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300 or 'Accept-Encoding' not in request.headers):
+        return response
+    if (response.content_length or 0) < COMPRESS_MIN_BYTES:
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(('gzip', 'deflate'))
+    if encoding == 'gzip':
+        response.set_data(gzip.compress(response.get_data(), COMPRESS_LEVEL, mtime=0))
+    elif encoding == 'deflate':
+        response.set_data(zlib.compress(response.get_data(), COMPRESS_LEVEL))
+    else:
+        return response
+    response.headers['Content-Encoding'] = encoding
+    return response
+
 @app.route('/')
 def index():
     """主页面"""
@@ -21,58 +764,356 @@ def index():
 
 @app.route('/validate', methods=['POST'])
 def validate_ids():
-    """验证身份证号码API"""
+    """
+    验证身份证号码API
+    
+    默认返回逐条的 JSON；Accept 为 application/vnd.idcard.columnar+json 或 application/msgpack
+    （或 ?format=columnar / ?format=msgpack）时返回列式结果，格式见 id_columnar。
+    
+    ?fields=invalid_ids,original,errors 只返回请求的结果列表和字段，?summary=true 只返回条数，
+    未请求的字段不会计算（只支持 JSON 格式）。
+    
+    请求体可以用 gzip / deflate 压缩（Content-Encoding），解压后超过 MAX_BODY_BYTES 时返回 413。
+    同时验证的号码数受准入控制限制，繁忙时返回 429 和 Retry-After（见 ADMISSION_*）。
+    """
     try:
-        data = request.get_json()
-        input_text = data.get('input_text', '').strip()
-        
-        if not input_text:
-            return jsonify({'error': '请输入要验证的身份证号码'}), 400
+        response_format = _response_format()
+        if response_format is None:
+            return jsonify({'error': f'不支持的响应格式，可选: {", ".join(RESPONSE_FORMATS)}'}), 400
+        if response_format == 'msgpack' and not MSGPACK_AVAILABLE:
+            return jsonify({'error': '服务器未安装 msgpack，不支持 MessagePack 格式'}), 406
+        try:
+            projection = _projection()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if projection is not None and response_format != 'json':
+            return jsonify({'error': 'fields / summary 只支持 JSON 格式，列式格式总是包含全部字段'}), 400
         
-        # 分割成行
-        lines = input_text.split('\n')
-        lines = [line.strip() for line in lines if line.strip()]
+        # 分块读取请求体（支持 gzip / deflate 压缩，超过上限返回 413）并分割成行
+        lines = _input_lines()
         
         if not lines:
             return jsonify({'error': '请输入要验证的身份证号码'}), 400
         
-        valid_ids = []
-        invalid_ids = []
-        
-        # 逐行验证
-        for line in lines:
-            original_input = line
-            result = validator.validate(line)
-            
-            if result['valid']:
-                # 合法身份证
-                info = result['info']
-                valid_ids.append({
-                    'original': original_input,
-                    'processed': result['id_number'],
-                    'area': info.get('area', '未知'),
-                    'birth_date': info.get('birth_date', '未知'),
-                    'age': info.get('age', '未知'),
-                    'gender': info.get('gender', '未知')
-                })
-            else:
-                # 不合法身份证
-                invalid_ids.append({
-                    'original': original_input,
-                    'processed': result.get('id_number', original_input),
-                    'errors': result['errors']
-                })
+        # 整个请求使用同一个参考日期
+        request_validator = validator.pinned()
         
-        return jsonify({
-            'valid_ids': valid_ids,
-            'invalid_ids': invalid_ids,
-            'total': len(lines),
-            'valid_count': len(valid_ids),
-            'invalid_count': len(invalid_ids)
-        })
+        if ADMISSION_MAX_ACTIVE_IDS <= 0:
+            return _validate_lines(request_validator, lines, response_format, projection)
+        # 按号码条数准入：容量不足时排队，队列已满或等待超时返回 429
+        with admission.admit(_client_id(), len(lines)):
+            return _validate_lines(request_validator, lines, response_format, projection)
         
+    except Rejected as e:
+        return _rejected_response(e)
+    except _BodyError:
+        raise
     except Exception as e:
         return jsonify({'error': f'验证过程出错: {str(e)}'}), 500
 
+@app.route('/validate/one', methods=['GET', 'POST'])
+def validate_one():
+    """
+    单条验证API：GET /validate/one?id=... 或 POST {"id_number": "..."}
+    
+    重复的号码直接使用缓存的结果；高并发时同时到达的未命中请求会被合并成一批验证
+    （见 COALESCE_MAX_BATCH / COALESCE_MAX_DELAY_US）。
+    """
+    if request.method == 'GET':
+        id_number = request.args.get('id', '')
+    else:
+        body = request.get_json(silent=True)
+        if body is None:
+            body = {}
+        if not isinstance(body, dict):
+            return jsonify({'error': '请求体必须是 JSON 对象，例如 {"id_number": "..."}'}), 400
+        id_number = body.get('id_number')
+        id_number = '' if id_number is None else str(id_number)
+    id_number = id_number.strip()
+    if not id_number:
+        return jsonify({'error': '请输入要验证的身份证号码'}), 400
+    
+    request_validator = validator.pinned()
+    as_of = request_validator.as_of
+    if COALESCE_MAX_BATCH > 0:
+        compute = get_coalescer().submit
+    else:
+        def compute(line):
+            return CachedResult.from_result(request_validator.validate(line), as_of)
+    cached = _lookup(id_number, as_of, _request_cache(), compute)
+    return jsonify({'valid': not cached.reasons, **_cached_entry(id_number, cached, as_of)})
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """服务运行统计"""
+    return jsonify({
+        'coalescer': _coalescer.metrics() if _coalescer is not None else None,
+        'cache': result_cache.stats() if CACHE_MAXSIZE > 0 else None,
+        'admission': admission.metrics() if ADMISSION_MAX_ACTIVE_IDS > 0 else None
+    })
+
+@app.route('/validate/stream', methods=['POST'])
+def validate_stream():
+    """
+    流式验证API
+    
+    请求体为纯文本，每行一个号码（可以使用分块传输编码边上传边验证，可以用 gzip / deflate 压缩）；
+    响应为 NDJSON，每个非空输入行对应一行结果，最后一行为汇总：
+        {"line": 1, "valid": true, "original": ..., "processed": ..., "area": ..., ...}
+        {"line": 2, "valid": false, "original": ..., "processed": ..., "errors": [...]}
+        {"summary": {"total": 2, "valid_count": 1, "invalid_count": 1}}
+    服务端边读取边验证边写出，内存占用与请求大小无关。压缩的请求体中途无法解压时（响应状态已经发出），
+    最后一行改为 {"error": ..., "summary": {...}}，表示结果不完整。
+    
+    每批（最多 STREAM_FLUSH_LINES 行）验证前按行数经过准入控制，验证完释放后再写出。
+    第一批在发出响应之前准入，未准入时返回 429 和 Retry-After；之后的某一批未准入时停止读取，
+    最后一行为 {"error": ..., "reason": ..., "retry_after": ..., "next_line": 未验证的第一行行号, "summary": {...}}。
+    """
+    lines = _LineReader(_body_stream())
+    batches = _stream_batches(lines)
+    client = _client_id()
+    # 按同一参考日期验证整个请求
+    stream_validator = validator.pinned()
+    
+    first = next(batches, None)
+    if first is not None and ADMISSION_MAX_ACTIVE_IDS > 0:
+        try:
+            admission.acquire(client, len(first))
+        except Rejected as e:
+            lines.close()
+            return _rejected_response(e)
+    
+    def generate():
+        total = valid_count = 0
+        rejected = None
+        batch = first
+        try:
+            while batch is not None:
+                if ADMISSION_MAX_ACTIVE_IDS > 0 and batch is not first:
+                    try:
+                        admission.acquire(client, len(batch))
+                    except Rejected as e:
+                        rejected = e
+                        break
+                try:
+                    output = []
+                    for line_number, line in batch:
+                        result = stream_validator.validate(line)
+                        total += 1
+                        valid_count += result.valid
+                        output.append(json.dumps({'line': line_number, **_entry(line, result)}, ensure_ascii=False))
+                finally:
+                    if ADMISSION_MAX_ACTIVE_IDS > 0:
+                        admission.release(len(batch))
+                # 释放容量后再写出，客户端读取得慢时不占用验证容量
+                yield '\n'.join(output) + '\n'
+                batch = next(batches, None)
+        finally:
+            lines.close()
+        
+        summary = {'total': total, 'valid_count': valid_count, 'invalid_count': total - valid_count}
+        if rejected is not None:
+            last = {'error': '服务繁忙，其余行未验证，请稍后从 next_line 开始重新提交', 'reason': rejected.reason,
+                    'retry_after': rejected.retry_after, 'next_line': batch[0][0], 'summary': summary}
+        elif lines.error is not None:
+            last = {'error': lines.error, 'summary': summary}
+        else:
+            last = {'summary': summary}
+        yield json.dumps(last, ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def _stream_batches(lines):
+    """
+    把 _LineReader 读到的非空行分批
+    
+    攒够 STREAM_FLUSH_LINES 行，或者已到达的输入处理完了（等待客户端继续上传之前）时产出一批，
+    每批为 [(行号, 去掉首尾空白的行), ...]。
+    """
+    batch = []
+    for line_number, raw in lines:
+        if raw is None:
+            if batch:
+                yield batch
+                batch = []
+            continue
+        line = raw.decode('utf-8', errors='replace').strip()
+        if line:
+            batch.append((line_number, line))
+            if len(batch) >= STREAM_FLUSH_LINES:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+class _LineReader:
+    """
+    在后台线程中逐行读取请求体，通过有界队列交给响应生成器
+    
+    迭代产出 (行号, 行字节串)；队列暂时为空（客户端还没有发来更多数据）时产出 (行号, None)，
+    生成器借此写出已有结果，而不是阻塞在读取上。超长的行只保留开头部分（反正不是合法号码）。
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._queue = queue.Queue(STREAM_QUEUE_LINES)
+        self._closed = threading.Event()
+        self.error = None   # 请求体无法解压时的错误信息（读取线程结束后才有效）
+        threading.Thread(target=self._pump, daemon=True).start()
+    
+    def _pump(self):
+        line_number = 0
+        continuation = False
+        try:
+            for raw in iter(lambda: self._stream.readline(STREAM_LINE_LIMIT), b''):
+                complete = raw.endswith(b'\n')
+                if not continuation:
+                    line_number += 1
+                    if not self._put((line_number, raw)):
+                        return
+                continuation = not complete
+        except zlib.error as e:
+            # 响应已经开始，无法再返回 400：记下错误，由最后一行告知客户端输出不完整
+            self.error = f'压缩的请求体无法解压: {e}'
+        except (ClientDisconnected, ConnectionError):
+            # 客户端中途断开：已读到的部分照常输出
+            pass
+        finally:
+            self._put(None)
+    
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def __iter__(self):
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                yield None, None
+                item = self._queue.get()
+            if item is None:
+                return
+            yield item
+    
+    def close(self):
+        self._closed.set()
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """
+    提交后台批量验证任务
+    
+    请求体与 /validate 相同（JSON 的 input_text），也可以直接提交纯文本；立即返回 202 和任务编号。
+    提交时按号码条数经过准入控制（与 /validate 共用容量，任务结束时释放），未准入时返回 429 和 Retry-After。
+    """
+    lines = _input_lines()
+    if not lines:
+        return jsonify({'error': '请输入要验证的身份证号码'}), 400
+    
+    release = None
+    if ADMISSION_MAX_ACTIVE_IDS > 0:
+        try:
+            admission.acquire(_client_id(), len(lines))
+        except Rejected as e:
+            return _rejected_response(e)
+        
+        def release():
+            admission.release(len(lines))
+    
+    # 整个任务使用提交时的参考日期
+    job_validator = validator.pinned()
+    
+    if _use_pool(len(lines)):
+        pool = get_pool()
+        
+        def process(chunk):
+            return pool.submit(_pool_serialized_entries, chunk, job_validator.as_of).result()
+    else:
+        def process(chunk):
+            return _serialized_entries(job_validator, chunk)
+    
+    try:
+        job = jobs.submit(lines, process, release)
+    except BaseException:
+        if release is not None:
+            release()
+        raise
+    return jsonify({
+        **job.progress(),
+        'status_url': f'/jobs/{job.id}',
+        'results_url': f'/jobs/{job.id}/results',
+        'events_url': f'/jobs/{job.id}/events'
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """查询任务进度"""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    return jsonify(job.progress())
+
+@app.route('/jobs/<job_id>/results', methods=['GET'])
+def job_results(job_id):
+    """
+    分页读取任务结果（按输入顺序），参数 offset（默认0）和 limit（默认1000，最大10000）
+    
+    任务未完成时也可以读取已经处理完的部分；next_offset 为 null 表示已全部读完。
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 1000, type=int), 1), JOB_PAGE_LIMIT)
+    
+    progress = job.progress()
+    page = job.page(offset, limit)
+    end = offset + len(page)
+    finished = progress['status'] in (STATUS_DONE, STATUS_FAILED) and end >= progress['processed']
+    header = {**progress, 'offset': offset, 'limit': limit, 'next_offset': None if finished else end}
+    # 结果已经序列化，直接拼接，不再逐条解析
+    body = json.dumps(header, ensure_ascii=False)[:-1] + ', "results": [' + ', '.join(page) + ']}'
+    return Response(body, mimetype='application/json')
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """
+    通过服务器推送事件（text/event-stream）推送任务进度
+    
+    进度变化时发送 progress 事件，任务结束时发送 done 事件后关闭连接。
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或已过期'}), 404
+    
+    def generate():
+        last = None
+        while True:
+            progress = job.progress()
+            if progress == last:
+                # 长时间没有变化时发送注释行，防止代理断开空闲连接
+                yield ': keepalive\n\n'
+            else:
+                finished = progress['status'] in (STATUS_DONE, STATUS_FAILED)
+                event = 'done' if finished else 'progress'
+                yield f"event: {event}\ndata: {json.dumps(progress, ensure_ascii=False)}\n\n"
+                if finished:
+                    return
+                last = progress
+            job.wait_for_change(progress['processed'], progress['status'], SSE_KEEPALIVE)
+    
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
 if __name__ == '__main__':
+    # 单进程调试服务器，只用于开发；生产环境使用多进程的 serve.py
+    # 调试模式下由重新加载器启动的子进程才真正处理请求，在它开始服务之前预先启动进程池
+    if POOL_WORKERS and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        get_pool()
     app.run(debug=True, port=5000)
\ No newline at end of file